@@ -1,14 +1,19 @@
 import time
+from typing import Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 # from app.services.mock_gpt_service import analyze_logs
-from app.services.gpt_service import analyze_logs
+from app.services.gpt_service import analyze_logs, stream_analysis, client as analysis_client
+from app.services.log_reducer import reduce_logs
+from app.services.analysis_cache import analysis_cache
+from app.core.sse import event_stream_response, relay_tokens
 from app.core.logger import log_analysis_request, log_error, logger
 
 router = APIRouter()
 
 class LogRequest(BaseModel):
     log: str
+    token_budget: Optional[int] = Field(default=None, ge=100, description="Token budget for the log text sent to the model")
 
 @router.post("/analyze")
 async def analyze_log(request: LogRequest):
@@ -21,7 +26,8 @@ async def analyze_log(request: LogRequest):
     try:
         logger.info(f"Starting analysis of log with {len(request.log)} characters")
         
-        result = analyze_logs(request.log)
+        reduction = reduce_logs(request.log, request.token_budget)
+        result = await analyze_logs(reduction.text)
         
         # Calculate duration
         duration = time.time() - start_time
@@ -34,7 +40,7 @@ async def analyze_log(request: LogRequest):
         )
         
         logger.info("Analysis completed successfully")
-        return {"analysis": result, "metadata": {"log_length": len(request.log), "processing_time_ms": round(duration * 1000, 2)}}
+        return {"analysis": result, "metadata": {"log_length": len(request.log), "processing_time_ms": round(duration * 1000, 2), "reduction": reduction.to_metadata()}}
         
     except Exception as e:
         duration = time.time() - start_time
@@ -45,3 +51,37 @@ async def analyze_log(request: LogRequest):
             duration=duration
         )
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/stream")
+async def stream_log_analysis(request: LogRequest):
+    """Analyze a log, relaying the analysis as server-sent events
+    
+    Emits ``token`` events with text chunks as they arrive from the model
+    and a final ``done`` event with metadata.
+    """
+    if not request.log.strip():
+        logger.warning("Empty log submitted for analysis")
+        raise HTTPException(status_code=400, detail="Log cannot be empty.")
+    
+    logger.info(f"Starting streaming analysis of log with {len(request.log)} characters")
+    reduction = reduce_logs(request.log, request.token_budget)
+    metadata = {"log_length": len(request.log), "reduction": reduction.to_metadata()}
+    return event_stream_response(relay_tokens(stream_analysis(reduction.text), {"metadata": metadata}))
+
+@router.get("/analyze/cache")
+async def get_analysis_cache_statistics():
+    """Get analysis cache hit/miss counters and size"""
+    try:
+        return analysis_cache.get_statistics()
+    except Exception as e:
+        logger.error(f"Error getting analysis cache statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get cache statistics: {str(e)}")
+
+@router.get("/analyze/client")
+async def get_analysis_client_statistics():
+    """Get model client concurrency, retry and circuit breaker state"""
+    try:
+        return analysis_client.get_statistics()
+    except Exception as e:
+        logger.error(f"Error getting analysis client statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get client statistics: {str(e)}")
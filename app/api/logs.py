@@ -1,9 +1,14 @@
 import tempfile
+import time
+from datetime import datetime
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-from fastapi.responses import FileResponse
-from app.models.log import LogUploadResponse, LogListResponse
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from app.models.log import LogUploadResponse, LogListResponse, LogSummary, LogFileHeader, LogEntriesResponse, LogSearchHit, LogSearchResponse, TimelineEntry, LogTemplate
 from app.services.log_manager import LogManager
+from app.core.sse import event_stream_response, relay_tokens
 from app.core.logger import logger
 
 router = APIRouter()
@@ -12,10 +17,30 @@ router = APIRouter()
 log_manager = LogManager()
 
 @router.get("/logs", response_model=LogListResponse)
-async def get_logs():
-    """Get all uploaded log files"""
+async def get_logs(
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of files to return"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    sort_by: Literal["upload_time", "filename", "size", "log_count"] = Query("upload_time", description="Sort field"),
+    order: Literal["asc", "desc"] = Query("desc", description="Sort order"),
+    status: Optional[str] = Query(None, description="Filter by analysis status"),
+    uploaded_after: Optional[datetime] = Query(None, description="Only files uploaded at or after this time"),
+    uploaded_before: Optional[datetime] = Query(None, description="Only files uploaded before this time"),
+    include_summary: bool = Query(False, description="Include per-file summary statistics")
+):
+    """Get a page of uploaded log file headers"""
     try:
-        return log_manager.get_all_files()
+        return log_manager.get_all_files(
+            limit=limit,
+            cursor=cursor,
+            sort_by=sort_by,
+            order=order,
+            status=status,
+            uploaded_after=uploaded_after,
+            uploaded_before=uploaded_before,
+            include_summary=include_summary
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting logs: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve logs")
@@ -57,7 +82,60 @@ async def upload_log_file(file: UploadFile = File(...)):
         logger.error(f"Error uploading file {file.filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
-@router.get("/logs/{file_id}")
+@router.get("/logs/search", response_model=LogSearchResponse)
+async def search_logs(
+    q: str = Query(..., description='Query: terms are ANDed, OR/NOT/-term supported, "quoted phrases"'),
+    level: Optional[str] = Query(None, description="Filter by log level"),
+    since: Optional[datetime] = Query(None, description="Only entries at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only entries before this time"),
+    file_id: Optional[str] = Query(None, description="Restrict search to one file"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of hits"),
+    offset: int = Query(0, ge=0, description="Number of hits to skip")
+):
+    """Full-text search over entries of all uploaded log files"""
+    start_time = time.time()
+    try:
+        results = log_manager.search(
+            q, level=level, since=since, until=until,
+            file_id=file_id, limit=limit, offset=offset
+        )
+        
+        return LogSearchResponse(
+            query=q,
+            hits=[LogSearchHit(file_id=hit_file_id, entry_index=entry_index, entry=entry)
+                  for hit_file_id, entry_index, entry in results],
+            took_ms=round((time.time() - start_time) * 1000, 2)
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching logs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@router.get("/timeline")
+async def get_timeline(
+    files: Optional[str] = Query(None, description="Comma-separated file IDs; all files when omitted"),
+    since: Optional[datetime] = Query(None, description="Only entries at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only entries before this time"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of entries to stream")
+):
+    """Stream entries of several files merged in time order as NDJSON"""
+    file_ids = [file_id for file_id in files.split(",") if file_id] if files else None
+    try:
+        timeline = log_manager.iter_timeline(file_ids, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    def stream():
+        for count, (file_id, entry_index, entry) in enumerate(timeline):
+            if limit is not None and count >= limit:
+                break
+            yield TimelineEntry(file_id=file_id, entry_index=entry_index, entry=entry).model_dump_json() + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.get("/logs/{file_id}", response_model=LogFileHeader)
 async def get_log_file(file_id: str):
     """Get specific log file details"""
     try:
@@ -73,18 +151,82 @@ async def get_log_file(file_id: str):
         logger.error(f"Error getting log file {file_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve log file")
 
+@router.get("/logs/{file_id}/entries", response_model=LogEntriesResponse)
+async def get_log_file_entries(
+    file_id: str,
+    offset: int = Query(0, ge=0, description="Index of the first entry to return"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of entries to return")
+):
+    """Get a page of parsed entries of a log file"""
+    try:
+        entries = log_manager.get_entries(file_id, offset=offset, limit=limit)
+        if entries is None:
+            raise HTTPException(status_code=404, detail="Log file not found")
+        
+        return LogEntriesResponse(file_id=file_id, offset=offset, entries=entries)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting entries for file {file_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve log entries")
+
+@router.get("/logs/{file_id}/summary", response_model=LogSummary)
+async def get_log_file_summary(file_id: str):
+    """Get summary statistics of a log file"""
+    try:
+        summary = log_manager.get_summary(file_id)
+        if not summary:
+            raise HTTPException(status_code=404, detail="Log file not found")
+        
+        return summary
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting summary for file {file_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve log file summary")
+
+@router.get("/logs/{file_id}/templates", response_model=List[LogTemplate])
+async def get_log_file_templates(file_id: str):
+    """Get message templates mined from a log file, most frequent first"""
+    try:
+        templates = log_manager.get_templates(file_id)
+        if templates is None:
+            raise HTTPException(status_code=404, detail="Log file not found")
+        
+        return templates
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting templates for file {file_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve log file templates")
+
 @router.post("/logs/{file_id}/analyze")
-async def analyze_log_file(file_id: str):
+async def analyze_log_file(
+    file_id: str,
+    token_budget: Optional[int] = Query(None, ge=100, description="Token budget for the log text sent to the model"),
+    mode: Literal["auto", "single", "map_reduce"] = Query("auto", description="Single call, map-reduce over chunks, or map-reduce only when the log exceeds the budget"),
+    chunk_entries: Optional[int] = Query(None, ge=1, description="Maximum entries per map-reduce chunk"),
+    chunk_minutes: Optional[int] = Query(None, ge=1, description="Maximum time span of a map-reduce chunk in minutes"),
+    max_concurrency: Optional[int] = Query(None, ge=1, le=64, description="Maximum concurrent chunk analyses"),
+    reuse_similar: Optional[bool] = Query(None, description="Reuse the analysis of a near-duplicate past incident instead of calling the model")
+):
     """Analyze a log file using AI"""
     try:
-        analysis_result = log_manager.analyze_file(file_id)
+        analysis_result = await run_in_threadpool(
+            log_manager.analyze_file, file_id, token_budget=token_budget, mode=mode, chunk_entries=chunk_entries,
+            chunk_minutes=chunk_minutes, max_concurrency=max_concurrency, reuse_similar=reuse_similar
+        )
         if not analysis_result:
             raise HTTPException(status_code=404, detail="Log file not found")
         
         return {
             "file_id": file_id,
-            "analysis": analysis_result,
-            "status": "completed"
+            "analysis": analysis_result.analysis,
+            "status": "completed",
+            "metadata": analysis_result.metadata
         }
         
     except HTTPException:
@@ -93,6 +235,30 @@ async def analyze_log_file(file_id: str):
         logger.error(f"Error analyzing file {file_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze file: {str(e)}")
 
+@router.post("/logs/{file_id}/analyze/stream")
+async def stream_log_file_analysis(
+    file_id: str,
+    token_budget: Optional[int] = Query(None, ge=100, description="Token budget for the log text sent to the model")
+):
+    """Analyze a log file, relaying the analysis as server-sent events
+    
+    Emits ``token`` events with text chunks and a final ``done`` event with
+    metadata; the analysis is saved once the stream completes.
+    """
+    try:
+        prepared = await run_in_threadpool(log_manager.stream_analysis, file_id, token_budget)
+        if not prepared:
+            raise HTTPException(status_code=404, detail="Log file not found")
+        
+        chunks, metadata = prepared
+        return event_stream_response(relay_tokens(chunks, {"file_id": file_id, "status": "completed", "metadata": metadata}))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting streaming analysis of file {file_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to analyze file: {str(e)}")
+
 @router.delete("/logs/{file_id}")
 async def delete_log_file(file_id: str):
     """Delete a log file"""
@@ -1,70 +1,173 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.db import get_session
-from app.models.log_sql import LogFile, LogEntry
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select, func
+from sqlalchemy import column, literal_column, table, tuple_
+from sqlalchemy.exc import OperationalError
+from app.db import get_session, get_read_session
+from app.models.log_sql import (
+    LogFile, LogEntry, LogFileHeader, LogFileRead, LogFileCreate, LogFileUpdate, LogFilePage,
+    LogEntryPage, LogEntrySearchHit, LogEntrySearchResponse
+)
+from app.core.pagination import encode_cursor, decode_cursor
 from datetime import datetime
-from typing import List
-import json
+import time
+from typing import List, Literal, Optional
+from app.models.log import LogEntry as ParsedLogEntry
 from app.services.log_parser import LogParser
+from app.services.sql_ingest import bulk_insert_entries
+from app.services.time_index import naive_utc
+from app.services.blob_store import blob_store
+from app.services import retention
 
 router = APIRouter()
 
-# LogFile CRUD
-@router.post("/logs_sql", response_model=LogFile)
-def create_log_file(log_file: LogFile, session: Session = Depends(get_session)):
-    # Ensure upload_time is a datetime object
-    if isinstance(log_file.upload_time, str):
-        log_file.upload_time = datetime.fromisoformat(log_file.upload_time)
+# Query building and write steps below are shared with the async routes
+# in app/api/logs_sql_async.py
+
+def parse_entries(log_file_create: LogFileCreate) -> List[ParsedLogEntry]:
+    # --- AUTOMATYCZNE PARSOWANIE LOGÓW NA WPISY ---
+    if not log_file_create.content:
+        return []
+    return LogParser()._parse_content(log_file_create.content, log_file_create.filename)
+
+def store_log_file(session: Session, log_file_create: LogFileCreate, entries: List[ParsedLogEntry]) -> LogFile:
+    """Add the file, its content and entries to the session's transaction"""
+    content = log_file_create.content
+    log_file = LogFile.model_validate(log_file_create.model_dump(exclude={"content"}))
+    if content is not None:
+        log_file.content_digest = blob_store.put(session, content.encode("utf-8"))
     session.add(log_file)
+    # Flush to get the id; the file, its content and entries are committed together
+    session.flush()
+    if entries:
+        log_file.log_count = bulk_insert_entries(session, log_file.id, entries)
+    return log_file
+
+def apply_log_file_update(session: Session, log_file: LogFile, log_file_update: LogFileUpdate):
+    changes = log_file_update.model_dump(exclude_unset=True)
+    old_digest = log_file.content_digest
+    if "content" in changes:
+        content = changes.pop("content")
+        log_file.content_digest = blob_store.put(session, content.encode("utf-8")) if content is not None else None
+    for name, value in changes.items():
+        setattr(log_file, name, value)
+    session.add(log_file)
+    session.flush()
+    if log_file.content_digest != old_digest:
+        blob_store.release(session, old_digest)
+
+def remove_log_file(session: Session, log_file: LogFile):
+    retention.delete_log_file(session, log_file)
+
+# LogFile CRUD
+@router.post("/logs_sql", response_model=LogFileHeader)
+def create_log_file(log_file_create: LogFileCreate, session: Session = Depends(get_session)):
+    log_file = store_log_file(session, log_file_create, parse_entries(log_file_create))
     session.commit()
     session.refresh(log_file)
-
-    # --- AUTOMATYCZNE PARSOWANIE LOGÓW NA WPISY ---
-    if log_file.content:
-        parser = LogParser()
-        entries = parser._parse_content(log_file.content, log_file.filename)
-        log_entries = []
-        for entry in entries:
-            # Tworzymy LogEntry zgodny z modelem SQLModel
-            log_entry = LogEntry(
-                log_file_id=log_file.id,
-                timestamp=entry.timestamp,
-                level=entry.level,
-                message=entry.message,
-                source=entry.source,
-                log_metadata=json.dumps(getattr(entry, 'metadata', {})) if hasattr(entry, 'metadata') else None
-            )
-            session.add(log_entry)
-            log_entries.append(log_entry)
-        session.commit()
-        # Zaktualizuj log_count
-        log_file.log_count = len(log_entries)
-        session.add(log_file)
-        session.commit()
-        session.refresh(log_file)
     return log_file
 
-@router.get("/logs_sql", response_model=List[LogFile])
-def read_log_files(session: Session = Depends(get_session)):
-    return session.exec(select(LogFile)).all()
+HEADER_COLUMNS = [getattr(LogFile, name) for name in LogFileHeader.model_fields]
+
+LogFileSort = Literal["upload_time", "filename", "size", "log_count"]
+
+def log_files_query(limit: int, cursor: Optional[str], sort_by: str, order: str, status: Optional[str],
+                    uploaded_after: Optional[datetime], uploaded_before: Optional[datetime]):
+    """(count statement, page statement) for a log file listing"""
+    # Only header columns are selected; content is served by /logs_sql/{id}/content
+    # Upload times are stored as naive UTC
+    uploaded_after, uploaded_before = naive_utc(uploaded_after), naive_utc(uploaded_before)
+    filters = []
+    if status is not None:
+        filters.append(LogFile.log_analysis_status == status)
+    if uploaded_after is not None:
+        filters.append(LogFile.upload_time >= uploaded_after)
+    if uploaded_before is not None:
+        filters.append(LogFile.upload_time < uploaded_before)
+
+    count_statement = select(func.count()).select_from(LogFile).where(*filters)
+
+    sort_column = getattr(LogFile, sort_by)
+    key = tuple_(sort_column, LogFile.id)
+    statement = select(*HEADER_COLUMNS).where(*filters)
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor)
+            if sort_by == "upload_time":
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(key < tuple_(value, last_id) if order == "desc" else key > tuple_(value, last_id))
+    if order == "desc":
+        statement = statement.order_by(sort_column.desc(), LogFile.id.desc())
+    else:
+        statement = statement.order_by(sort_column, LogFile.id)
+    return count_statement, statement.limit(limit + 1)
+
+def log_file_page(rows, limit: int, sort_by: str, total_count: int) -> LogFilePage:
+    files = [LogFileHeader(**row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(getattr(files[-1], sort_by), files[-1].id)
+    return LogFilePage(files=files, total_count=total_count, next_cursor=next_cursor)
+
+@router.get("/logs_sql", response_model=LogFilePage)
+def read_log_files(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort_by: LogFileSort = "upload_time",
+    order: Literal["asc", "desc"] = "desc",
+    status: Optional[str] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    session: Session = Depends(get_read_session),
+):
+    count_statement, statement = log_files_query(limit, cursor, sort_by, order, status, uploaded_after, uploaded_before)
+    total_count = session.exec(count_statement).one()
+    return log_file_page(session.exec(statement).all(), limit, sort_by, total_count)
 
-@router.get("/logs_sql/{log_file_id}", response_model=LogFile)
-def read_log_file(log_file_id: int, session: Session = Depends(get_session)):
+@router.get("/logs_sql/{log_file_id}", response_model=LogFileRead)
+def read_log_file(log_file_id: int, include_content: bool = False, session: Session = Depends(get_read_session)):
+    # The row only references the content; it is loaded from the blob store on request
     log_file = session.get(LogFile, log_file_id)
     if not log_file:
         raise HTTPException(status_code=404, detail="LogFile not found")
-    return log_file
+    content = blob_store.read_text(session, log_file.content_digest) if include_content else None
+    return LogFileRead(**log_file.model_dump(), content=content)
+
+def content_etag(log_file: LogFile) -> str:
+    # Content-addressed, so the digest is a strong validator
+    return f'"{log_file.content_digest}"'
+
+def content_headers(log_file: LogFile, etag: str, size: int) -> dict:
+    return {
+        "ETag": etag,
+        "Content-Length": str(size),
+        "Content-Disposition": f'inline; filename="{log_file.filename}"',
+    }
+
+@router.get("/logs_sql/{log_file_id}/content")
+def read_log_file_content(log_file_id: int, request: Request, session: Session = Depends(get_read_session)):
+    """Stream the raw log, decompressing one chunk at a time"""
+    log_file = session.get(LogFile, log_file_id)
+    if not log_file or log_file.content_digest is None:
+        raise HTTPException(status_code=404, detail="LogFile content not found")
+    etag = content_etag(log_file)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    size = blob_store.size(session, log_file.content_digest)
+    # The request's session, and its pool slot, stay open until the body is sent
+    chunks = blob_store.iter_chunks(session, log_file.content_digest)
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8", headers=content_headers(log_file, etag, size))
 
-@router.put("/logs_sql/{log_file_id}", response_model=LogFile)
-def update_log_file(log_file_id: int, log_file: LogFile, session: Session = Depends(get_session)):
-    db_log_file = session.get(LogFile, log_file_id)
-    if not db_log_file:
+@router.put("/logs_sql/{log_file_id}", response_model=LogFileHeader)
+def update_log_file(log_file_id: int, log_file_update: LogFileUpdate, session: Session = Depends(get_session)):
+    log_file = session.get(LogFile, log_file_id)
+    if not log_file:
         raise HTTPException(status_code=404, detail="LogFile not found")
-    log_file.id = log_file_id
-    if isinstance(log_file.upload_time, str):
-        log_file.upload_time = datetime.fromisoformat(log_file.upload_time)
-    session.merge(log_file)
+    apply_log_file_update(session, log_file, log_file_update)
     session.commit()
+    session.refresh(log_file)
     return log_file
 
 @router.delete("/logs_sql/{log_file_id}")
@@ -72,24 +175,140 @@ def delete_log_file(log_file_id: int, session: Session = Depends(get_session)):
     log_file = session.get(LogFile, log_file_id)
     if not log_file:
         raise HTTPException(status_code=404, detail="LogFile not found")
-    session.delete(log_file)
+    remove_log_file(session, log_file)
     session.commit()
     return {"ok": True}
 
 # LogEntry CRUD
 @router.post("/log_entries_sql", response_model=LogEntry)
 def create_log_entry(log_entry: LogEntry, session: Session = Depends(get_session)):
+    if isinstance(log_entry.timestamp, str):
+        log_entry.timestamp = datetime.fromisoformat(log_entry.timestamp)
     session.add(log_entry)
     session.commit()
     session.refresh(log_entry)
     return log_entry
 
-@router.get("/log_entries_sql", response_model=List[LogEntry])
-def read_log_entries(session: Session = Depends(get_session)):
-    return session.exec(select(LogEntry)).all()
+def log_entries_query(log_file_id: Optional[int], level: Optional[str], source: Optional[str],
+                      since: Optional[datetime], until: Optional[datetime], limit: int, cursor: Optional[str], order: str):
+    # Keyset pagination on (timestamp, id): with a file or level filter the
+    # composite indexes serve every page without scanning skipped rows
+    # Stored timestamps are naive UTC
+    since, until = naive_utc(since), naive_utc(until)
+    filters = []
+    if log_file_id is not None:
+        filters.append(LogEntry.log_file_id == log_file_id)
+    if level is not None:
+        filters.append(LogEntry.level == level)
+    if source is not None:
+        filters.append(LogEntry.source == source)
+    if since is not None:
+        filters.append(LogEntry.timestamp >= since)
+    if until is not None:
+        filters.append(LogEntry.timestamp < until)
+
+    key = tuple_(LogEntry.timestamp, LogEntry.id)
+    statement = select(LogEntry).where(*filters)
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor)
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(key < tuple_(value, last_id) if order == "desc" else key > tuple_(value, last_id))
+    if order == "desc":
+        statement = statement.order_by(LogEntry.timestamp.desc(), LogEntry.id.desc())
+    else:
+        statement = statement.order_by(LogEntry.timestamp, LogEntry.id)
+    return statement.limit(limit + 1)
+
+def log_entry_page(entries, limit: int) -> LogEntryPage:
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(entries[-1].timestamp, entries[-1].id)
+    return LogEntryPage(entries=entries, next_cursor=next_cursor)
+
+@router.get("/log_entries_sql", response_model=LogEntryPage)
+def read_log_entries(
+    log_file_id: Optional[int] = None,
+    level: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+    session: Session = Depends(get_read_session),
+):
+    statement = log_entries_query(log_file_id, level, source, since, until, limit, cursor, order)
+    return log_entry_page(session.exec(statement).all(), limit)
+
+LOGENTRY_FTS = table("logentry_fts", column("rowid"))
+LOGENTRY_FTS_TABLE = literal_column("logentry_fts")
+
+def search_query(q: str, log_file_id: Optional[int], level: Optional[str], since: Optional[datetime],
+                 until: Optional[datetime], sort: str, limit: int, offset: int):
+    # "relevance" ranks every hit by bm25 before the limit applies, which is
+    # slow for very common terms; "recent" walks the index newest-first and
+    # stops at the limit. Filters are applied to the FTS hits
+    since, until = naive_utc(since), naive_utc(until)
+    filters = [LOGENTRY_FTS_TABLE.op("MATCH")(q)]
+    if log_file_id is not None:
+        filters.append(LogEntry.log_file_id == log_file_id)
+    if level is not None:
+        filters.append(LogEntry.level == level)
+    if since is not None:
+        filters.append(LogEntry.timestamp >= since)
+    if until is not None:
+        filters.append(LogEntry.timestamp < until)
+
+    return (
+        select(
+            LogEntry,
+            func.bm25(LOGENTRY_FTS_TABLE).label("rank"),
+            func.snippet(LOGENTRY_FTS_TABLE, 0, "<mark>", "</mark>", "…", 16).label("snippet"),
+        )
+        .select_from(LOGENTRY_FTS)
+        .join(LogEntry, LogEntry.id == LOGENTRY_FTS.c.rowid)
+        .where(*filters)
+        .order_by(literal_column("rank") if sort == "relevance" else LOGENTRY_FTS.c.rowid.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+
+def invalid_search_query(error: OperationalError, q: str) -> HTTPException:
+    # Anything but contention here is FTS5 rejecting the query syntax
+    if "locked" in str(error) or "busy" in str(error):
+        raise error
+    return HTTPException(status_code=400, detail=f"Invalid search query: {q}")
+
+def search_response(q: str, rows, start_time: float) -> LogEntrySearchResponse:
+    hits = [LogEntrySearchHit(entry=entry, rank=rank, snippet=snippet) for entry, rank, snippet in rows]
+    return LogEntrySearchResponse(query=q, hits=hits, took_ms=round((time.time() - start_time) * 1000, 2))
+
+@router.get("/log_entries_sql/search", response_model=LogEntrySearchResponse)
+def search_log_entries(
+    q: str = Query(..., min_length=1, description='FTS5 query: terms, "phrases", prefix*, AND/OR/NOT'),
+    log_file_id: Optional[int] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    sort: Literal["relevance", "recent"] = "relevance",
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_read_session),
+):
+    start_time = time.time()
+    statement = search_query(q, log_file_id, level, since, until, sort, limit, offset)
+    try:
+        rows = session.exec(statement).all()
+    except OperationalError as e:
+        raise invalid_search_query(e, q)
+    return search_response(q, rows, start_time)
 
 @router.get("/log_entries_sql/{log_entry_id}", response_model=LogEntry)
-def read_log_entry(log_entry_id: int, session: Session = Depends(get_session)):
+def read_log_entry(log_entry_id: int, session: Session = Depends(get_read_session)):
     log_entry = session.get(LogEntry, log_entry_id)
     if not log_entry:
         raise HTTPException(status_code=404, detail="LogEntry not found")
@@ -101,6 +320,8 @@ def update_log_entry(log_entry_id: int, log_entry: LogEntry, session: Session =
     if not db_log_entry:
         raise HTTPException(status_code=404, detail="LogEntry not found")
     log_entry.id = log_entry_id
+    if isinstance(log_entry.timestamp, str):
+        log_entry.timestamp = datetime.fromisoformat(log_entry.timestamp)
     session.merge(log_entry)
     session.commit()
     return log_entry
@@ -0,0 +1,170 @@
+"""
+Async variant of the SQL API routes on the aiosqlite engine (SQL_ASYNC=true)
+
+Same paths, models and queries as app/api/logs_sql.py, but handlers await
+the database instead of holding a threadpool worker for the whole request.
+Write steps reuse the sync helpers through ``AsyncSession.run_sync``, and
+CPU-bound parsing runs in a worker thread.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import OperationalError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db import get_async_session, get_async_read_session
+from app.models.log_sql import (
+    LogFile, LogEntry, LogFileHeader, LogFileRead, LogFileCreate, LogFileUpdate, LogFilePage,
+    LogEntryPage, LogEntrySearchResponse
+)
+from app.api.logs_sql import (
+    LogFileSort, parse_entries, store_log_file, apply_log_file_update, remove_log_file,
+    log_files_query, log_file_page, content_etag, content_headers, log_entries_query, log_entry_page,
+    search_query, invalid_search_query, search_response
+)
+from app.services.blob_store import blob_store
+
+router = APIRouter()
+
+# LogFile CRUD
+@router.post("/logs_sql", response_model=LogFileHeader)
+async def create_log_file(log_file_create: LogFileCreate, session: AsyncSession = Depends(get_async_session)):
+    entries = await asyncio.to_thread(parse_entries, log_file_create)
+    log_file = await session.run_sync(store_log_file, log_file_create, entries)
+    await session.commit()
+    await session.refresh(log_file)
+    return log_file
+
+@router.get("/logs_sql", response_model=LogFilePage)
+async def read_log_files(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort_by: LogFileSort = "upload_time",
+    order: Literal["asc", "desc"] = "desc",
+    status: Optional[str] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    count_statement, statement = log_files_query(limit, cursor, sort_by, order, status, uploaded_after, uploaded_before)
+    total_count = (await session.exec(count_statement)).one()
+    return log_file_page((await session.exec(statement)).all(), limit, sort_by, total_count)
+
+@router.get("/logs_sql/{log_file_id}", response_model=LogFileRead)
+async def read_log_file(log_file_id: int, include_content: bool = False,
+                        session: AsyncSession = Depends(get_async_read_session)):
+    log_file = await session.get(LogFile, log_file_id)
+    if not log_file:
+        raise HTTPException(status_code=404, detail="LogFile not found")
+    content = await session.run_sync(blob_store.read_text, log_file.content_digest) if include_content else None
+    return LogFileRead(**log_file.model_dump(), content=content)
+
+@router.get("/logs_sql/{log_file_id}/content")
+async def read_log_file_content(log_file_id: int, request: Request,
+                                session: AsyncSession = Depends(get_async_read_session)):
+    """Stream the raw log, decompressing one chunk at a time"""
+    log_file = await session.get(LogFile, log_file_id)
+    if not log_file or log_file.content_digest is None:
+        raise HTTPException(status_code=404, detail="LogFile content not found")
+    etag = content_etag(log_file)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    size = await session.run_sync(blob_store.size, log_file.content_digest)
+    # The request's session stays open until the body is sent
+    chunks = blob_store.iter_chunks_async(session, log_file.content_digest)
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8", headers=content_headers(log_file, etag, size))
+
+@router.put("/logs_sql/{log_file_id}", response_model=LogFileHeader)
+async def update_log_file(log_file_id: int, log_file_update: LogFileUpdate,
+                          session: AsyncSession = Depends(get_async_session)):
+    log_file = await session.get(LogFile, log_file_id)
+    if not log_file:
+        raise HTTPException(status_code=404, detail="LogFile not found")
+    await session.run_sync(apply_log_file_update, log_file, log_file_update)
+    await session.commit()
+    await session.refresh(log_file)
+    return log_file
+
+@router.delete("/logs_sql/{log_file_id}")
+async def delete_log_file(log_file_id: int, session: AsyncSession = Depends(get_async_session)):
+    log_file = await session.get(LogFile, log_file_id)
+    if not log_file:
+        raise HTTPException(status_code=404, detail="LogFile not found")
+    await session.run_sync(remove_log_file, log_file)
+    await session.commit()
+    return {"ok": True}
+
+# LogEntry CRUD
+@router.post("/log_entries_sql", response_model=LogEntry)
+async def create_log_entry(log_entry: LogEntry, session: AsyncSession = Depends(get_async_session)):
+    if isinstance(log_entry.timestamp, str):
+        log_entry.timestamp = datetime.fromisoformat(log_entry.timestamp)
+    session.add(log_entry)
+    await session.commit()
+    await session.refresh(log_entry)
+    return log_entry
+
+@router.get("/log_entries_sql", response_model=LogEntryPage)
+async def read_log_entries(
+    log_file_id: Optional[int] = None,
+    level: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    statement = log_entries_query(log_file_id, level, source, since, until, limit, cursor, order)
+    return log_entry_page((await session.exec(statement)).all(), limit)
+
+@router.get("/log_entries_sql/search", response_model=LogEntrySearchResponse)
+async def search_log_entries(
+    q: str = Query(..., min_length=1, description='FTS5 query: terms, "phrases", prefix*, AND/OR/NOT'),
+    log_file_id: Optional[int] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    sort: Literal["relevance", "recent"] = "relevance",
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    start_time = time.time()
+    statement = search_query(q, log_file_id, level, since, until, sort, limit, offset)
+    try:
+        rows = (await session.exec(statement)).all()
+    except OperationalError as e:
+        raise invalid_search_query(e, q)
+    return search_response(q, rows, start_time)
+
+@router.get("/log_entries_sql/{log_entry_id}", response_model=LogEntry)
+async def read_log_entry(log_entry_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    log_entry = await session.get(LogEntry, log_entry_id)
+    if not log_entry:
+        raise HTTPException(status_code=404, detail="LogEntry not found")
+    return log_entry
+
+@router.put("/log_entries_sql/{log_entry_id}", response_model=LogEntry)
+async def update_log_entry(log_entry_id: int, log_entry: LogEntry, session: AsyncSession = Depends(get_async_session)):
+    db_log_entry = await session.get(LogEntry, log_entry_id)
+    if not db_log_entry:
+        raise HTTPException(status_code=404, detail="LogEntry not found")
+    log_entry.id = log_entry_id
+    if isinstance(log_entry.timestamp, str):
+        log_entry.timestamp = datetime.fromisoformat(log_entry.timestamp)
+    await session.merge(log_entry)
+    await session.commit()
+    return log_entry
+
+@router.delete("/log_entries_sql/{log_entry_id}")
+async def delete_log_entry(log_entry_id: int, session: AsyncSession = Depends(get_async_session)):
+    log_entry = await session.get(LogEntry, log_entry_id)
+    if not log_entry:
+        raise HTTPException(status_code=404, detail="LogEntry not found")
+    await session.delete(log_entry)
+    await session.commit()
+    return {"ok": True}
@@ -0,0 +1,86 @@
+"""
+Dashboard chart data served from the log entry rollups
+"""
+import time
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy import String, type_coerce
+from sqlmodel import Session, select, func
+from app.db import get_read_session
+from app.models.log_sql import ROLLUP_BUCKET_FORMATS, LogEntryRollup, RollupBucket, RollupStats
+from app.services.time_index import naive_utc
+
+router = APIRouter()
+
+def _rollup_stats(session: Session, dimension: str, bucket: str, since: Optional[datetime],
+                  until: Optional[datetime], log_file_id: Optional[int], include_series: bool = True) -> RollupStats:
+    """Counts per bucket and per value of ``dimension``, read only from rollups
+
+    Work is proportional to the number of buckets returned, not to the
+    number of entries; without the series only per-value totals are read.
+    Buckets overlapping [since, until) are counted whole.
+    """
+    start_time = time.time()
+    conditions = [LogEntryRollup.resolution == bucket, LogEntryRollup.dimension == dimension]
+    # Buckets start at naive UTC times
+    since, until = naive_utc(since), naive_utc(until)
+    if since is not None:
+        # Floor to the bucket holding ``since``, with the format the rollups are keyed by
+        since = datetime.fromisoformat(since.strftime(ROLLUP_BUCKET_FORMATS[bucket]))
+        conditions.append(LogEntryRollup.bucket_start >= since)
+    if until is not None:
+        conditions.append(LogEntryRollup.bucket_start < until)
+    if log_file_id is not None:
+        conditions.append(LogEntryRollup.log_file_id == log_file_id)
+    count = func.sum(LogEntryRollup.count)
+    if not include_series:
+        statement = select(LogEntryRollup.value, count).where(*conditions).group_by(LogEntryRollup.value).having(count > 0)
+        return RollupStats(bucket=bucket, series=[], totals=dict(session.exec(statement).all()),
+                           took_ms=round((time.time() - start_time) * 1000, 2))
+
+    # Read the bucket as stored text and parse it once per bucket, not per row
+    bucket_text = type_coerce(LogEntryRollup.bucket_start, String)
+    statement = (
+        select(bucket_text, LogEntryRollup.value, count)
+        .where(*conditions)
+        .group_by(LogEntryRollup.bucket_start, LogEntryRollup.value)
+        .having(count > 0)
+        .order_by(LogEntryRollup.bucket_start, LogEntryRollup.value)
+    )
+
+    series = []
+    totals = {}
+    last_bucket = None
+    for bucket_start, value, total in session.exec(statement):
+        if bucket_start != last_bucket:
+            series.append(RollupBucket(bucket_start=datetime.fromisoformat(bucket_start), counts={}))
+            last_bucket = bucket_start
+        series[-1].counts[value] = total
+        totals[value] = totals.get(value, 0) + total
+    return RollupStats(bucket=bucket, series=series, totals=totals,
+                       took_ms=round((time.time() - start_time) * 1000, 2))
+
+@router.get("/stats/levels", response_model=RollupStats)
+def level_stats(
+    bucket: Literal["1m", "1h"] = "1h",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    log_file_id: Optional[int] = None,
+    include_series: bool = True,
+    session: Session = Depends(get_read_session),
+):
+    """Entry counts per level and time bucket"""
+    return _rollup_stats(session, "level", bucket, since, until, log_file_id, include_series)
+
+@router.get("/stats/sources", response_model=RollupStats)
+def source_stats(
+    bucket: Literal["1m", "1h"] = "1h",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    log_file_id: Optional[int] = None,
+    include_series: bool = True,
+    session: Session = Depends(get_read_session),
+):
+    """Entry counts per source and time bucket; entries without a source count under \"\""""
+    return _rollup_stats(session, "source", bucket, since, until, log_file_id, include_series)
@@ -2,51 +2,81 @@
 Middleware for request logging and performance monitoring
 """
 import time
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.metrics_service import metrics_service
 from .logger import log_api_request, log_error
+from .timing import TIMING_HEADER_ENABLED, collect_timings
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Start timing
-        start_time = time.time()
-        
-        # Get request details
-        method = request.method
-        url = str(request.url)
-        path = request.url.path
-        
+# Endpoint label of requests no route matched, so unknown paths share one series
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route the router matched (``/logs/{file_id}``), not the raw path"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ENDPOINT
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request metrics and logging every request
+
+    Unlike BaseHTTPMiddleware it passes messages straight through, so
+    streaming responses are not buffered and no extra task is spawned per
+    request. Records count, latency (until the last body chunk is sent),
+    request and response body sizes and in-flight requests, labeled by
+    route template to keep cardinality bounded. With ``timing_header`` the
+    pipeline stages timed before the response starts are sent back in a
+    ``Server-Timing`` header.
+    """
+
+    def __init__(self, app: ASGIApp, timing_header: bool = TIMING_HEADER_ENABLED):
+        self.app = app
+        self.timing_header = timing_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        status_code = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_counting() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_counting(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timings is not None:
+                    message["headers"] = [*message.get("headers", []),
+                                          (b"server-timing", timings.header_value().encode("latin-1"))]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = metrics_service.requests_in_progress.labels(method=method)
+        in_progress.inc()
+        timings = None
         try:
-            # Process request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Log successful request
-            log_api_request(
-                endpoint=path,
-                method=method,
-                status_code=response.status_code,
-                duration=duration,
-                url=url
-            )
-            
-            return response
-            
+            if self.timing_header:
+                with collect_timings() as timings:
+                    await self.app(scope, receive_counting, send_counting)
+            else:
+                await self.app(scope, receive_counting, send_counting)
         except Exception as e:
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Log error
-            log_error(
-                error=e,
-                context=f"Request {method} {path}",
-                endpoint=path,
-                method=method,
-                duration=duration,
-                url=url
-            )
-            
-            # Re-raise the exception
-            raise 
\ No newline at end of file
+            log_error(error=e, context=f"Request {method} {scope['path']}", endpoint=scope["path"], method=method,
+                      duration=time.perf_counter() - start_time)
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            in_progress.dec()
+            metrics_service.record_request(method, route_template(scope), status_code, duration,
+                                           request_size, response_size)
+
+        log_api_request(endpoint=scope["path"], method=method, status_code=status_code, duration=duration)
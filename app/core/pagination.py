@@ -0,0 +1,22 @@
+"""
+Opaque cursors for keyset pagination
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last returned row into an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
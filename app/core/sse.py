@@ -0,0 +1,45 @@
+"""
+Server-sent events helpers for streaming responses
+"""
+import json
+import time
+from typing import AsyncIterator, Dict
+from fastapi.responses import StreamingResponse
+from app.core.logger import logger
+
+def format_event(event: str, data: Dict) -> str:
+    """Encode one SSE event; data is JSON so newlines in text stay on one line"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def relay_tokens(chunks: AsyncIterator[str], metadata: Dict) -> AsyncIterator[str]:
+    """Relay text chunks as ``token`` events, then a ``done`` event with metadata
+
+    The ``done`` event adds time to first token and total stream time. A
+    failure mid-stream is reported as an ``error`` event, since the status
+    code has already been sent.
+    """
+    start_time = time.time()
+    first_token_ms = None
+    try:
+        async for chunk in chunks:
+            if first_token_ms is None:
+                first_token_ms = round((time.time() - start_time) * 1000, 2)
+            yield format_event("token", {"text": chunk})
+    except Exception as e:
+        logger.error(f"Error while streaming analysis: {str(e)}")
+        yield format_event("error", {"detail": str(e)})
+        return
+
+    yield format_event("done", {
+        **metadata,
+        "time_to_first_token_ms": first_token_ms,
+        "stream_ms": round((time.time() - start_time) * 1000, 2)
+    })
+
+def event_stream_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Streaming response with the headers SSE needs to reach the client unbuffered"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,142 @@
+"""
+Stage timers for the log pipeline
+
+``span("embed")`` or ``@timed("parse")`` times a block or function and
+records it in the ``smart_dashboard_stage_duration_seconds`` histogram.
+Stages are a fixed set so the label stays bounded. While a request is being
+served with TIMING_HEADER_ENABLED=true, spans are also added up per request
+and sent back as a ``Server-Timing`` header.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from app.services.metrics_service import metrics_service
+
+load_dotenv()
+
+TIMING_HEADER_ENABLED = os.getenv("TIMING_HEADER_ENABLED", "false").lower() == "true"
+
+# Spans do not overlap within one call path: vector_search and vector_index
+# exclude the embedding they need, which is timed as embed
+STAGES = (
+    "parse",         # reading and parsing an uploaded log
+    "persist",       # writing entries, indexes and metadata to uploads/
+    "load",          # reading stored entries and templates back for analysis
+    "search_index",  # full-text indexing of entries
+    "reduce",        # reducing a log to the token budget
+    "embed",         # sentence-transformer encoding
+    "vector_search", # FAISS lookup
+    "vector_index",  # rebuilding and saving the FAISS index
+    "llm",           # model call (or mock analysis), cache hits excluded
+)
+
+class StageTimings:
+    """Seconds and call count per stage for one request
+
+    Shared by every thread and task the request's context is copied into,
+    so concurrent spans (map-reduce chunks) add up to more than wall time.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def header_value(self) -> str:
+        """``Server-Timing`` value: one metric per stage in STAGES order, then the total so far"""
+        with self._lock:
+            metrics = []
+            for stage in STAGES:
+                if stage in self.stages:
+                    seconds, count = self.stages[stage]
+                    metric = f"{stage};dur={seconds * 1000:.1f}"
+                    if count > 1:
+                        metric += f';desc="{count} calls"'
+                    metrics.append(metric)
+        metrics.append(f"total;dur={(time.perf_counter() - self.start_time) * 1000:.1f}")
+        return ", ".join(metrics)
+
+_request_timings: contextvars.ContextVar[Optional[StageTimings]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+@contextmanager
+def collect_timings() -> Iterator[StageTimings]:
+    """Collect the spans of the current context (and contexts copied from it) into a StageTimings"""
+    timings = StageTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+@contextmanager
+def span(stage: str):
+    """Time a block as ``stage`` with outcome "ok", "error" or "cancelled"
+
+    A stream closed by its consumer (client disconnect) is "cancelled".
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+    outcome = "error"
+    start_time = time.perf_counter()
+    try:
+        yield
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    finally:
+        duration = time.perf_counter() - start_time
+        metrics_service.record_stage(stage, duration, outcome)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(stage, duration)
+
+def timed(stage: str):
+    """Decorator timing every call of a function or coroutine function as ``stage``"""
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+def run_in_context(func):
+    """Wrap ``func`` to run in a copy of the caller's context, for executor threads
+
+    ThreadPoolExecutor does not copy contextvars, so spans of submitted work
+    would otherwise miss the request's timings.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A Context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
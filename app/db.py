@@ -1,11 +1,156 @@
+import asyncio
+import os
+import weakref
+from functools import lru_cache
+from typing import Dict
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.services.blob_store import move_inline_content
+
+load_dotenv()
 
 DATABASE_URL = "sqlite:///./logs.db"
-engine = create_engine(DATABASE_URL, echo=True)
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./logs.db"
+# Serve the SQL API from async routes on an aiosqlite engine instead of the threadpool
+SQL_ASYNC = os.getenv("SQL_ASYNC", "false").lower() == "true"
+# Logging every statement is far too slow for bulk ingest; opt in with SQL_ECHO=true
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
+# Storage profiles: "production" enables WAL so readers never block the
+# writer, "default" leaves SQLite's own settings (rollback journal, FULL sync)
+SQLITE_PROFILES: Dict[str, Dict[str, str]] = {
+    "default": {},
+    "production": {
+        # Takes effect on new databases only, and must precede journal_mode;
+        # lets retention return free pages with incremental_vacuum
+        "auto_vacuum": os.getenv("SQLITE_AUTO_VACUUM", "INCREMENTAL"),
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        # Negative values are KiB, so -65536 is a 64 MiB page cache per connection
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    },
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+# SQLite has a single writer: one pooled write connection serializes writers
+# in the pool instead of letting them spin on the database lock
+SQLITE_WRITE_POOL_SIZE = int(os.getenv("SQLITE_WRITE_POOL_SIZE", "1"))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+SQLITE_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "30"))
+
+def _profile_pragmas(profile: str, read_only: bool) -> Dict[str, str]:
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if read_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+def _apply_pragmas_on_connect(engine: Engine, pragmas: Dict[str, str]):
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_sqlite_engine(url: str, profile: str = SQLITE_PROFILE, pool_size: int = SQLITE_WRITE_POOL_SIZE,
+                         read_only: bool = False, echo: bool = SQL_ECHO) -> Engine:
+    """SQLite engine applying the profile's pragmas to every new connection
+
+    Read-only engines additionally set ``query_only`` so a GET handler can
+    never take the write lock.
+    """
+    pragmas = _profile_pragmas(profile, read_only)
+    engine = create_engine(
+        url,
+        echo=echo,
+        connect_args={"check_same_thread": False, "timeout": int(pragmas.get("busy_timeout", 5000)) / 1000},
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=SQLITE_POOL_TIMEOUT,
+    )
+    _apply_pragmas_on_connect(engine, pragmas)
+    return engine
+
+def create_async_sqlite_engine(url: str, profile: str = SQLITE_PROFILE, pool_size: int = SQLITE_WRITE_POOL_SIZE,
+                               read_only: bool = False, echo: bool = SQL_ECHO) -> AsyncEngine:
+    """aiosqlite counterpart of ``create_sqlite_engine`` with the same pragmas and pooling"""
+    pragmas = _profile_pragmas(profile, read_only)
+    engine = create_async_engine(
+        url,
+        echo=echo,
+        connect_args={"timeout": int(pragmas.get("busy_timeout", 5000)) / 1000},
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=SQLITE_POOL_TIMEOUT,
+    )
+    _apply_pragmas_on_connect(engine.sync_engine, pragmas)
+    return engine
+
+engine = create_sqlite_engine(DATABASE_URL)
+read_engine = create_sqlite_engine(DATABASE_URL, pool_size=SQLITE_READ_POOL_SIZE, read_only=True)
+
+# Async engines are built on first use, so aiosqlite is only loaded when SQL_ASYNC routes serve requests
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    return create_async_sqlite_engine(ASYNC_DATABASE_URL)
+
+@lru_cache(maxsize=None)
+def get_async_read_engine() -> AsyncEngine:
+    return create_async_sqlite_engine(ASYNC_DATABASE_URL, pool_size=SQLITE_READ_POOL_SIZE, read_only=True)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        move_inline_content(connection)
+    # create_all skips indexes added to tables that already exist
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+# Per event loop, since asyncio semaphores bind to the loop that first waits on them
+_pool_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Engine, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+def _slots(db_engine: Engine) -> asyncio.Semaphore:
+    """One slot per pooled connection of ``db_engine``
+
+    Sync routes run in the AnyIO threadpool. A route blocked on an exhausted
+    pool holds a thread, while routes that hold a connection need a thread to
+    serialize their response before they release it. Once every thread waits
+    on the pool this deadlocks until pool_timeout. Requests wait for a slot in
+    the event loop instead, so at most pool-size of them occupy threads.
+    """
+    slots = _pool_slots.setdefault(asyncio.get_running_loop(), {})
+    if db_engine not in slots:
+        slots[db_engine] = asyncio.Semaphore(db_engine.pool.size())
+    return slots[db_engine]
+
+async def get_session():
+    async with _slots(engine):
+        with Session(engine) as session:
+            yield session
+
+async def get_read_session():
+    """Session from the read-only pool, for GET endpoints"""
+    async with _slots(read_engine):
+        with Session(read_engine) as session:
+            yield session
+
+async def get_async_session():
+    # Objects stay usable after commit: an expired attribute cannot lazy-load under asyncio
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
 
-def get_session():
-    with Session(engine) as session:
-        yield session 
\ No newline at end of file
+async def get_async_read_session():
+    """Async session from the read-only pool, for GET endpoints"""
+    async with AsyncSession(get_async_read_engine(), expire_on_commit=False) as session:
+        yield session
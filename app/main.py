@@ -11,16 +11,18 @@ Project Context:
 See PROJECT_SPEC.md for complete requirements and context.
 """
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from dotenv import load_dotenv
-from app.api import logs, analyze, vector, metrics, logs_sql
+from app.api import logs, analyze, vector, metrics, logs_sql, logs_sql_async, stats
 from app.core.logger import logger
-from app.core.middleware import LoggingMiddleware
+from app.core.middleware import MetricsMiddleware
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from app.db import create_db_and_tables
+from app.db import SQL_ASYNC, create_db_and_tables
+from app.services.retention import RETENTION_ENABLED, retention_service
 from contextlib import asynccontextmanager
 
 
@@ -29,10 +31,15 @@ from contextlib import asynccontextmanager
 load_dotenv()
 
 @asynccontextmanager
-def lifespan(app: FastAPI):
+async def lifespan(app: FastAPI):
     logger.info("Smart Dev Dashboard starting up...")
     create_db_and_tables()
+    retention_task = None
+    if RETENTION_ENABLED:
+        retention_task = asyncio.create_task(retention_service.run_periodically(logs.log_manager))
     yield
+    if retention_task:
+        retention_task.cancel()
     logger.info("Smart Dev Dashboard shutting down...")
 
 app = FastAPI(
@@ -42,8 +49,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add logging middleware
-app.add_middleware(LoggingMiddleware)
+# Add request metrics and logging middleware
+app.add_middleware(MetricsMiddleware)
 
 # Add CORS middleware for frontend-backend communication
 app.add_middleware(
@@ -59,7 +66,8 @@ app.include_router(logs.router)
 app.include_router(analyze.router)
 app.include_router(vector.router)
 app.include_router(metrics.router)
-app.include_router(logs_sql.router)
+app.include_router(logs_sql_async.router if SQL_ASYNC else logs_sql.router)
+app.include_router(stats.router)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
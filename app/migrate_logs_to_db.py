@@ -1,49 +1,306 @@
+"""
+Migrate log files stored by LogManager in uploads/ into the SQL database
+
+    python -m app.migrate_logs_to_db --workers 4
+
+Every ``<id>_metadata.json`` header becomes a LogFile. Its
+``<id>_entries.jsonl`` is cut into byte-range segments that a process pool
+parses, while this process stays the only SQLite writer and bulk-inserts the
+segments in order. A checkpoint row per source file is committed in the same
+transaction as each segment, so an interrupted run resumes after the last
+committed segment and re-running a finished migration inserts nothing.
+
+Legacy headers that still embed their entries are first split into the
+same layout, streaming the entries array to ``<id>_entries.jsonl`` one
+entry at a time, as LogManager does on startup.
+"""
+import argparse
 import json
-from pathlib import Path
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
-from sqlmodel import Session
-from app.db import engine
-from app.models.log_sql import LogFile, LogEntry
+from pathlib import Path
+from typing import Iterator, List, NamedTuple
+from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
+from sqlmodel import Field, Session, SQLModel
+from app.db import engine, create_db_and_tables
+from app.models.log_sql import LogFile
+from app.services.sql_ingest import bulk_insert_rows
+
+load_dotenv()
 
 UPLOADS_DIR = Path("uploads")
+# Bytes of JSON Lines parsed per task and committed per transaction
+MIGRATION_SEGMENT_SIZE = int(os.getenv("MIGRATION_SEGMENT_SIZE", str(16 * 1024 * 1024)))
+MIGRATION_WORKERS = int(os.getenv("MIGRATION_WORKERS", str(max((os.cpu_count() or 1) - 1, 1))))
+PROGRESS_INTERVAL_SECONDS = 10
+# Characters read at a time when splitting legacy headers
+LEGACY_READ_SIZE = 1024 * 1024
+
+_encode_metadata = json.JSONEncoder(separators=(',', ':')).encode
+_decoder = json.JSONDecoder()
+
+class MigrationCheckpoint(SQLModel, table=True):
+    """Migration progress of one LogManager file"""
+    source_id: str = Field(primary_key=True)
+    log_file_id: int
+    # Bytes of the entries file already inserted
+    position: int = 0
+    entry_count: int = 0
+    done: bool = False
+
+class Segment(NamedTuple):
+    source_id: str
+    log_file_id: int
+    path: str
+    start: int
+    end: int
+    last: bool
+
+def _entry_row(log_file_id: int, data: dict) -> dict:
+    metadata = data.get("metadata")
+    return {
+        "log_file_id": log_file_id,
+        "timestamp": datetime.fromisoformat(data["timestamp"]),
+        "level": data["level"],
+        "message": data["message"],
+        "source": data.get("source"),
+        "log_metadata": _encode_metadata(metadata) if metadata is not None else None
+    }
+
+def parse_segment(segment: Segment) -> List[dict]:
+    """Entry rows of the lines that start in ``[start, end)`` of an entries file
+
+    A line crossing ``end`` belongs to this segment and is skipped by the
+    next one, so segments can be cut at any byte offset.
+    """
+    rows = []
+    with open(segment.path, 'rb') as f:
+        if segment.start:
+            # Skip the rest of the line running through start
+            f.seek(segment.start - 1)
+            f.readline()
+        position = f.tell()
+        while position < segment.end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            if line.strip():
+                rows.append(_entry_row(segment.log_file_id, json.loads(line)))
+    return rows
+
+class _JSONReader:
+    """Reads the JSON values of a file one at a time through a bounded buffer"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(LEGACY_READ_SIZE)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it; empty at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A value running to the end of the buffer may be cut short, like a number
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+def _stream_entries(reader: _JSONReader, entries_path: Path):
+    tmp_path = entries_path.with_name(entries_path.name + ".tmp")
+    with open(tmp_path, 'w') as out:
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.expect(']')
+        else:
+            while True:
+                # Same line format as LogManager._save_entries
+                out.write(json.dumps(reader.value()) + "\n")
+                if reader.expect(',]') == ']':
+                    break
+    os.replace(tmp_path, entries_path)
+
+def read_header(meta_path: Path, entries_path: Path) -> dict:
+    """Read a metadata header, splitting legacy headers that embed their entries
+
+    The embedded array is streamed to ``entries_path`` as JSON Lines before
+    the header is rewritten without it, so memory stays bounded by the
+    largest entry and an interrupted split is redone on the next run.
+    """
+    header = {}
+    embedded = False
+    with open(meta_path, 'r') as f:
+        reader = _JSONReader(f)
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.expect('}')
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(':')
+                if key == "entries":
+                    _stream_entries(reader, entries_path)
+                    embedded = True
+                else:
+                    header[key] = reader.value()
+                if reader.expect(',}') == '}':
+                    break
+    if embedded:
+        tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(header, f)
+        os.replace(tmp_path, meta_path)
+    return header
+
+def _start_file(session: Session, source_id: str, header: dict) -> MigrationCheckpoint:
+    log_file = LogFile(
+        filename=header["filename"],
+        size=header["size"],
+        upload_time=datetime.fromisoformat(header["upload_time"]),
+        log_count=header["log_count"],
+        log_analysis_status=header.get("log_analysis_status", "pending"),
+        analysis_result=header.get("analysis_result")
+    )
+    session.add(log_file)
+    session.flush()
+    checkpoint = MigrationCheckpoint(source_id=source_id, log_file_id=log_file.id)
+    session.add(checkpoint)
+    session.commit()
+    return checkpoint
+
+def _segments(session: Session, uploads_dir: Path, segment_size: int, totals: dict) -> Iterator[Segment]:
+    """Segments still to insert, creating the LogFile of each file on first sight"""
+    for meta_path in sorted(uploads_dir.glob("*_metadata.json")):
+        source_id = meta_path.name[:-len("_metadata.json")]
+        checkpoint = session.get(MigrationCheckpoint, source_id)
+        if checkpoint is not None and checkpoint.done:
+            totals["skipped"] += 1
+            continue
+
+        entries_path = uploads_dir / f"{source_id}_entries.jsonl"
+        header = read_header(meta_path, entries_path)
+        if checkpoint is None:
+            checkpoint = _start_file(session, source_id, header)
+        totals["files"] += 1
+
+        size = entries_path.stat().st_size if entries_path.exists() else 0
+        start = checkpoint.position
+        while True:
+            end = min(start + segment_size, size)
+            yield Segment(source_id, checkpoint.log_file_id, str(entries_path), start, end, last=end >= size)
+            if end >= size:
+                break
+            start = end
+
+def _write_segment(session: Session, segment: Segment, rows: List[dict]) -> int:
+    count = bulk_insert_rows(session, segment.log_file_id, rows) if rows else 0
+    checkpoint = session.get(MigrationCheckpoint, segment.source_id)
+    checkpoint.position = segment.end
+    checkpoint.entry_count += count
+    checkpoint.done = segment.last
+    session.add(checkpoint)
+    session.commit()
+    return count
+
+def _parse_inline(segment: Segment) -> Future:
+    future = Future()
+    future.set_result(parse_segment(segment))
+    return future
+
+def migrate(uploads_dir: Path = UPLOADS_DIR, db_engine: Engine = engine, workers: int = MIGRATION_WORKERS,
+            segment_size: int = MIGRATION_SEGMENT_SIZE, report: bool = True) -> dict:
+    """Migrate every file of ``uploads_dir`` not migrated yet
+
+    ``workers=0`` parses in this process. At most two segments per worker
+    are parsed ahead of the writer, which bounds memory on large files.
+    Returns the run's totals.
+    """
+    MigrationCheckpoint.__table__.create(db_engine, checkfirst=True)
+    totals = {"files": 0, "skipped": 0, "entries": 0, "bytes": 0}
+    start_time = time.time()
+    last_report = start_time
+
+    def progress():
+        elapsed = max(time.time() - start_time, 1e-9)
+        print(f"{totals['files']} files, {totals['entries']:,} entries, {totals['bytes'] / 2**20:,.0f} MiB "
+              f"in {elapsed:.0f}s ({totals['entries'] / elapsed:,.0f} entries/s, "
+              f"{totals['bytes'] / 2**20 / elapsed:.1f} MiB/s)")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    pending = deque()
+    try:
+        with Session(db_engine) as session:
+            def write_next():
+                nonlocal last_report
+                segment, future = pending.popleft()
+                totals["entries"] += _write_segment(session, segment, future.result())
+                totals["bytes"] += segment.end - segment.start
+                if report and time.time() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    progress()
+                    last_report = time.time()
+
+            for segment in _segments(session, uploads_dir, segment_size, totals):
+                future = executor.submit(parse_segment, segment) if executor else _parse_inline(segment)
+                pending.append((segment, future))
+                if len(pending) > 2 * max(workers, 1):
+                    write_next()
+            while pending:
+                write_next()
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    totals["seconds"] = round(time.time() - start_time, 2)
+    if report:
+        progress()
+        if totals["skipped"]:
+            print(f"Skipped {totals['skipped']} files migrated by an earlier run")
+    return totals
 
-def migrate():
-    metadata_files = list(UPLOADS_DIR.glob("*_metadata.json"))
-    print(f"Found {len(metadata_files)} metadata files.")
-
-    with Session(engine) as session:
-        for meta_path in metadata_files:
-            with open(meta_path, "r") as f:
-                data = json.load(f)
-
-            # Stwórz LogFile
-            log_file = LogFile(
-                id=None,  # autoincrement
-                filename=data["filename"],
-                size=data["size"],
-                upload_time=datetime.fromisoformat(data["upload_time"]),
-                log_count=data["log_count"],
-                log_analysis_status=data.get("log_analysis_status", "pending"),
-                analysis_result=data.get("analysis_result")
-            )
-            session.add(log_file)
-            session.commit()
-            session.refresh(log_file)
-
-            # Stwórz LogEntry dla każdego wpisu
-            for entry in data.get("entries", []):
-                log_entry = LogEntry(
-                    log_file_id=log_file.id,
-                    timestamp=datetime.fromisoformat(entry["timestamp"]),
-                    level=entry["level"],
-                    message=entry["message"],
-                    source=entry.get("source"),
-                    log_metadata=json.dumps(entry.get("metadata", {}))  # zmień na log_metadata!
-                )
-                session.add(log_entry)
-            session.commit()
-            print(f"Migrated {log_file.filename} ({log_file.log_count} entries)")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads-dir", type=Path, default=UPLOADS_DIR)
+    parser.add_argument("--workers", type=int, default=MIGRATION_WORKERS,
+                        help="parser processes; 0 parses in the writer process")
+    parser.add_argument("--segment-mb", type=float, default=MIGRATION_SEGMENT_SIZE / 2**20,
+                        help="MiB of JSON Lines per parse task and transaction")
+    args = parser.parse_args()
+    create_db_and_tables()
+    migrate(args.uploads_dir, workers=args.workers, segment_size=int(args.segment_mb * 2**20))
+    print("Migration complete!")
 
 if __name__ == "__main__":
-    migrate()
-    print("Migration complete!")
\ No newline at end of file
+    main()
@@ -2,7 +2,7 @@
 Data models for log management
 """
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel, Field
 
 class LogEntry(BaseModel):
@@ -14,8 +14,23 @@ class LogEntry(BaseModel):
     source: str = Field(description="Source of the log")
     metadata: Optional[dict] = Field(default=None, description="Additional metadata")
 
-class LogFile(BaseModel):
-    """Log file information"""
+class LogSummary(BaseModel):
+    """Aggregate statistics of a log file, computed while parsing"""
+    level_counts: Dict[str, int] = Field(default={}, description="Number of entries per log level")
+    first_timestamp: Optional[datetime] = Field(default=None, description="Timestamp of the earliest entry")
+    last_timestamp: Optional[datetime] = Field(default=None, description="Timestamp of the latest entry")
+    error_count: int = Field(default=0, description="Number of ERROR/CRITICAL/FATAL entries")
+    errors_per_minute: Dict[str, int] = Field(default={}, description="Error count per minute bucket (YYYY-MM-DDTHH:MM)")
+    top_sources: Dict[str, int] = Field(default={}, description="Most frequent sources with entry counts")
+
+class LogTemplate(BaseModel):
+    """Message template mined from a log file"""
+    id: int = Field(description="Template ID, referenced by entries as metadata.template_id")
+    template: str = Field(description="Message template with <*> in place of parameters")
+    count: int = Field(description="Number of entries matching the template")
+
+class LogFileHeader(BaseModel):
+    """Log file information without the parsed entries"""
     id: str = Field(description="Unique file identifier")
     filename: str = Field(description="Original filename")
     size: int = Field(description="File size in bytes")
@@ -23,7 +38,12 @@ class LogFile(BaseModel):
     log_count: int = Field(description="Number of log entries")
     log_analysis_status: str = Field(default="pending", description="Analysis status")
     analysis_result: Optional[str] = Field(default=None, description="Analysis result")
+    summary: Optional[LogSummary] = Field(default=None, description="Aggregate statistics of the file")
+
+class LogFile(LogFileHeader):
+    """Log file information"""
     entries: List[LogEntry] = Field(default=[], description="Parsed log entries")
+    templates: List[LogTemplate] = Field(default=[], description="Message templates mined from the entries")
 
 class LogUploadResponse(BaseModel):
     """Response for log upload"""
@@ -35,6 +55,36 @@ class LogUploadResponse(BaseModel):
 
 class LogListResponse(BaseModel):
     """Response for log list"""
-    files: List[LogFile] = Field(description="List of uploaded log files")
-    total_count: int = Field(description="Total number of files")
-    total_size: int = Field(description="Total size of all files") 
\ No newline at end of file
+    files: List[LogFileHeader] = Field(description="Page of uploaded log files")
+    total_count: int = Field(description="Total number of files matching the filters")
+    total_size: int = Field(description="Total size of all files matching the filters")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page, if any")
+
+class LogEntriesResponse(BaseModel):
+    """Response for a page of parsed entries of a log file"""
+    file_id: str = Field(description="Log file ID")
+    offset: int = Field(description="Offset of the first returned entry")
+    entries: List[LogEntry] = Field(description="Parsed log entries") 
+
+class LogSearchHit(BaseModel):
+    """Single full-text search hit"""
+    file_id: str = Field(description="Log file ID")
+    entry_index: int = Field(description="Position of the entry in the file")
+    entry: LogEntry = Field(description="Matching log entry")
+
+class LogSearchResponse(BaseModel):
+    """Response for full-text search over log entries"""
+    query: str = Field(description="Search query")
+    hits: List[LogSearchHit] = Field(description="Matching entries, most recently indexed first")
+    took_ms: float = Field(description="Search time in milliseconds")
+
+class TimelineEntry(BaseModel):
+    """Entry of the merged multi-file timeline"""
+    file_id: str = Field(description="Log file ID")
+    entry_index: int = Field(description="Position of the entry in the file")
+    entry: LogEntry = Field(description="Log entry")
+
+class LogAnalysis(BaseModel):
+    """Result of analyzing a log file"""
+    analysis: str = Field(description="AI analysis result")
+    metadata: dict = Field(default={}, description="Analysis metadata (reduction, timing, ...)")
\ No newline at end of file
@@ -1,8 +1,17 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
+from sqlalchemy import Index, event, text
+from sqlalchemy.engine import Connection
 from sqlmodel import SQLModel, Field, Relationship
 
 class LogEntry(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination within a file / level walks these in (timestamp, id) order
+        Index("ix_logentry_log_file_id_timestamp", "log_file_id", "timestamp"),
+        Index("ix_logentry_level_timestamp", "level", "timestamp"),
+        Index("ix_logentry_timestamp", "timestamp"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     log_file_id: Optional[int] = Field(default=None, foreign_key="logfile.id")
     timestamp: datetime
@@ -17,10 +26,238 @@ class LogFile(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     filename: str
     size: int
-    upload_time: datetime
+    upload_time: datetime = Field(index=True)
     log_count: int
+    log_analysis_status: str = Field(default="pending", index=True)
+    analysis_result: Optional[str] = None
+    # Raw log lives in the blob store (app/services/blob_store.py); only its
+    # digest is kept here so loading a row never drags the content along
+    content_digest: Optional[str] = Field(default=None, index=True)
+
+    # Entries are deleted set-based (app/services/retention.py), never loaded to be unlinked
+    entries: List[LogEntry] = Relationship(back_populates="log_file", sa_relationship_kwargs={"passive_deletes": "all"})
+
+class LogEntryRollup(SQLModel, table=True):
+    """Entry counts per time bucket and file, by level and by source
+
+    Each row counts the entries of one bucket and file having one value of
+    one dimension (``dimension`` "level" or "source"). Dimensions are
+    counted separately, not crossed, so the table grows with the time span
+    rather than the number of entries. Maintained at ingest (see
+    sync_logentry_rollups); ``log_file_id`` 0 and ``value`` "" stand for
+    entries without a file or source.
+    """
+    # Clustered on the key, in the order chart queries group and sort by
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    resolution: str = Field(primary_key=True)
+    dimension: str = Field(primary_key=True)
+    bucket_start: datetime = Field(primary_key=True)
+    value: str = Field(primary_key=True)
+    log_file_id: int = Field(primary_key=True)
+    count: int
+
+class BlobChunk(SQLModel, table=True):
+    """zlib-compressed chunk of a blob, addressed by the SHA-256 of its raw bytes"""
+    digest: str = Field(primary_key=True)
+    size: int
+    data: bytes
+
+class BlobManifest(SQLModel, table=True):
+    """Ordered chunk list of a blob, keyed by the SHA-256 of the whole blob"""
+    blob_digest: str = Field(primary_key=True)
+    seq: int = Field(primary_key=True)
+    chunk_digest: str = Field(foreign_key="blobchunk.digest", index=True)
+
+class LogFileCreate(SQLModel):
+    filename: str
+    size: int
+    upload_time: datetime
+    log_count: int = 0
     log_analysis_status: str = "pending"
     analysis_result: Optional[str] = None
-    content: Optional[str] = None  # <-- to pole!
+    content: Optional[str] = None
+
+class LogFileUpdate(SQLModel):
+    """Partial update: only the fields sent are changed"""
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    upload_time: Optional[datetime] = None
+    log_count: Optional[int] = None
+    log_analysis_status: Optional[str] = None
+    analysis_result: Optional[str] = None
+    content: Optional[str] = None
+
+class LogFileHeader(SQLModel):
+    """LogFile projection without the raw content, used for listings"""
+    id: int
+    filename: str
+    size: int
+    upload_time: datetime
+    log_count: int
+    log_analysis_status: str
+    analysis_result: Optional[str] = None
+    content_digest: Optional[str] = None
+
+class LogFileRead(LogFileHeader):
+    """Single log file; content is only loaded when requested"""
+    content: Optional[str] = None
+
+class LogFilePage(SQLModel):
+    files: List[LogFileHeader]
+    total_count: int
+    next_cursor: Optional[str] = None
+
+class LogEntryPage(SQLModel):
+    entries: List[LogEntry]
+    next_cursor: Optional[str] = None
+
+class RollupBucket(SQLModel):
+    bucket_start: datetime
+    counts: Dict[str, int]
+
+class RollupStats(SQLModel):
+    bucket: str
+    series: List[RollupBucket]
+    totals: Dict[str, int]
+    took_ms: float
+
+class LogEntrySearchHit(SQLModel):
+    entry: LogEntry
+    rank: float
+    snippet: str
+
+class LogEntrySearchResponse(SQLModel):
+    query: str
+    hits: List[LogEntrySearchHit]
+    took_ms: float
+
+# FTS5 index over logentry.message as an external-content table: the text
+# lives only in logentry. Triggers keep the index in sync on update and
+# delete. Inserts are indexed by the ORM hook below and, for bulk ingest, by
+# one INSERT ... SELECT per batch (sync_logentry_fts): a per-row insert
+# trigger made bulk ingest three times slower
+LOGENTRY_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS logentry_fts USING fts5(
+        message, content='logentry', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS logentry_fts_delete AFTER DELETE ON logentry BEGIN
+        INSERT INTO logentry_fts(logentry_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS logentry_fts_update AFTER UPDATE OF message ON logentry BEGIN
+        INSERT INTO logentry_fts(logentry_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO logentry_fts(rowid, message) VALUES (new.id, new.message);
+    END""",
+]
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def create_logentry_fts(target, connection, **kwargs):
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logentry_fts'")
+    ).first()
+    for statement in LOGENTRY_FTS_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        # Index entries stored before the FTS table existed
+        connection.execute(text("INSERT INTO logentry_fts(logentry_fts) VALUES ('rebuild')"))
+
+@event.listens_for(LogEntry, "after_insert")
+def index_logentry_fts(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text("INSERT INTO logentry_fts(rowid, message) VALUES (:id, :message)"),
+            {"id": target.id, "message": target.message}
+        )
+
+def sync_logentry_fts(connection: Connection, log_file_id: int, after_id: int):
+    """Index a file's entries with an id above ``after_id`` in one statement"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text("INSERT INTO logentry_fts(rowid, message) SELECT id, message FROM logentry "
+                 "WHERE log_file_id = :log_file_id AND id > :after_id"),
+            {"log_file_id": log_file_id, "after_id": after_id}
+        )
+
+# strftime formats truncating a timestamp to its bucket; they produce the
+# same text SQLAlchemy stores for datetimes so range filters compare correctly
+ROLLUP_BUCKET_FORMATS = {
+    "1m": "%Y-%m-%d %H:%M:00.000000",
+    "1h": "%Y-%m-%d %H:00:00.000000",
+}
+ROLLUP_DIMENSIONS = {
+    "level": "{row}level",
+    "source": "COALESCE({row}source, '')",
+}
+ROLLUPS = [(resolution, dimension) for resolution in ROLLUP_BUCKET_FORMATS for dimension in ROLLUP_DIMENSIONS]
+
+def _rollup_columns(row: str, resolution: str, dimension: str) -> str:
+    prefix = f"{row}." if row else ""
+    return (
+        f"'{resolution}', '{dimension}', strftime('{ROLLUP_BUCKET_FORMATS[resolution]}', {prefix}timestamp), "
+        f"{ROLLUP_DIMENSIONS[dimension].format(row=prefix)}, COALESCE({prefix}log_file_id, 0)"
+    )
+
+def _rollup_upsert(select_sql: str) -> str:
+    return (
+        "INSERT INTO logentryrollup (resolution, dimension, bucket_start, value, log_file_id, count) "
+        f"{select_sql} "
+        "ON CONFLICT (resolution, dimension, bucket_start, value, log_file_id) DO UPDATE SET count = count + excluded.count"
+    )
+
+def _rollup_add(row: str, resolution: str, dimension: str) -> str:
+    return _rollup_upsert(f"SELECT {_rollup_columns(row, resolution, dimension)}, 1 WHERE true")
+
+def _rollup_remove(row: str, resolution: str, dimension: str) -> str:
+    return (
+        "UPDATE logentryrollup SET count = count - 1 "
+        f"WHERE (resolution, dimension, bucket_start, value, log_file_id) = ({_rollup_columns(row, resolution, dimension)})"
+    )
+
+def _rollup_from_logentry(resolution: str, dimension: str, where: str) -> str:
+    return _rollup_upsert(
+        f"SELECT {_rollup_columns('', resolution, dimension)}, count(*) FROM logentry WHERE {where} GROUP BY 3, 4, 5"
+    )
+
+# Like the FTS index: triggers handle updates and deletes (buckets emptied
+# by deletes keep a zero count and are skipped by queries), inserts are
+# counted by the ORM hook and by one grouped upsert per rollup per bulk ingest
+LOGENTRY_ROLLUP_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS logentry_rollup_delete AFTER DELETE ON logentry BEGIN "
+    + " ".join(f"{_rollup_remove('old', *rollup)};" for rollup in ROLLUPS)
+    + " END",
+    "CREATE TRIGGER IF NOT EXISTS logentry_rollup_update AFTER UPDATE OF timestamp, level, source, log_file_id ON logentry BEGIN "
+    + " ".join(f"{_rollup_remove('old', *rollup)}; {_rollup_add('new', *rollup)};" for rollup in ROLLUPS)
+    + " END",
+]
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def create_logentry_rollups(target, connection, **kwargs):
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'logentry_rollup_delete'")
+    ).first()
+    for statement in LOGENTRY_ROLLUP_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        # Count entries stored before the rollups existed
+        connection.execute(text("DELETE FROM logentryrollup"))
+        for rollup in ROLLUPS:
+            connection.execute(text(_rollup_from_logentry(*rollup, "true")))
+
+@event.listens_for(LogEntry, "after_insert")
+def count_logentry_rollups(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        for rollup in ROLLUPS:
+            connection.execute(text(_rollup_from_logentry(*rollup, "id = :id")), {"id": target.id})
 
-    entries: List[LogEntry] = Relationship(back_populates="log_file") 
\ No newline at end of file
+def sync_logentry_rollups(connection: Connection, log_file_id: int, after_id: int):
+    """Count a file's entries with an id above ``after_id`` into the rollups"""
+    if connection.dialect.name == "sqlite":
+        for rollup in ROLLUPS:
+            connection.execute(
+                text(_rollup_from_logentry(*rollup, "log_file_id = :log_file_id AND id > :after_id")),
+                {"log_file_id": log_file_id, "after_id": after_id}
+            )
@@ -0,0 +1,224 @@
+"""
+Persistent cache of LLM analysis results keyed by normalized log content
+"""
+import asyncio
+import functools
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator, Optional
+from dotenv import load_dotenv
+from app.services.metrics_service import metrics_service
+from app.services.single_flight import analysis_flight
+from app.core.logger import logger
+
+load_dotenv()
+
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?')
+# UUIDs, hex ids, numbers of 8+ digits and numbers labelled as ids; shorter
+# numbers (ports, error codes, sizes, durations) are kept as they are
+ID_PATTERN = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                        r'|\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]*\d[0-9a-fA-F]*[a-fA-F][0-9a-fA-F]{6,}\b|\b\d{8,}\b'
+                        r'|(?<=[iI][dD][=:#])\d+')
+
+def normalize_log_text(log_text: str) -> str:
+    """Mask timestamps and IDs so that otherwise identical logs share a key"""
+    text = TIMESTAMP_PATTERN.sub('<ts>', log_text)
+    text = ID_PATTERN.sub('<id>', text)
+    return "\n".join(line.strip() for line in text.strip().splitlines())
+
+def cache_key(log_text: str, model: str, prompt_version: str) -> str:
+    """Hash of the normalized log text, model and prompt version"""
+    payload = f"{model}\0{prompt_version}\0{normalize_log_text(log_text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class AnalysisCache:
+    """SQLite-backed analysis cache with TTL, LRU eviction and a size cap"""
+
+    def __init__(self, db_path: str = None, ttl_seconds: int = None,
+                 max_entries: int = None, max_bytes: int = None):
+        self.db_path = Path(db_path or os.getenv("ANALYSIS_CACHE_PATH", "cache/analysis_cache.db"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self.max_entries = max_entries or int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "10000"))
+        self.max_bytes = max_bytes or int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.enabled = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for one transaction, closed afterwards"""
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            if not self._initialized:
+                conn.executescript("""
+                    PRAGMA journal_mode=WAL;
+                    CREATE TABLE IF NOT EXISTS analysis_cache (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        prompt_version TEXT NOT NULL,
+                        analysis TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS ix_analysis_cache_last_access ON analysis_cache (last_access);
+                    CREATE INDEX IF NOT EXISTS ix_analysis_cache_created_at ON analysis_cache (created_at);
+                """)
+                self._initialized = True
+            with conn:
+                yield conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached analysis and refresh its last access time"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT analysis FROM analysis_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE analysis_cache SET last_access = ? WHERE key = ?", (now, key))
+        self._record(hit=row is not None)
+        return row[0] if row else None
+
+    def set(self, key: str, analysis: str, model: str, prompt_version: str):
+        """Store an analysis and evict expired and least recently used entries"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, model, prompt_version, analysis, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, prompt_version, analysis, len(analysis.encode('utf-8')), now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count, total_size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+        if count <= self.max_entries and total_size <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until both caps are met
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM analysis_cache ORDER BY last_access"):
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                break
+            removed.append((key,))
+            count -= 1
+            total_size -= size
+        conn.executemany("DELETE FROM analysis_cache WHERE key = ?", removed)
+        logger.debug(f"Evicted {len(removed)} analysis cache entries")
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        metrics_service.record_analysis_cache("hit" if hit else "miss")
+
+    def get_statistics(self) -> Dict:
+        """Get hit/miss counters and cache size"""
+        with self._connect() as conn:
+            count, total_size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": count,
+            "size_bytes": total_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "single_flight": analysis_flight.get_statistics()
+        }
+
+    async def lookup_async(self, key: str) -> Optional[str]:
+        """Look up a key off the event loop; None if disabled, missing or failing"""
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self.get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache lookup failed: {str(e)}")
+            return None
+
+    async def store_async(self, key: str, analysis: str, model: str, prompt_version: str):
+        """Store an analysis off the event loop, ignoring cache failures"""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self.set, key, analysis, model, prompt_version)
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache store failed: {str(e)}")
+
+    def cached(self, model: str, prompt_version: str) -> Callable:
+        """Decorate an ``analyze_logs(log_text) -> str`` function with the cache
+
+        Cache misses go through the analysis single-flight group, so
+        concurrent requests for the same key share one model call.
+        """
+        def decorator(analyze: Callable[[str], str]) -> Callable[[str], str]:
+            @functools.wraps(analyze)
+            def wrapper(log_text: str) -> str:
+                key = cache_key(log_text, model, prompt_version)
+                if self.enabled:
+                    try:
+                        cached_analysis = self.get(key)
+                    except sqlite3.Error as e:
+                        logger.warning(f"Analysis cache lookup failed: {str(e)}")
+                        cached_analysis = None
+                    if cached_analysis is not None:
+                        logger.info("Analysis served from cache")
+                        return cached_analysis
+
+                def compute() -> str:
+                    analysis = analyze(log_text)
+                    if self.enabled:
+                        try:
+                            self.set(key, analysis, model, prompt_version)
+                        except sqlite3.Error as e:
+                            logger.warning(f"Analysis cache store failed: {str(e)}")
+                    return analysis
+
+                analysis, shared = analysis_flight.do(key, compute)
+                if shared:
+                    logger.info("Analysis shared with an identical in-flight request")
+                return analysis
+            return wrapper
+        return decorator
+
+    def cached_async(self, model: str, prompt_version: str) -> Callable:
+        """Async counterpart of ``cached`` for ``async analyze_logs(log_text) -> str``
+
+        SQLite lookups run in a worker thread; misses are coalesced per
+        event loop through the analysis single-flight group.
+        """
+        def decorator(analyze: Callable[[str], Awaitable[str]]) -> Callable[[str], Awaitable[str]]:
+            @functools.wraps(analyze)
+            async def wrapper(log_text: str) -> str:
+                key = cache_key(log_text, model, prompt_version)
+                cached_analysis = await self.lookup_async(key)
+                if cached_analysis is not None:
+                    logger.info("Analysis served from cache")
+                    return cached_analysis
+
+                async def compute() -> str:
+                    analysis = await analyze(log_text)
+                    await self.store_async(key, analysis, model, prompt_version)
+                    return analysis
+
+                analysis, shared = await analysis_flight.do_async(key, compute)
+                if shared:
+                    logger.info("Analysis shared with an identical in-flight request")
+                return analysis
+            return wrapper
+        return decorator
+
+# Global analysis cache instance
+analysis_cache = AnalysisCache()
@@ -0,0 +1,190 @@
+"""
+Chunked, compressed, content-addressed storage for raw log files
+"""
+import asyncio
+import hashlib
+import os
+import zlib
+from typing import AsyncIterator, Dict, Iterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, inspect, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.log_sql import BlobChunk, BlobManifest, LogFile
+from app.core.logger import logger
+
+load_dotenv()
+
+BLOB_CHUNK_SIZE = int(os.getenv("BLOB_CHUNK_SIZE", str(1024 * 1024)))
+BLOB_COMPRESSION_LEVEL = int(os.getenv("BLOB_COMPRESSION_LEVEL", "6"))
+
+def digest_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class BlobStore:
+    """Blobs stored as zlib-compressed chunks in the SQL database
+
+    A blob is split into fixed-size chunks, each stored once under the
+    SHA-256 of its raw bytes, and a manifest lists the chunks of each blob
+    in order. Identical uploads share one manifest, and a log re-uploaded
+    after growing shares all of its unchanged leading chunks. Reads
+    decompress one chunk at a time. Nothing is committed here: writes join
+    the caller's transaction.
+    """
+
+    def __init__(self, chunk_size: int = BLOB_CHUNK_SIZE, compression_level: int = BLOB_COMPRESSION_LEVEL):
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+
+    def put(self, session: Session, data: bytes) -> str:
+        """Store ``data`` unless already present; returns its digest"""
+        blob_digest = digest_of(data)
+        exists = session.exec(
+            select(BlobManifest.seq).where(BlobManifest.blob_digest == blob_digest).limit(1)
+        ).first()
+        if exists is not None:
+            return blob_digest
+
+        chunks = {}
+        manifest = []
+        for seq, offset in enumerate(range(0, len(data), self.chunk_size)):
+            chunk = data[offset:offset + self.chunk_size]
+            chunk_digest = digest_of(chunk)
+            chunks.setdefault(chunk_digest, chunk)
+            manifest.append({"blob_digest": blob_digest, "seq": seq, "chunk_digest": chunk_digest})
+
+        connection = session.connection()
+        stored = set(session.exec(select(BlobChunk.digest).where(BlobChunk.digest.in_(list(chunks)))).all()) if chunks else set()
+        new_chunks = [
+            {"digest": chunk_digest, "size": len(chunk), "data": zlib.compress(chunk, self.compression_level)}
+            for chunk_digest, chunk in chunks.items() if chunk_digest not in stored
+        ]
+        # OR IGNORE: a concurrent writer may have stored the same chunk or blob
+        if new_chunks:
+            connection.execute(insert(BlobChunk.__table__).prefix_with("OR IGNORE"), new_chunks)
+        if manifest:
+            connection.execute(insert(BlobManifest.__table__).prefix_with("OR IGNORE"), manifest)
+        logger.debug(f"Stored blob {blob_digest[:12]}: {len(manifest)} chunks, {len(new_chunks)} new")
+        return blob_digest
+
+    def size(self, session: Session, blob_digest: str) -> int:
+        """Uncompressed size of a blob in bytes"""
+        return session.exec(
+            select(func.coalesce(func.sum(BlobChunk.size), 0))
+            .select_from(BlobManifest)
+            .join(BlobChunk, BlobChunk.digest == BlobManifest.chunk_digest)
+            .where(BlobManifest.blob_digest == blob_digest)
+        ).one()
+
+    def iter_chunks(self, session: Session, blob_digest: str) -> Iterator[bytes]:
+        """Yield the blob's raw bytes chunk by chunk"""
+        chunk_digests = session.exec(
+            select(BlobManifest.chunk_digest)
+            .where(BlobManifest.blob_digest == blob_digest)
+            .order_by(BlobManifest.seq)
+        ).all()
+        for chunk_digest in chunk_digests:
+            data = session.exec(select(BlobChunk.data).where(BlobChunk.digest == chunk_digest)).one()
+            yield zlib.decompress(data)
+
+    async def iter_chunks_async(self, session: AsyncSession, blob_digest: str) -> AsyncIterator[bytes]:
+        """Async ``iter_chunks``; decompression runs in a worker thread"""
+        chunk_digests = (await session.exec(
+            select(BlobManifest.chunk_digest)
+            .where(BlobManifest.blob_digest == blob_digest)
+            .order_by(BlobManifest.seq)
+        )).all()
+        for chunk_digest in chunk_digests:
+            data = (await session.exec(select(BlobChunk.data).where(BlobChunk.digest == chunk_digest))).one()
+            yield await asyncio.to_thread(zlib.decompress, data)
+
+    def read(self, session: Session, blob_digest: str) -> bytes:
+        """Whole blob as bytes"""
+        return b"".join(self.iter_chunks(session, blob_digest))
+
+    def read_text(self, session: Session, blob_digest: Optional[str]) -> Optional[str]:
+        """Whole blob decoded as UTF-8, None for no digest"""
+        if blob_digest is None:
+            return None
+        return self.read(session, blob_digest).decode("utf-8")
+
+    def release(self, session: Session, blob_digest: Optional[str]) -> bool:
+        """Delete a blob no log file points to any more, keeping shared chunks
+
+        Returns whether the blob was deleted.
+        """
+        if blob_digest is None:
+            return False
+        in_use = session.exec(select(LogFile.id).where(LogFile.content_digest == blob_digest).limit(1)).first()
+        if in_use is not None:
+            return False
+        chunk_digests = session.exec(
+            select(BlobManifest.chunk_digest).where(BlobManifest.blob_digest == blob_digest)
+        ).all()
+        session.execute(delete(BlobManifest).where(BlobManifest.blob_digest == blob_digest))
+        if chunk_digests:
+            session.execute(
+                delete(BlobChunk)
+                .where(BlobChunk.digest.in_(set(chunk_digests)))
+                .where(BlobChunk.digest.not_in(select(BlobManifest.chunk_digest)))
+            )
+        return True
+
+    def delete_unreferenced(self, session: Session) -> Dict[str, int]:
+        """Drop manifests no log file points to, then chunks no manifest uses"""
+        referenced = select(LogFile.content_digest).where(LogFile.content_digest.is_not(None))
+        manifests = session.execute(
+            delete(BlobManifest).where(BlobManifest.blob_digest.not_in(referenced))
+        ).rowcount
+        chunks = session.execute(
+            delete(BlobChunk).where(BlobChunk.digest.not_in(select(BlobManifest.chunk_digest)))
+        ).rowcount
+        if manifests or chunks:
+            logger.info(f"Blob store: removed {manifests} manifest rows and {chunks} chunks")
+        return {"manifest_rows": manifests, "chunks": chunks}
+
+    def get_statistics(self, session: Session) -> Dict:
+        """Get chunk count, raw and compressed bytes"""
+        chunks, raw_bytes, stored_bytes = session.exec(
+            select(func.count(), func.coalesce(func.sum(BlobChunk.size), 0),
+                   func.coalesce(func.sum(func.length(BlobChunk.data)), 0))
+        ).one()
+        return {
+            "chunks": chunks,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else 0.0
+        }
+
+def move_inline_content(connection: Connection, store: "BlobStore" = None) -> int:
+    """Move content from the old logfile.content column into the blob store
+
+    Databases created before the blob store keep raw logs inline. Each row's
+    content is stored as a blob, the digest recorded, and the column dropped.
+    Returns the number of rows moved.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("logfile")}
+    if "content" not in columns:
+        return 0
+    store = store or blob_store
+    if "content_digest" not in columns:
+        connection.execute(text("ALTER TABLE logfile ADD COLUMN content_digest VARCHAR"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_logfile_content_digest ON logfile (content_digest)"))
+
+    moved = 0
+    with Session(bind=connection) as session:
+        ids = connection.execute(text("SELECT id FROM logfile WHERE content IS NOT NULL")).scalars().all()
+        for log_file_id in ids:
+            # One row at a time so only a single raw log is held in memory
+            content = connection.execute(text("SELECT content FROM logfile WHERE id = :id"), {"id": log_file_id}).scalar()
+            blob_digest = store.put(session, content.encode("utf-8"))
+            connection.execute(text("UPDATE logfile SET content_digest = :digest WHERE id = :id"),
+                               {"digest": blob_digest, "id": log_file_id})
+            moved += 1
+    connection.execute(text("ALTER TABLE logfile DROP COLUMN content"))
+    logger.info(f"Moved inline content of {moved} log files to the blob store")
+    return moved
+
+# Global blob store instance
+blob_store = BlobStore()
@@ -1,10 +1,13 @@
 """
 Embedding service for log analysis using sentence-transformers
 """
+import time
 import numpy as np
 from typing import List, Optional
 from sentence_transformers import SentenceTransformer
+from app.services.metrics_service import metrics_service
 from app.core.logger import logger
+from app.core.timing import timed
 
 class EmbeddingService:
     """Service for generating and managing embeddings"""
@@ -18,13 +21,16 @@ class EmbeddingService:
         """
         try:
             logger.info(f"Loading embedding model: {model_name}")
+            start_time = time.perf_counter()
             self.model = SentenceTransformer(model_name)
+            metrics_service.record_embedding_model_load(time.perf_counter() - start_time)
             self.embedding_dim = self.model.get_sentence_embedding_dimension()
             logger.info(f"Embedding model loaded successfully. Dimension: {self.embedding_dim}")
         except Exception as e:
             logger.error(f"Error loading embedding model: {str(e)}")
             raise
     
+    @timed("embed")
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts
@@ -49,6 +55,7 @@ class EmbeddingService:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
     
+    @timed("embed")
     def generate_single_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text
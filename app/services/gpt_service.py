@@ -1,36 +1,61 @@
+import asyncio
 import os
-import time
-from openai import OpenAI
+from typing import AsyncIterator
 from dotenv import load_dotenv
+from app.services.analysis_cache import analysis_cache, cache_key
+from app.services.openai_client import AsyncChatClient, LLMUnavailableError
+from app.services import mock_gpt_service
 from app.core.logger import logger
+from app.core.timing import span, timed
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Bump when the system prompt changes so cached analyses are not reused
+PROMPT_VERSION = "1"
+SYSTEM_PROMPT = "You are a DevOps expert. Your task is to analyze logs and identify potential causes of errors and propose solutions."
 
-def analyze_logs(log_text: str) -> str:
-    start_time = time.time()
-    
-    system_prompt = "You are a DevOps expert. Your task is to analyze logs and identify potential causes of errors and propose solutions."
-    
+client = AsyncChatClient(model=MODEL)
+
+@analysis_cache.cached_async(model=MODEL, prompt_version=PROMPT_VERSION)
+@timed("llm")
+async def _analyze_with_model(log_text: str) -> str:
+    logger.debug("Sending request to OpenAI API")
+    return await client.complete(SYSTEM_PROMPT, log_text)
+
+async def analyze_logs(log_text: str) -> str:
+    """Analyze logs with the model, falling back to the mock analyzer when it is unavailable"""
     try:
-        logger.debug("Sending request to OpenAI API")
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": log_text}
-            ],
-            temperature=0.3,
-        )
-        
-        duration = time.time() - start_time
-        logger.info(f"OpenAI API response received in {duration:.3f}s")
-        
-        return response.choices[0].message.content.strip()
-        
-    except Exception as e:
-        duration = time.time() - start_time
-        logger.error(f"OpenAI API error after {duration:.3f}s: {str(e)}")
-        raise
+        return await _analyze_with_model(log_text)
+    except LLMUnavailableError as e:
+        logger.warning(f"Model unavailable ({str(e)}), using mock analysis")
+        return await asyncio.to_thread(mock_gpt_service.analyze_logs, log_text)
+
+async def stream_analysis(log_text: str) -> AsyncIterator[str]:
+    """Stream an analysis as text deltas
+
+    Cached analyses are sent as a single chunk; completed streams are
+    cached. Falls back to the mock stream if the model is unavailable
+    before the first token.
+    """
+    key = cache_key(log_text, MODEL, PROMPT_VERSION)
+    cached_analysis = await analysis_cache.lookup_async(key)
+    if cached_analysis is not None:
+        logger.info("Analysis served from cache")
+        yield cached_analysis
+        return
+
+    chunks = []
+    try:
+        with span("llm"):
+            async for chunk in client.stream(SYSTEM_PROMPT, log_text):
+                chunks.append(chunk)
+                yield chunk
+    except LLMUnavailableError as e:
+        # Only raised before the first token, so nothing has been sent yet
+        logger.warning(f"Model unavailable ({str(e)}), using mock analysis stream")
+        async for chunk in mock_gpt_service.stream_analysis(log_text):
+            yield chunk
+        return
+
+    await analysis_cache.store_async(key, "".join(chunks).strip(), MODEL, PROMPT_VERSION)
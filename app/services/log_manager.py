@@ -1,16 +1,40 @@
 """
 Log management service for storing and analyzing log files
 """
+import asyncio
+import heapq
 import json
+import os
 import shutil
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
-from app.models.log import LogFile, LogListResponse
-from app.services.log_parser import LogParser
-from app.services.mock_gpt_service import analyze_logs
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.models.log import LogEntry, LogFile, LogFileHeader, LogListResponse, LogSummary, LogTemplate, LogAnalysis
+from app.core.pagination import encode_cursor, decode_cursor
+from app.services.log_parser import LogParser, SummaryAccumulator
+from app.services.log_reducer import reduce_logs
+from app.services.map_reduce_analyzer import analyze_map_reduce
+from app.services.search_index import SearchIndex
+from app.services.template_miner import TemplateMiner
+from app.services.time_index import TimeIndex, naive_utc
+from app.services.mock_gpt_service import analyze_logs, stream_analysis as stream_log_analysis
 from app.services.vector_singleton import vector_service
+from app.services.metrics_service import metrics_service
 from app.core.logger import logger
+from app.core.timing import span
+
+load_dotenv()
+
+SORT_FIELDS = ('upload_time', 'filename', 'size', 'log_count')
+# Type of each sort field's value in a decoded cursor
+CURSOR_VALUE_TYPES = {'upload_time': datetime, 'filename': str, 'size': int, 'log_count': int}
+SEARCH_INDEX_FILENAME = "search_index.db"
+# Reuse the stored analysis of a near-duplicate incident instead of calling the model
+VECTOR_REUSE_ENABLED = os.getenv("VECTOR_REUSE_ENABLED", "false").lower() == "true"
+VECTOR_REUSE_SIMILARITY = float(os.getenv("VECTOR_REUSE_SIMILARITY", "0.95"))
 
 class LogManager:
     """Manages log file storage and analysis"""
@@ -20,7 +44,12 @@ class LogManager:
         self.storage_dir.mkdir(exist_ok=True)
         
         self.parser = LogParser()
-        self.log_files: dict[str, LogFile] = {}
+        self.search_index = SearchIndex(self.storage_dir / SEARCH_INDEX_FILENAME)
+        self.time_indexes: dict[str, TimeIndex] = {}
+        # Header-only cache; entries stay on disk until explicitly requested
+        self.log_files: dict[str, LogFileHeader] = {}
+        # Moving average of model analysis time, used to estimate reuse savings
+        self.model_analysis_seconds: Optional[float] = None
         
         # Load existing log files
         self._load_existing_files()
@@ -33,97 +62,402 @@ class LogManager:
             # Parse the log file
             log_file = self.parser.parse_log_file(file_path, filename)
             
-            # Save file to storage
-            storage_path = self.storage_dir / f"{log_file.id}_{filename}"
-            shutil.copy2(file_path, storage_path)
+            with span("persist"):
+                # Save file to storage
+                storage_path = self.storage_dir / f"{log_file.id}_{filename}"
+                shutil.copy2(file_path, storage_path)
+                
+                # Save immutable entry payload once, then the small header
+                offsets = self._save_entries(log_file.id, log_file.entries)
+                self._save_time_index(log_file.id, TimeIndex.build(zip(log_file.entries, offsets)))
+                self._save_templates(log_file.id, log_file.templates)
+                self._save_metadata(log_file)
             
-            # Save metadata
-            self._save_metadata(log_file)
+            # Index entries for full-text search
+            with span("search_index"):
+                self.search_index.index_file(log_file.id, zip(log_file.entries, offsets))
             
-            # Add to memory cache
-            self.log_files[log_file.id] = log_file
+            # Add header to memory cache
+            self.log_files[log_file.id] = self._header_of(log_file)
             
+            metrics_service.record_log_upload("success")
             logger.info(f"Successfully uploaded {filename} with {log_file.log_count} entries")
             return log_file
             
         except Exception as e:
+            metrics_service.record_log_upload("error")
             logger.error(f"Error uploading file {filename}: {str(e)}")
             raise
     
-    def get_all_files(self) -> LogListResponse:
-        """Get all uploaded log files"""
-        files = list(self.log_files.values())
+    def get_all_files(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                      sort_by: str = 'upload_time', order: str = 'desc',
+                      status: Optional[str] = None, uploaded_after: Optional[datetime] = None,
+                      uploaded_before: Optional[datetime] = None,
+                      include_summary: bool = False) -> LogListResponse:
+        """Get a page of uploaded log file headers
+        
+        Files are filtered by analysis status and upload time, sorted by
+        ``sort_by`` with the file ID as tie-breaker, and paginated with an
+        opaque keyset cursor. Raises ValueError for an unknown sort field or
+        a malformed cursor.
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort_by}")
+        descending = order == 'desc'
+        # Upload times are naive UTC
+        uploaded_after, uploaded_before = naive_utc(uploaded_after), naive_utc(uploaded_before)
+        
+        files = [
+            f for f in self.log_files.values()
+            if (status is None or f.log_analysis_status == status)
+            and (uploaded_after is None or f.upload_time >= uploaded_after)
+            and (uploaded_before is None or f.upload_time < uploaded_before)
+        ]
         total_size = sum(f.size for f in files)
+        total_count = len(files)
+        
+        def sort_key(f: LogFileHeader):
+            return (getattr(f, sort_by), f.id)
+        
+        files.sort(key=sort_key, reverse=descending)
+        
+        if cursor:
+            value, file_id = self._decode_list_cursor(cursor, sort_by)
+            after = (value, file_id)
+            files = [f for f in files if (sort_key(f) < after if descending else sort_key(f) > after)]
+        
+        next_cursor = None
+        if limit is not None and len(files) > limit:
+            files = files[:limit]
+            next_cursor = encode_cursor(getattr(files[-1], sort_by), files[-1].id)
+        
+        if not include_summary:
+            files = [f.model_copy(update={'summary': None}) for f in files]
         
         return LogListResponse(
             files=files,
-            total_count=len(files),
-            total_size=total_size
+            total_count=total_count,
+            total_size=total_size,
+            next_cursor=next_cursor
         )
     
-    def get_file(self, file_id: str) -> Optional[LogFile]:
-        """Get a specific log file by ID"""
+    @staticmethod
+    def _decode_list_cursor(cursor: str, sort_by: str) -> Tuple:
+        """Decode a listing cursor, raising ValueError unless it matches ``sort_by``"""
+        try:
+            value, file_id = decode_cursor(cursor)
+            if sort_by == 'upload_time':
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        # A cursor reused from another sort order would not compare with this sort key
+        if (not isinstance(value, CURSOR_VALUE_TYPES[sort_by]) or isinstance(value, bool)
+                or not isinstance(file_id, str)):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return value, file_id
+    
+    def get_file(self, file_id: str) -> Optional[LogFileHeader]:
+        """Get the header of a specific log file by ID"""
         return self.log_files.get(file_id)
     
-    def analyze_file(self, file_id: str) -> Optional[str]:
-        """Analyze a log file using AI"""
+    def get_entries(self, file_id: str, offset: int = 0, limit: int = 100) -> Optional[List[LogEntry]]:
+        """Get a page of parsed entries of a log file, read from disk"""
+        if file_id not in self.log_files:
+            return None
+        
+        entries_path = self._entries_path(file_id)
+        if not entries_path.exists():
+            return []
+        
+        with open(entries_path, 'r') as f:
+            return [self._entry_from_dict(json.loads(line)) for line in islice(f, offset, offset + limit)]
+    
+    def search(self, query: str, level: Optional[str] = None, since: Optional[datetime] = None,
+               until: Optional[datetime] = None, file_id: Optional[str] = None,
+               limit: int = 50, offset: int = 0) -> List[Tuple[str, int, LogEntry]]:
+        """Full-text search over entries of all uploaded files"""
+        handles = {}
+        
+        def load_entry(hit_file_id: str, byte_offset: int) -> LogEntry:
+            if hit_file_id not in handles:
+                handles[hit_file_id] = open(self._entries_path(hit_file_id), 'rb')
+            f = handles[hit_file_id]
+            f.seek(byte_offset)
+            return self._entry_from_dict(json.loads(f.readline()))
+        
+        # Indexed timestamps are naive
+        since, until = naive_utc(since), naive_utc(until)
+        try:
+            return self.search_index.search(
+                query, load_entry, level=level, since=since, until=until,
+                file_id=file_id, limit=limit, offset=offset
+            )
+        finally:
+            for f in handles.values():
+                f.close()
+    
+    def iter_timeline(self, file_ids: Optional[List[str]] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Iterator[Tuple[str, int, LogEntry]]:
+        """Stream entries of several files within [since, until) in time order
+        
+        Each file is read from the block located through its time index and
+        the per-file streams are combined with a k-way merge, so only one
+        entry per file is held in memory. Raises ValueError for unknown
+        file IDs.
+        """
+        if file_ids is None:
+            file_ids = list(self.log_files)
+        missing = [file_id for file_id in file_ids if file_id not in self.log_files]
+        if missing:
+            raise ValueError(f"Log file not found: {', '.join(missing)}")
+        # Bounds are checked here, before a stream starts, since entry timestamps are naive
+        since, until = naive_utc(since), naive_utc(until)
+        
+        streams = [self._iter_time_range(file_id, since, until) for file_id in file_ids]
+        return heapq.merge(*streams, key=lambda hit: hit[2].timestamp)
+    
+    def _iter_time_range(self, file_id: str, since: Optional[datetime],
+                         until: Optional[datetime]) -> Iterator[Tuple[str, int, LogEntry]]:
+        """Stream entries of one file within [since, until) in file order"""
+        time_index = self._get_time_index(file_id)
+        start = time_index.locate(since)
+        if start is None:
+            return
+        stop_offset = time_index.stop_offset(until)
+        
+        with open(self._entries_path(file_id), 'rb') as f:
+            f.seek(start.byte_offset)
+            position = start.byte_offset
+            entry_index = start.entry_index
+            for line in f:
+                if stop_offset is not None and position >= stop_offset:
+                    break
+                position += len(line)
+                entry = self._entry_from_dict(json.loads(line))
+                if (since is None or entry.timestamp >= since) and (until is None or entry.timestamp < until):
+                    yield file_id, entry_index, entry
+                entry_index += 1
+    
+    def get_summary(self, file_id: str) -> Optional[LogSummary]:
+        """Get summary statistics of a log file from its header"""
+        log_file = self.get_file(file_id)
+        if not log_file:
+            return None
+        
+        # Files uploaded before summaries existed get theirs computed once
+        if log_file.summary is None:
+            summary = SummaryAccumulator()
+            for entry in self._load_entries(file_id):
+                summary.add(entry)
+            log_file.summary = summary.build()
+            self._save_metadata(log_file)
+        
+        return log_file.summary
+    
+    def get_templates(self, file_id: str) -> Optional[List[LogTemplate]]:
+        """Get message templates of a log file, most frequent first"""
+        if file_id not in self.log_files:
+            return None
+        
+        templates_path = self._templates_path(file_id)
+        if not templates_path.exists():
+            # Files uploaded before template mining existed get theirs mined once
+            miner = TemplateMiner()
+            for entry in self._load_entries(file_id):
+                miner.add(entry.message)
+            self._save_templates(file_id, miner.templates())
+        
+        with open(templates_path, 'r') as f:
+            return [LogTemplate(**template) for template in json.load(f)]
+    
+    def analyze_file(self, file_id: str, token_budget: Optional[int] = None, mode: str = "auto",
+                     chunk_entries: Optional[int] = None, chunk_minutes: Optional[int] = None,
+                     max_concurrency: Optional[int] = None,
+                     reuse_similar: Optional[bool] = None) -> Optional[LogAnalysis]:
+        """Analyze a log file using AI
+        
+        ``mode`` is "single" (one call on the reduced log), "map_reduce"
+        (concurrent calls on entry- or time-bounded chunks merged by a
+        final call) or "auto", which switches to map-reduce when the
+        reduced log would have to drop lines to fit the token budget.
+        
+        With ``reuse_similar`` (default VECTOR_REUSE_ENABLED) the vector
+        database is searched first, and if a past incident is at least
+        VECTOR_REUSE_SIMILARITY similar its analysis is returned without
+        calling the model.
+        """
         try:
-            log_file = self.get_file(file_id)
-            if not log_file:
+            analysis_start = time.time()
+            analysis_input = self._load_analysis_input(file_id)
+            if not analysis_input:
                 logger.warning(f"Log file not found: {file_id}")
                 return None
+            log_file, entries, log_content, incident_content = analysis_input
             
             logger.info(f"Starting AI analysis for file: {log_file.filename}")
             
-            # Combine all log entries into a single text
-            log_content = self._combine_log_entries(log_file.entries)
-            
-            # Analyze with AI
-            analysis_result = analyze_logs(log_content)
-            
-            # Update log file with analysis result
-            log_file.log_analysis_status = "completed"
-            log_file.analysis_result = analysis_result
+            if VECTOR_REUSE_ENABLED if reuse_similar is None else reuse_similar:
+                reused = self._reuse_similar_analysis(incident_content)
+                if reused:
+                    analysis_result, metadata = reused
+                    log_file.log_analysis_status = "completed"
+                    log_file.analysis_result = analysis_result
+                    with span("persist"):
+                        self._save_metadata(log_file)
+                    metrics_service.record_log_analysis(metadata["mode"], time.time() - analysis_start)
+                    logger.info(f"AI analysis for {log_file.filename} served from the vector index")
+                    return LogAnalysis(analysis=analysis_result, metadata=metadata)
             
-            # Add to vector database for similarity search
-            self._add_to_vector_db(log_file, log_content)
+            # Reduce to the token budget and analyze with AI
+            start_time = time.time()
+            reduction = reduce_logs(log_content, token_budget)
+            metadata = {"reduction": reduction.to_metadata(), "served_from": "model"}
+            if mode == "map_reduce" or (mode == "auto" and reduction.truncated):
+                analysis_result, map_reduce_metadata = analyze_map_reduce(
+                    entries, analyze_logs, self._combine_log_entries,
+                    max_entries=chunk_entries, max_minutes=chunk_minutes,
+                    max_concurrency=max_concurrency, token_budget=token_budget
+                )
+                metadata.update(map_reduce_metadata)
+            else:
+                analysis_result = analyze_logs(reduction.text)
+                metadata["mode"] = "single"
+            self._record_model_analysis_time(time.time() - start_time)
             
-            # Save updated metadata
-            self._save_metadata(log_file)
+            self._complete_analysis(log_file, analysis_result, log_content, incident_content)
+            metrics_service.record_log_analysis(metadata["mode"], time.time() - analysis_start)
             
             logger.info(f"AI analysis completed for {log_file.filename}")
-            return analysis_result
+            return LogAnalysis(analysis=analysis_result, metadata=metadata)
             
         except Exception as e:
             logger.error(f"Error analyzing file {file_id}: {str(e)}")
             raise
     
+    def stream_analysis(self, file_id: str,
+                        token_budget: Optional[int] = None) -> Optional[Tuple[AsyncIterator[str], Dict]]:
+        """Prepare a streaming analysis of a log file
+        
+        Returns an async iterator of analysis text chunks and the request
+        metadata, or None if the file does not exist. Once the stream has
+        been consumed to the end, the analysis is saved and added to the
+        vector database like ``analyze_file`` does.
+        """
+        analysis_input = self._load_analysis_input(file_id)
+        if not analysis_input:
+            logger.warning(f"Log file not found: {file_id}")
+            return None
+        log_file, _, log_content, incident_content = analysis_input
+        
+        reduction = reduce_logs(log_content, token_budget)
+        metadata = {"reduction": reduction.to_metadata(), "served_from": "model", "mode": "single"}
+        
+        async def relay() -> AsyncIterator[str]:
+            logger.info(f"Starting streaming AI analysis for file: {log_file.filename}")
+            start_time = time.time()
+            chunks = []
+            async for chunk in stream_log_analysis(reduction.text):
+                chunks.append(chunk)
+                yield chunk
+            self._record_model_analysis_time(time.time() - start_time)
+            await asyncio.to_thread(
+                self._complete_analysis, log_file, "".join(chunks).strip(), log_content, incident_content
+            )
+            metrics_service.record_log_analysis("stream", time.time() - start_time)
+            logger.info(f"Streaming AI analysis completed for {log_file.filename}")
+        
+        return relay(), metadata
+    
+    def _load_analysis_input(self, file_id: str) -> Optional[Tuple[LogFileHeader, List[LogEntry], str, str]]:
+        """Header, entries, combined log text and incident text of a file to analyze"""
+        log_file = self.get_file(file_id)
+        if not log_file:
+            return None
+        with span("load"):
+            entries = self._load_entries(file_id)
+            log_content = self._combine_log_entries(entries)
+            # Incidents are embedded by their distinct templates rather than every raw line
+            incident_content = self._combine_templates(self.get_templates(file_id))
+        return log_file, entries, log_content, incident_content
+    
+    def _complete_analysis(self, log_file: LogFileHeader, analysis_result: str, log_content: str, incident_content: str):
+        """Store a finished analysis on the file and in the vector database"""
+        log_file.log_analysis_status = "completed"
+        log_file.analysis_result = analysis_result
+        
+        # Add to vector database for similarity search
+        self._add_to_vector_db(log_file, log_content, incident_content)
+        
+        # Save updated metadata
+        with span("persist"):
+            self._save_metadata(log_file)
+    
     def delete_file(self, file_id: str) -> bool:
         """Delete a log file"""
-        try:
-            log_file = self.get_file(file_id)
-            if not log_file:
-                return False
-            
-            # Remove from storage
-            storage_path = self.storage_dir / f"{file_id}_{log_file.filename}"
-            if storage_path.exists():
-                storage_path.unlink()
-            
-            # Remove metadata file
-            metadata_path = self.storage_dir / f"{file_id}_metadata.json"
-            if metadata_path.exists():
-                metadata_path.unlink()
-            
-            # Remove from memory cache
-            del self.log_files[file_id]
-            
-            logger.info(f"Deleted log file: {log_file.filename}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error deleting file {file_id}: {str(e)}")
-            return False
+        return self.delete_files([file_id]) == 1
+    
+    def delete_files(self, file_ids: List[str]) -> int:
+        """Delete several log files, removing them from the search index in one transaction
+        
+        Returns the number of files deleted.
+        """
+        deleted = []
+        for file_id in file_ids:
+            try:
+                log_file = self.get_file(file_id)
+                if not log_file:
+                    continue
+                
+                # Header first: a file without one is an orphan that prune_orphans() removes
+                for path in (self._metadata_path(file_id), self.storage_dir / f"{file_id}_{log_file.filename}",
+                             self._entries_path(file_id), self._time_index_path(file_id), self._templates_path(file_id)):
+                    if path.exists():
+                        path.unlink()
+                
+                self.time_indexes.pop(file_id, None)
+                del self.log_files[file_id]
+                deleted.append(file_id)
+                logger.info(f"Deleted log file: {log_file.filename}")
+                
+            except Exception as e:
+                logger.error(f"Error deleting file {file_id}: {str(e)}")
+        
+        if deleted:
+            self.search_index.remove_files(deleted)
+        return len(deleted)
+    
+    def storage_usage(self) -> Dict[str, int]:
+        """Bytes on disk per stored file ID, covering the upload and every derived file"""
+        usage: Dict[str, int] = {}
+        for path in self.storage_dir.iterdir():
+            file_id = self._stored_file_id(path.name)
+            if file_id is not None:
+                usage[file_id] = usage.get(file_id, 0) + path.stat().st_size
+        return usage
+    
+    def prune_orphans(self, grace_seconds: float = 3600) -> int:
+        """Remove files left behind by interrupted uploads and deletes
+        
+        A file is an orphan when its ID has no header or when it is a
+        leftover ``.tmp`` write. Files younger than ``grace_seconds`` are
+        kept, since an upload writes its header last. The search index
+        database is never touched. Returns the number of files removed.
+        """
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        for path in self.storage_dir.iterdir():
+            if not path.is_file() or path.name.startswith(SEARCH_INDEX_FILENAME):
+                continue
+            known = self._stored_file_id(path.name) is not None and not path.name.endswith(".tmp")
+            try:
+                if not known and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info(f"Pruned {removed} orphan files from {self.storage_dir}")
+        return removed
     
     def _combine_log_entries(self, entries: List) -> str:
         """Combine log entries into a single text for analysis"""
@@ -134,11 +468,65 @@ class LogManager:
         
         return "\n".join(lines)
     
-    def _save_metadata(self, log_file: LogFile):
-        """Save log file metadata to disk"""
-        metadata_path = self.storage_dir / f"{log_file.id}_metadata.json"
+    def _combine_templates(self, templates: List[LogTemplate]) -> str:
+        """Combine distinct templates with their counts into a single text"""
+        return "\n".join(f"{template.count}x {template.template}" for template in templates)
+    
+    def _header_of(self, log_file: LogFile) -> LogFileHeader:
+        return LogFileHeader(**{name: getattr(log_file, name) for name in LogFileHeader.model_fields})
+    
+    def _stored_file_id(self, name: str) -> Optional[str]:
+        """ID of the known file a storage file name (``<id>_...``) belongs to, if any"""
+        for index, char in enumerate(name):
+            if char == "_" and name[:index] in self.log_files:
+                return name[:index]
+        return None
+    
+    def _metadata_path(self, file_id: str) -> Path:
+        return self.storage_dir / f"{file_id}_metadata.json"
+    
+    def _entries_path(self, file_id: str) -> Path:
+        return self.storage_dir / f"{file_id}_entries.jsonl"
+    
+    def _time_index_path(self, file_id: str) -> Path:
+        return self.storage_dir / f"{file_id}_timeindex.json"
+    
+    def _templates_path(self, file_id: str) -> Path:
+        return self.storage_dir / f"{file_id}_templates.json"
+    
+    def _atomic_write(self, path: Path, write):
+        """Write a file through a temporary sibling and rename it into place"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    
+    def _entry_to_dict(self, entry: LogEntry) -> dict:
+        return {
+            'id': entry.id,
+            'timestamp': entry.timestamp.isoformat(),
+            'level': entry.level,
+            'message': entry.message,
+            'source': entry.source,
+            'metadata': entry.metadata
+        }
+    
+    def _entry_from_dict(self, data: dict) -> LogEntry:
+        return LogEntry(
+            id=data['id'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            level=data['level'],
+            message=data['message'],
+            source=data['source'],
+            metadata=data.get('metadata')
+        )
+    
+    def _save_metadata(self, log_file: LogFileHeader):
+        """Save the log file header (status, result, counts) to disk.
         
-        # Convert to dict for JSON serialization
+        Entries are immutable after upload and live in a separate JSON Lines
+        file, so status and result updates only rewrite this small header.
+        """
         metadata = {
             'id': log_file.id,
             'filename': log_file.filename,
@@ -147,21 +535,73 @@ class LogManager:
             'log_count': log_file.log_count,
             'log_analysis_status': log_file.log_analysis_status,
             'analysis_result': log_file.analysis_result,
-            'entries': [
-                {
-                    'id': entry.id,
-                    'timestamp': entry.timestamp.isoformat(),
-                    'level': entry.level,
-                    'message': entry.message,
-                    'source': entry.source,
-                    'metadata': entry.metadata
-                }
-                for entry in log_file.entries
-            ]
+            'summary': log_file.summary.model_dump(mode='json') if log_file.summary else None
         }
         
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        self._atomic_write(self._metadata_path(log_file.id), lambda f: json.dump(metadata, f))
+    
+    def _save_entries(self, file_id: str, entries: List[LogEntry]) -> List[int]:
+        """Save parsed entries as JSON Lines, one entry per line
+        
+        Returns the byte offset of every line. Lines are ASCII-only JSON,
+        so their length in characters equals their length in bytes.
+        """
+        offsets = []
+        
+        def write(f):
+            position = 0
+            for entry in entries:
+                line = json.dumps(self._entry_to_dict(entry)) + "\n"
+                offsets.append(position)
+                f.write(line)
+                position += len(line)
+        
+        self._atomic_write(self._entries_path(file_id), write)
+        return offsets
+    
+    def _save_templates(self, file_id: str, templates: List[LogTemplate]):
+        """Save mined templates with their per-file counts"""
+        data = [template.model_dump() for template in templates]
+        self._atomic_write(self._templates_path(file_id), lambda f: json.dump(data, f))
+    
+    def _save_time_index(self, file_id: str, time_index: TimeIndex):
+        """Save the sparse time index of a file"""
+        self._atomic_write(self._time_index_path(file_id), lambda f: json.dump(time_index.to_json(), f))
+        self.time_indexes[file_id] = time_index
+    
+    def _get_time_index(self, file_id: str) -> TimeIndex:
+        """Get the time index of a file, loading or building it if needed"""
+        if file_id not in self.time_indexes:
+            time_index_path = self._time_index_path(file_id)
+            if time_index_path.exists():
+                with open(time_index_path, 'r') as f:
+                    self.time_indexes[file_id] = TimeIndex.from_json(json.load(f))
+            else:
+                # Files stored before time indexes existed
+                self._save_time_index(file_id, TimeIndex.build(self._iter_entries_with_offsets(file_id)))
+        return self.time_indexes[file_id]
+    
+    def _iter_entries_with_offsets(self, file_id: str) -> Iterator[Tuple[LogEntry, int]]:
+        """Iterate over stored entries together with their byte offsets"""
+        entries_path = self._entries_path(file_id)
+        if not entries_path.exists():
+            return
+        
+        with open(entries_path, 'rb') as f:
+            position = 0
+            for line in f:
+                if line.strip():
+                    yield self._entry_from_dict(json.loads(line)), position
+                position += len(line)
+    
+    def _load_entries(self, file_id: str) -> List[LogEntry]:
+        """Load parsed entries of a stored log file"""
+        entries_path = self._entries_path(file_id)
+        if not entries_path.exists():
+            return []
+        
+        with open(entries_path, 'r') as f:
+            return [self._entry_from_dict(json.loads(line)) for line in f if line.strip()]
     
     def _load_existing_files(self):
         """Load existing log files from disk"""
@@ -171,8 +611,8 @@ class LogManager:
                     with open(metadata_file, 'r') as f:
                         data = json.load(f)
                     
-                    # Reconstruct LogFile object
-                    log_file = LogFile(
+                    # Reconstruct header; entries stay on disk
+                    log_file = LogFileHeader(
                         id=data['id'],
                         filename=data['filename'],
                         size=data['size'],
@@ -180,9 +620,19 @@ class LogManager:
                         log_count=data['log_count'],
                         log_analysis_status=data['log_analysis_status'],
                         analysis_result=data['analysis_result'],
-                        entries=[]  # We'll load entries if needed
+                        summary=LogSummary(**data['summary']) if data.get('summary') else None
                     )
                     
+                    # Split legacy metadata files that still embed entries
+                    if 'entries' in data:
+                        entries = [self._entry_from_dict(entry) for entry in data['entries']]
+                        self._save_entries(log_file.id, entries)
+                        self._save_metadata(log_file)
+                    
+                    # Index files stored before search existed
+                    if not self.search_index.has_file(log_file.id):
+                        self.search_index.index_file(log_file.id, self._iter_entries_with_offsets(log_file.id))
+                    
                     self.log_files[log_file.id] = log_file
                     
                 except Exception as e:
@@ -194,8 +644,45 @@ class LogManager:
         except Exception as e:
             logger.error(f"Error loading existing files: {str(e)}")
     
-    def _add_to_vector_db(self, log_file: LogFile, log_content: str):
-        """Add analyzed log to vector database"""
+    def _reuse_similar_analysis(self, incident_content: str) -> Optional[Tuple[str, Dict]]:
+        """Return the stored analysis of a near-duplicate incident, if any"""
+        start_time = time.time()
+        matches = vector_service.search_similar_incidents(
+            incident_content, top_k=1, similarity_threshold=VECTOR_REUSE_SIMILARITY
+        )
+        lookup_seconds = time.time() - start_time
+        if not matches:
+            metrics_service.record_vector_reuse(hit=False)
+            return None
+        
+        match = matches[0]
+        saved_seconds = max((self.model_analysis_seconds or 0.0) - lookup_seconds, 0.0)
+        metrics_service.record_vector_reuse(hit=True, saved_seconds=saved_seconds)
+        metadata = {
+            "mode": "vector_reuse",
+            "served_from": "vector_index",
+            "reuse": {
+                "incident_id": match['incident_id'],
+                "similarity_score": round(match['similarity_score'], 4),
+                "source_file": match['source_file'],
+                "lookup_ms": round(lookup_seconds * 1000, 2),
+                "estimated_saved_ms": round(saved_seconds * 1000, 2)
+            }
+        }
+        return match['analysis'], metadata
+    
+    def _record_model_analysis_time(self, seconds: float):
+        if self.model_analysis_seconds is None:
+            self.model_analysis_seconds = seconds
+        else:
+            self.model_analysis_seconds = 0.8 * self.model_analysis_seconds + 0.2 * seconds
+    
+    def _add_to_vector_db(self, log_file: LogFileHeader, log_content: str, incident_content: Optional[str] = None):
+        """Add analyzed log to vector database
+        
+        Severity and category are derived from the full log content, while
+        ``incident_content`` (if given) is what gets embedded and stored.
+        """
         try:
             # Determine severity and category based on log content
             severity = self._determine_severity(log_content)
@@ -203,7 +690,7 @@ class LogManager:
             
             # Add to vector database
             incident_id = vector_service.add_incident(
-                log_content=log_content,
+                log_content=incident_content or log_content,
                 analysis=log_file.analysis_result,
                 source_file=log_file.filename,
                 severity=severity,
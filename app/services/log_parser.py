@@ -3,11 +3,65 @@ Log parsing service for different log formats
 """
 import re
 import uuid
+from collections import Counter
 from datetime import datetime
 from typing import List, Optional
 from pathlib import Path
-from app.models.log import LogEntry, LogFile
+from app.models.log import LogEntry, LogFile, LogSummary
+from app.services.template_miner import TemplateMiner
 from app.core.logger import logger
+from app.core.timing import timed
+
+ERROR_LEVELS = {'ERROR', 'CRITICAL', 'FATAL'}
+TOP_SOURCES_LIMIT = 10
+TIMEZONE_SUFFIX = re.compile(r'[+-]\d{2}:\d{2}$')
+TIMESTAMP_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d %H:%M:%S',
+    '%d/%b/%Y:%H:%M:%S %z',
+    '%d/%b/%Y:%H:%M:%S',
+]
+
+class SummaryAccumulator:
+    """Accumulates per-file statistics while entries are being parsed"""
+    
+    def __init__(self):
+        self.level_counts = Counter()
+        self.source_counts = Counter()
+        self.errors_per_minute = Counter()
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.error_count = 0
+    
+    def add(self, entry: LogEntry):
+        """Account for a single finished entry"""
+        self.level_counts[entry.level] += 1
+        self.source_counts[entry.source] += 1
+        
+        timestamp = entry.timestamp
+        if timestamp is not None:
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+        
+        if entry.level in ERROR_LEVELS:
+            self.error_count += 1
+            if timestamp is not None:
+                self.errors_per_minute[timestamp.strftime('%Y-%m-%dT%H:%M')] += 1
+    
+    def build(self) -> LogSummary:
+        """Return the accumulated statistics as a LogSummary"""
+        return LogSummary(
+            level_counts=dict(self.level_counts),
+            first_timestamp=self.first_timestamp,
+            last_timestamp=self.last_timestamp,
+            error_count=self.error_count,
+            errors_per_minute=dict(sorted(self.errors_per_minute.items())),
+            top_sources=dict(self.source_counts.most_common(TOP_SOURCES_LIMIT))
+        )
 
 class LogParser:
     """Parser for different log formats"""
@@ -24,6 +78,7 @@ class LogParser:
             'kubernetes': re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z)\s+(\w+)\s+(\w+)\s+(.+)'),
         }
     
+    @timed("parse")
     def parse_log_file(self, file_path: Path, filename: str) -> LogFile:
         """Parse a log file and return LogFile object"""
         try:
@@ -33,8 +88,10 @@ class LogParser:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
             
-            # Parse log entries
-            entries = self._parse_content(content, filename)
+            # Parse log entries, collecting summary statistics and templates in the same pass
+            summary = SummaryAccumulator()
+            templates = TemplateMiner()
+            entries = self._parse_content(content, filename, summary, templates)
             
             # Create LogFile object
             log_file = LogFile(
@@ -43,7 +100,9 @@ class LogParser:
                 size=len(content),
                 upload_time=datetime.utcnow(),
                 log_count=len(entries),
-                entries=entries
+                summary=summary.build(),
+                entries=entries,
+                templates=templates.templates()
             )
             
             logger.info(f"Successfully parsed {len(entries)} log entries from {filename}")
@@ -53,9 +112,20 @@ class LogParser:
             logger.error(f"Error parsing log file {filename}: {str(e)}")
             raise
     
-    def _parse_content(self, content: str, filename: str) -> List[LogEntry]:
+    def _parse_content(self, content: str, filename: str, summary: Optional[SummaryAccumulator] = None,
+                       templates: Optional[TemplateMiner] = None) -> List[LogEntry]:
         """Parse log content into LogEntry objects (strict multi-line: 'custom' or 'iso_error' pattern starts new entry)"""
         entries = []
+        
+        def finish(entry: LogEntry):
+            entries.append(entry)
+            if summary is not None:
+                summary.add(entry)
+            if templates is not None:
+                template_id, params = templates.add(entry.message)
+                entry.metadata['template_id'] = template_id
+                entry.metadata['template_params'] = params
+        
         lines = content.split('\n')
         current_entry = None
         for line_num, line in enumerate(lines, 1):
@@ -65,11 +135,11 @@ class LogParser:
             match_iso = self.patterns['iso_error'].match(line.strip())
             if match_custom:
                 if current_entry:
-                    entries.append(current_entry)
+                    finish(current_entry)
                 current_entry = self._create_entry_from_match(match_custom, 'custom', filename, line_num, line)
             elif match_iso:
                 if current_entry:
-                    entries.append(current_entry)
+                    finish(current_entry)
                 # Tworzymy LogEntry dla iso_error
                 timestamp_str, level, message = match_iso.groups()
                 timestamp = self._parse_timestamp(timestamp_str)
@@ -91,7 +161,7 @@ class LogParser:
                 else:
                     continue
         if current_entry:
-            entries.append(current_entry)
+            finish(current_entry)
         return entries
     
     def _parse_line(self, line: str, source: str, line_num: int) -> Optional[LogEntry]:
@@ -199,20 +269,20 @@ class LogParser:
         """Parse timestamp string to datetime object"""
         try:
             # Remove timezone info for parsing
-            clean_timestamp = re.sub(r'[+-]\d{2}:\d{2}$', '', timestamp_str)
+            clean_timestamp = TIMEZONE_SUFFIX.sub('', timestamp_str)
             clean_timestamp = clean_timestamp.replace('Z', '')
             
-            # Try different formats
-            formats = [
-                '%Y-%m-%dT%H:%M:%S.%f',
-                '%Y-%m-%dT%H:%M:%S',
-                '%Y-%m-%d %H:%M:%S.%f',
-                '%Y-%m-%d %H:%M:%S',
-                '%d/%b/%Y:%H:%M:%S %z',
-                '%d/%b/%Y:%H:%M:%S',
-            ]
+            # Date and time shapes of the first four formats, without strptime's per-call overhead
+            if len(clean_timestamp) >= 19 and clean_timestamp[10] in 'T ':
+                try:
+                    parsed = datetime.fromisoformat(clean_timestamp)
+                    if parsed.tzinfo is None:
+                        return parsed
+                except ValueError:
+                    pass
             
-            for fmt in formats:
+            # Try different formats
+            for fmt in TIMESTAMP_FORMATS:
                 try:
                     return datetime.strptime(clean_timestamp, fmt)
                 except ValueError:
@@ -0,0 +1,154 @@
+"""
+Token-budgeted reduction of log text before LLM analysis
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.core.timing import timed
+
+load_dotenv()
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "6000"))
+CHARS_PER_TOKEN = 4
+CONTEXT_LINES = 3
+MAX_LINE_CHARS = 2000
+# Share of the budget kept free for omission markers
+MARKER_RESERVE = 0.05
+
+VARIABLE_PATTERN = re.compile(r'0x[0-9a-fA-F]+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|\d+')
+CRITICAL_PATTERN = re.compile(r'\b(CRITICAL|FATAL|EMERGENCY)\b', re.IGNORECASE)
+ERROR_PATTERN = re.compile(r'\b(ERROR|EXCEPTION|TRACEBACK|PANIC)\b|Exception\b|Error:', re.IGNORECASE)
+STACK_TRACE_PATTERN = re.compile(r'^\s+(at\s|File\s"|\.\.\.\s\d+\smore)|^Caused by:')
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of text (about four characters per token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+@dataclass
+class ReductionResult:
+    """Reduced log text with budget accounting"""
+    text: str
+    original_tokens: int
+    reduced_tokens: int
+    token_budget: int
+    original_lines: int
+    kept_lines: int
+    unique_lines: int
+
+    @property
+    def truncated(self) -> bool:
+        """Whether lines had to be omitted to fit the budget"""
+        return self.kept_lines < self.unique_lines
+
+    @property
+    def compression_ratio(self) -> float:
+        return round(self.original_tokens / self.reduced_tokens, 2) if self.reduced_tokens else 1.0
+
+    def to_metadata(self) -> Dict:
+        return {
+            "original_tokens": self.original_tokens,
+            "reduced_tokens": self.reduced_tokens,
+            "token_budget": self.token_budget,
+            "budget_used": round(self.reduced_tokens / self.token_budget, 3) if self.token_budget else None,
+            "compression_ratio": self.compression_ratio,
+            "original_lines": self.original_lines,
+            "kept_lines": self.kept_lines
+        }
+
+def _priority(line: str) -> int:
+    if CRITICAL_PATTERN.search(line):
+        return 3
+    if ERROR_PATTERN.search(line):
+        return 2
+    if STACK_TRACE_PATTERN.search(line):
+        return 1
+    return 0
+
+@timed("reduce")
+def reduce_logs(log_text: str, token_budget: Optional[int] = None) -> ReductionResult:
+    """Reduce log text to fit a token budget
+
+    Lines that differ only in numbers, hex values or UUIDs are collapsed
+    into their first occurrence with a repeat count. If the result still
+    exceeds the budget, windows of CONTEXT_LINES around CRITICAL, ERROR and
+    stack-trace lines are kept first (most severe first), the remaining
+    budget is filled with other lines from the top, and omitted stretches
+    are replaced by a marker line.
+    """
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    original_tokens = estimate_tokens(log_text)
+    lines = log_text.splitlines()
+
+    # Collapse repeated lines
+    unique_lines: List[str] = []
+    counts: List[int] = []
+    positions: Dict[str, int] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        key = VARIABLE_PATTERN.sub('#', line.strip())
+        if key in positions:
+            counts[positions[key]] += 1
+            continue
+        positions[key] = len(unique_lines)
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + " ...[truncated]"
+        unique_lines.append(line)
+        counts.append(1)
+
+    rendered = [line if count == 1 else f"{line} [repeated {count}x]" for line, count in zip(unique_lines, counts)]
+    costs = [estimate_tokens(line) + 1 for line in rendered]
+
+    if sum(costs) <= token_budget:
+        text = "\n".join(rendered)
+        return ReductionResult(text, original_tokens, estimate_tokens(text), token_budget,
+                               len(lines), len(rendered), len(rendered))
+
+    available = int(token_budget * (1 - MARKER_RESERVE))
+    selected = set()
+
+    def select(index: int) -> bool:
+        nonlocal available
+        if index in selected:
+            return True
+        if costs[index] > available:
+            return False
+        selected.add(index)
+        available -= costs[index]
+        return True
+
+    # Windows around the most severe lines first
+    anchors = sorted(
+        (index for index, line in enumerate(unique_lines) if _priority(line) > 0),
+        key=lambda index: (-_priority(unique_lines[index]), index)
+    )
+    for anchor in anchors:
+        if not select(anchor):
+            continue
+        for index in range(max(anchor - CONTEXT_LINES, 0), min(anchor + CONTEXT_LINES + 1, len(rendered))):
+            select(index)
+
+    # Fill the rest of the budget from the top
+    for index in range(len(rendered)):
+        if available <= 0:
+            break
+        select(index)
+
+    output = []
+    omitted = 0
+    for index, line in enumerate(rendered):
+        if index in selected:
+            if omitted:
+                output.append(f"... [{omitted} lines omitted] ...")
+                omitted = 0
+            output.append(line)
+        else:
+            omitted += 1
+    if omitted:
+        output.append(f"... [{omitted} lines omitted] ...")
+
+    text = "\n".join(output)
+    return ReductionResult(text, original_tokens, estimate_tokens(text), token_budget,
+                           len(lines), len(selected), len(rendered))
@@ -0,0 +1,93 @@
+"""
+Map-reduce analysis of log files too large for a single LLM call
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.models.log import LogEntry
+from app.services.log_reducer import reduce_logs
+from app.core.logger import logger
+from app.core.timing import run_in_context
+
+load_dotenv()
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+DEFAULT_CHUNK_ENTRIES = int(os.getenv("MAP_REDUCE_CHUNK_ENTRIES", "2000"))
+
+MAP_PROMPT = "Analyze this chunk ({label}) of a larger log file. List the errors you find, their likely causes and timestamps.\n\n"
+REDUCE_PROMPT = ("Below are partial analyses of consecutive chunks of one log file. "
+                 "Merge them into a single analysis: identify the root causes across chunks, "
+                 "order findings by impact and propose solutions.\n\n")
+
+def chunk_entries(entries: List[LogEntry], max_entries: Optional[int] = None,
+                  max_minutes: Optional[int] = None) -> List[List[LogEntry]]:
+    """Split entries into consecutive chunks bounded by entry count and/or time span"""
+    max_entries = max_entries or DEFAULT_CHUNK_ENTRIES
+    span = timedelta(minutes=max_minutes) if max_minutes else None
+
+    chunks: List[List[LogEntry]] = []
+    current: List[LogEntry] = []
+    for entry in entries:
+        if current and (len(current) >= max_entries
+                        or (span is not None and entry.timestamp - current[0].timestamp >= span)):
+            chunks.append(current)
+            current = []
+        current.append(entry)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _chunk_label(index: int, chunk: List[LogEntry]) -> str:
+    return (f"chunk {index + 1}, {chunk[0].timestamp.strftime('%Y-%m-%d %H:%M:%S')} - "
+            f"{chunk[-1].timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+
+def analyze_map_reduce(entries: List[LogEntry], analyze: Callable[[str], str],
+                       combine: Callable[[List[LogEntry]], str],
+                       max_entries: Optional[int] = None, max_minutes: Optional[int] = None,
+                       max_concurrency: Optional[int] = None,
+                       token_budget: Optional[int] = None) -> Tuple[str, Dict]:
+    """Analyze chunks concurrently, then merge the partial findings
+
+    Every chunk is rendered with ``combine``, reduced to the token budget
+    and analyzed with ``analyze`` on a thread pool of ``max_concurrency``
+    workers. The partial analyses are reduced once more and merged in a
+    final ``analyze`` call. Returns the analysis and timing metadata.
+    """
+    max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+    chunks = chunk_entries(entries, max_entries, max_minutes)
+    labels = [_chunk_label(index, chunk) for index, chunk in enumerate(chunks)]
+
+    def analyze_chunk(index: int) -> Tuple[str, float]:
+        start_time = time.time()
+        reduction = reduce_logs(combine(chunks[index]), token_budget)
+        result = analyze(MAP_PROMPT.format(label=labels[index]) + reduction.text)
+        return result, time.time() - start_time
+
+    logger.info(f"Map-reduce analysis of {len(chunks)} chunks with concurrency {max_concurrency}")
+    map_start = time.time()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        partials = list(executor.map(run_in_context(analyze_chunk), range(len(chunks))))
+    map_wall = time.time() - map_start
+
+    reduce_start = time.time()
+    if len(partials) == 1:
+        analysis = partials[0][0]
+    else:
+        findings = "\n\n".join(f"### {label}\n{result}" for label, (result, _) in zip(labels, partials))
+        analysis = analyze(REDUCE_PROMPT + reduce_logs(findings, token_budget).text)
+    reduce_wall = time.time() - reduce_start
+
+    map_sequential = sum(duration for _, duration in partials)
+    metadata = {
+        "mode": "map_reduce",
+        "chunks": len(chunks),
+        "max_concurrency": max_concurrency,
+        "map_wall_ms": round(map_wall * 1000, 2),
+        "map_sequential_ms": round(map_sequential * 1000, 2),
+        "reduce_ms": round(reduce_wall * 1000, 2),
+        "map_speedup": round(map_sequential / map_wall, 2) if map_wall else None
+    }
+    return analysis, metadata
@@ -6,6 +6,11 @@ from prometheus_client.core import CollectorRegistry
 from typing import Dict, Any
 from app.core.logger import logger
 
+# 100 B to 100 MiB in powers of 4
+SIZE_BUCKETS = [100 * 4 ** exponent for exponent in range(11)]
+# 1 ms (a small parse) to 60 s (a map-reduce model call)
+STAGE_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
 class MetricsService:
     """Service for collecting and exposing Prometheus metrics"""
     
@@ -28,18 +33,84 @@ class MetricsService:
             registry=self.registry
         )
         
+        self.request_size = Histogram(
+            'smart_dashboard_request_size_bytes',
+            'Request body size in bytes',
+            ['method', 'endpoint'],
+            buckets=SIZE_BUCKETS,
+            registry=self.registry
+        )
+        
+        self.response_size = Histogram(
+            'smart_dashboard_response_size_bytes',
+            'Response body size in bytes',
+            ['method', 'endpoint'],
+            buckets=SIZE_BUCKETS,
+            registry=self.registry
+        )
+        
+        self._request_children: Dict[tuple, tuple] = {}
+        
+        self.requests_in_progress = Gauge(
+            'smart_dashboard_requests_in_progress',
+            'Number of requests being served',
+            ['method'],
+            registry=self.registry
+        )
+        
         # Log Analysis Metrics
         self.log_uploads_total = Counter(
             'smart_dashboard_log_uploads_total',
             'Total number of log file uploads',
-            ['filename', 'status'],
+            ['status'],
             registry=self.registry
         )
         
         self.log_analysis_duration = Histogram(
             'smart_dashboard_log_analysis_duration_seconds',
-            'Log analysis duration in seconds',
-            ['filename'],
+            'Log file analysis duration in seconds',
+            ['mode'],
+            buckets=STAGE_BUCKETS,
+            registry=self.registry
+        )
+        
+        # Pipeline Stage Metrics
+        self.stage_duration = Histogram(
+            'smart_dashboard_stage_duration_seconds',
+            'Duration of pipeline stages (parse, embed, llm, ...) in seconds',
+            ['stage', 'outcome'],
+            buckets=STAGE_BUCKETS,
+            registry=self.registry
+        )
+        
+        self._stage_children: Dict[tuple, Any] = {}
+        
+        self.analysis_cache_requests_total = Counter(
+            'smart_dashboard_analysis_cache_requests_total',
+            'Analysis cache lookups',
+            ['result'],
+            registry=self.registry
+        )
+        
+        self.coalesced_calls_total = Counter(
+            'smart_dashboard_coalesced_calls_total',
+            'Calls deduplicated by joining an identical in-flight call',
+            ['group'],
+            registry=self.registry
+        )
+        
+        # LLM Client Metrics
+        self.llm_requests_total = Counter(
+            'smart_dashboard_llm_requests_total',
+            'Model API call attempts by outcome',
+            ['outcome'],
+            registry=self.registry
+        )
+        
+        self.llm_request_duration = Histogram(
+            'smart_dashboard_llm_request_duration_seconds',
+            'Model API call attempt duration in seconds',
+            buckets=[0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60],
             registry=self.registry
         )
         
@@ -57,6 +128,19 @@ class MetricsService:
             registry=self.registry
         )
         
+        self.vector_reuse_total = Counter(
+            'smart_dashboard_vector_reuse_total',
+            'Analyses looked up in the vector index before calling the model',
+            ['result'],
+            registry=self.registry
+        )
+        
+        self.vector_reuse_saved_seconds_total = Counter(
+            'smart_dashboard_vector_reuse_saved_seconds_total',
+            'Estimated model time saved by reusing stored analyses',
+            registry=self.registry
+        )
+        
         # Incident Metrics
         self.incidents_total = Gauge(
             'smart_dashboard_incidents_total',
@@ -96,29 +180,84 @@ class MetricsService:
         
         logger.info("Metrics service initialized")
     
-    def record_request(self, method: str, endpoint: str, status: int, duration: float):
-        """Record API request metrics"""
+    def record_request(self, method: str, endpoint: str, status: int, duration: float,
+                       request_size: int = None, response_size: int = None):
+        """Record API request metrics; ``endpoint`` is the route template"""
         try:
-            self.request_count.labels(method=method, endpoint=endpoint, status=status).inc()
-            self.request_duration.labels(method=method, endpoint=endpoint).observe(duration)
+            # labels() validates and locks on every call; route templates bound the key space
+            key = (method, endpoint, status)
+            children = self._request_children.get(key)
+            if children is None:
+                children = self._request_children[key] = (
+                    self.request_count.labels(method=method, endpoint=endpoint, status=status),
+                    self.request_duration.labels(method=method, endpoint=endpoint),
+                    self.request_size.labels(method=method, endpoint=endpoint),
+                    self.response_size.labels(method=method, endpoint=endpoint),
+                )
+            count, request_duration, request_size_histogram, response_size_histogram = children
+            count.inc()
+            request_duration.observe(duration)
+            if request_size is not None:
+                request_size_histogram.observe(request_size)
+            if response_size is not None:
+                response_size_histogram.observe(response_size)
         except Exception as e:
             logger.error(f"Error recording request metrics: {str(e)}")
     
-    def record_log_upload(self, filename: str, status: str, duration: float = None):
-        """Record log upload metrics"""
+    def record_log_upload(self, status: str):
+        """Record a log file upload (success or error)"""
         try:
-            self.log_uploads_total.labels(filename=filename, status=status).inc()
-            if duration:
-                self.log_analysis_duration.labels(filename=filename).observe(duration)
+            self.log_uploads_total.labels(status=status).inc()
         except Exception as e:
             logger.error(f"Error recording log upload metrics: {str(e)}")
     
+    def record_log_analysis(self, mode: str, duration: float):
+        """Record a log file analysis by mode (single, map_reduce, vector_reuse, stream)"""
+        try:
+            self.log_analysis_duration.labels(mode=mode).observe(duration)
+        except Exception as e:
+            logger.error(f"Error recording log analysis metrics: {str(e)}")
+    
+    def record_stage(self, stage: str, duration: float, outcome: str = "ok"):
+        """Record a pipeline stage duration; ``stage`` is one of app.core.timing.STAGES"""
+        try:
+            key = (stage, outcome)
+            child = self._stage_children.get(key)
+            if child is None:
+                child = self._stage_children[key] = self.stage_duration.labels(stage=stage, outcome=outcome)
+            child.observe(duration)
+        except Exception as e:
+            logger.error(f"Error recording stage metrics: {str(e)}")
+    
+    def record_analysis_cache(self, result: str):
+        """Record an analysis cache lookup (hit or miss)"""
+        try:
+            self.analysis_cache_requests_total.labels(result=result).inc()
+        except Exception as e:
+            logger.error(f"Error recording analysis cache metrics: {str(e)}")
+    
+    def record_coalesced_call(self, group: str):
+        """Record a call served by an identical in-flight call"""
+        try:
+            self.coalesced_calls_total.labels(group=group).inc()
+        except Exception as e:
+            logger.error(f"Error recording coalesced call metrics: {str(e)}")
+    
+    def record_llm_request(self, outcome: str, duration: float = None):
+        """Record a model API call attempt (success, retry, failed, error, circuit_open)"""
+        try:
+            self.llm_requests_total.labels(outcome=outcome).inc()
+            if duration is not None:
+                self.llm_request_duration.observe(duration)
+        except Exception as e:
+            logger.error(f"Error recording LLM request metrics: {str(e)}")
+    
     def record_vector_search(self, query_type: str, results_found: int, duration: float, similarity_scores: list = None):
-        """Record vector search metrics"""
+        """Record vector search metrics; ``results_found`` is labeled only as found or not"""
         try:
             self.vector_search_total.labels(
                 query_type=query_type, 
-                results_found=str(results_found)
+                results_found="true" if results_found else "false"
             ).inc()
             self.vector_search_duration.observe(duration)
             
@@ -129,6 +268,15 @@ class MetricsService:
         except Exception as e:
             logger.error(f"Error recording vector search metrics: {str(e)}")
     
+    def record_vector_reuse(self, hit: bool, saved_seconds: float = 0.0):
+        """Record a vector reuse lookup and the estimated time saved on a hit"""
+        try:
+            self.vector_reuse_total.labels(result="hit" if hit else "miss").inc()
+            if hit:
+                self.vector_reuse_saved_seconds_total.inc(saved_seconds)
+        except Exception as e:
+            logger.error(f"Error recording vector reuse metrics: {str(e)}")
+    
     def update_incident_metrics(self, incidents_data: Dict[str, Any]):
         """Update incident count metrics"""
         try:
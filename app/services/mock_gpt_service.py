@@ -1,21 +1,24 @@
 """
 Mock GPT service for testing without OpenAI API key
 """
+import asyncio
+import os
+import re
 import time
+from typing import AsyncIterator
+from app.services.analysis_cache import analysis_cache
 from app.core.logger import logger
+from app.core.timing import span, timed
 
-def analyze_logs(log_text: str) -> str:
-    start_time = time.time()
-    
-    try:
-        logger.debug("Using mock GPT service for analysis")
-        
-        # Simulate API delay
-        time.sleep(0.5)
-        
-        # Mock analysis based on log content
-        if "database" in log_text.lower() or "connection" in log_text.lower():
-            analysis = """
+# Simulated API latency in seconds
+SIMULATED_LATENCY = float(os.getenv("MOCK_GPT_LATENCY", "0.5"))
+# Simulated delay between streamed tokens in seconds
+SIMULATED_TOKEN_DELAY = float(os.getenv("MOCK_GPT_TOKEN_DELAY", "0.02"))
+
+def _mock_analysis(log_text: str) -> str:
+    """Canned analysis chosen by keywords in the log"""
+    if "database" in log_text.lower() or "connection" in log_text.lower():
+        analysis = """
 🔍 **Database Error Analysis:**
 
 **Problem:** Database connection error
@@ -33,8 +36,8 @@ def analyze_logs(log_text: str) -> str:
 - Test connection: `telnet db.example.com 5432`
 - Check PostgreSQL logs: `/var/log/postgresql/`
 """
-        elif "memory" in log_text.lower() or "out of memory" in log_text.lower():
-            analysis = """
+    elif "memory" in log_text.lower() or "out of memory" in log_text.lower():
+        analysis = """
 🔍 **Memory Error Analysis:**
 
 **Problem:** Out of Memory error
@@ -51,8 +54,8 @@ def analyze_logs(log_text: str) -> str:
 - Check JVM configuration (if Java)
 - Add memory monitoring
 """
-        else:
-            analysis = """
+    else:
+        analysis = """
 🔍 **General Log Analysis:**
 
 **Issues found:** Application error
@@ -69,13 +72,37 @@ def analyze_logs(log_text: str) -> str:
 - Check system metrics
 - Verify environment configuration
 """
+    return analysis.strip()
+
+@analysis_cache.cached(model="mock", prompt_version="1")
+@timed("llm")
+def analyze_logs(log_text: str) -> str:
+    start_time = time.time()
+    
+    try:
+        logger.debug("Using mock GPT service for analysis")
+        
+        # Simulate API delay
+        time.sleep(SIMULATED_LATENCY)
+        
+        analysis = _mock_analysis(log_text)
         
         duration = time.time() - start_time
         logger.info(f"Mock analysis completed in {duration:.3f}s")
         
-        return analysis.strip()
+        return analysis
         
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Mock analysis error after {duration:.3f}s: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+async def stream_analysis(log_text: str) -> AsyncIterator[str]:
+    """Stream the mock analysis word by word, like a streaming completion"""
+    logger.debug("Using mock GPT service for streaming analysis")
+    with span("llm"):
+        # Time to first token is a fraction of the full simulated latency
+        await asyncio.sleep(SIMULATED_LATENCY / 5)
+        for token in re.findall(r'\s*\S+', _mock_analysis(log_text)):
+            await asyncio.sleep(SIMULATED_TOKEN_DELAY)
+            yield token
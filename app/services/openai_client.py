@@ -0,0 +1,294 @@
+"""
+Async OpenAI chat client with pooling, concurrency cap, retries and a circuit breaker
+"""
+import asyncio
+import os
+import random
+import time
+from typing import AsyncIterator, Dict, Optional
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError
+from app.services.metrics_service import metrics_service
+from app.core.logger import logger
+
+load_dotenv()
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", "0.5"))
+OPENAI_BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", "20"))
+OPENAI_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))
+OPENAI_BREAKER_RESET_SECONDS = float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+
+class LLMUnavailableError(Exception):
+    """The model cannot be reached: circuit open, retries exhausted or no API key"""
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then a single trial
+    call is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = OPENAI_BREAKER_FAILURES,
+                 reset_timeout: float = OPENAI_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_running = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+        return self.state == self.CLOSED
+
+    def release_trial(self):
+        """Free the half-open trial slot of a call that ended without an outcome (cancelled or closed)"""
+        if self.state == self.HALF_OPEN:
+            self._trial_running = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit breaker opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+def _is_auth_error(error: Exception) -> bool:
+    return isinstance(error, APIStatusError) and error.status_code in (401, 403)
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class AsyncChatClient:
+    """Shared async chat-completions client
+
+    One pooled HTTP client is kept per event loop, concurrent requests are
+    capped by a semaphore, and rate-limit (429), server (5xx), timeout and
+    connection errors are retried with full-jitter exponential backoff
+    (honouring Retry-After up to the backoff cap). Calls that still fail
+    count towards the circuit breaker and surface as LLMUnavailableError,
+    as do rejected requests; of those only authentication errors count
+    towards the breaker.
+    """
+
+    def __init__(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: float = OPENAI_TIMEOUT_SECONDS, max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 max_connections: int = OPENAI_MAX_CONNECTIONS, max_retries: int = OPENAI_MAX_RETRIES,
+                 breaker: Optional[CircuitBreaker] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.model = model
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or OPENAI_BASE_URL
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.transport = transport
+        self.in_flight = 0
+        self.retries = 0
+        self._loop = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _get_client(self) -> AsyncOpenAI:
+        # Pooled connections and the semaphore belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._http_client is not None:
+                await self._close_http_client(self._http_client, self._loop)
+            self._http_client = http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                transport=self.transport
+            )
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                       http_client=http_client, max_retries=0, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    async def _close_http_client(http_client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """Close the pool of a replaced client, on its own loop if that is still running"""
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+            else:
+                await http_client.aclose()
+        except Exception as e:
+            # Connections of a closed loop cannot be shut down cleanly; they go with the client
+            logger.debug(f"Could not close previous OpenAI HTTP client: {str(e)}")
+
+    def _check_available(self) -> bool:
+        """Raise if no call may be made now; returns whether this call is the half-open trial"""
+        if not self.api_key:
+            raise LLMUnavailableError("OPENAI_API_KEY is not set")
+        if not self.breaker.allow():
+            metrics_service.record_llm_request("circuit_open")
+            raise LLMUnavailableError("Circuit breaker is open")
+        return self.breaker.state == CircuitBreaker.HALF_OPEN
+
+    async def _backoff_or_raise(self, error: Exception, attempt: int, duration: float):
+        """Sleep before the next attempt, or raise if the error is final"""
+        if not _is_retryable(error):
+            # The API answered, so only a rejected key says anything about its availability
+            if _is_auth_error(error):
+                self.breaker.record_failure()
+            metrics_service.record_llm_request("error", duration)
+            logger.error(f"OpenAI API error after {duration:.3f}s: {str(error)}")
+            raise LLMUnavailableError(str(error)) from error
+        if attempt >= self.max_retries:
+            self.breaker.record_failure()
+            metrics_service.record_llm_request("failed", duration)
+            logger.error(f"OpenAI API failed after {attempt + 1} attempts: {str(error)}")
+            raise LLMUnavailableError(str(error)) from error
+
+        backoff = min(OPENAI_BACKOFF_MAX_SECONDS, OPENAI_BACKOFF_BASE_SECONDS * 2 ** attempt)
+        retry_after = _retry_after(error)
+        delay = min(retry_after, OPENAI_BACKOFF_MAX_SECONDS) if retry_after is not None else random.uniform(0, backoff)
+        self.retries += 1
+        metrics_service.record_llm_request("retry", duration)
+        logger.warning(f"OpenAI API transient error ({str(error)}), retry {attempt + 1} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _messages(system_prompt: str, user_content: str) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ]
+
+    async def complete(self, system_prompt: str, user_content: str, temperature: float = 0.3) -> str:
+        """Run one chat completion and return the message text"""
+        trial = self._check_available()
+        try:
+            client = await self._get_client()
+            messages = self._messages(system_prompt, user_content)
+            attempt = 0
+            while True:
+                start_time = time.time()
+                try:
+                    async with self._semaphore:
+                        self.in_flight += 1
+                        try:
+                            response = await client.chat.completions.create(
+                                model=self.model, messages=messages, temperature=temperature
+                            )
+                        finally:
+                            self.in_flight -= 1
+                except Exception as e:
+                    await self._backoff_or_raise(e, attempt, time.time() - start_time)
+                    attempt += 1
+                    continue
+
+                duration = time.time() - start_time
+                self.breaker.record_success()
+                metrics_service.record_llm_request("success", duration)
+                logger.info(f"OpenAI API response received in {duration:.3f}s")
+                return response.choices[0].message.content.strip()
+        finally:
+            # A cancelled trial records no outcome; without this the breaker stays half-open for good
+            if trial:
+                self.breaker.release_trial()
+
+    async def stream(self, system_prompt: str, user_content: str, temperature: float = 0.3) -> AsyncIterator[str]:
+        """Run a streaming chat completion, yielding text deltas as they arrive
+
+        Errors before the first delta are retried like ``complete``; once
+        text has been yielded a failure is raised to the caller as is.
+        """
+        trial = self._check_available()
+        try:
+            client = await self._get_client()
+            messages = self._messages(system_prompt, user_content)
+            attempt = 0
+            while True:
+                start_time = time.time()
+                started = False
+                try:
+                    async with self._semaphore:
+                        self.in_flight += 1
+                        try:
+                            response = await client.chat.completions.create(
+                                model=self.model, messages=messages, temperature=temperature, stream=True
+                            )
+                            async for chunk in response:
+                                delta = chunk.choices[0].delta.content if chunk.choices else None
+                                if delta:
+                                    if not started:
+                                        started = True
+                                        logger.info(f"OpenAI API first token after {time.time() - start_time:.3f}s")
+                                    yield delta
+                        finally:
+                            self.in_flight -= 1
+                except Exception as e:
+                    if started:
+                        self.breaker.record_failure()
+                        metrics_service.record_llm_request("failed", time.time() - start_time)
+                        logger.error(f"OpenAI API stream interrupted: {str(e)}")
+                        raise
+                    await self._backoff_or_raise(e, attempt, time.time() - start_time)
+                    attempt += 1
+                    continue
+
+                duration = time.time() - start_time
+                self.breaker.record_success()
+                metrics_service.record_llm_request("success", duration)
+                logger.info(f"OpenAI API stream completed in {duration:.3f}s")
+                return
+        finally:
+            # Closing the stream (client disconnect) or cancelling it records no outcome
+            if trial:
+                self.breaker.release_trial()
+
+    def get_statistics(self) -> Dict:
+        """Get client configuration, in-flight requests and breaker state"""
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "retries": self.retries,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures
+        }
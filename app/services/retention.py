@@ -0,0 +1,213 @@
+"""
+Retention for the SQL database and the uploads/ file storage
+
+Expires log files by age and by storage size, deletes them set-based, and
+compacts what is left: zero-count rollup buckets, unreferenced blobs, the
+file search index and SQLite free pages (incremental VACUUM). Runs
+periodically in a worker thread when RETENTION_ENABLED=true; each delete
+batch is its own short transaction, so requests keep getting the write
+connection in between.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import delete, text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, select
+from app.db import engine
+from app.models.log_sql import LogEntry, LogEntryRollup, LogFile
+from app.services.blob_store import blob_store
+from app.core.logger import logger
+
+load_dotenv()
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+
+def delete_entries(session: Session, log_file_id: int, batch_size: Optional[int] = None) -> int:
+    """Delete a file's entries with one DELETE, or at most ``batch_size`` of them
+
+    Uses the (log_file_id, timestamp) index instead of loading entries into
+    the session. Returns the number of rows deleted.
+    """
+    if batch_size is None:
+        statement = delete(LogEntry).where(LogEntry.log_file_id == log_file_id)
+    else:
+        batch = select(LogEntry.id).where(LogEntry.log_file_id == log_file_id).limit(batch_size)
+        statement = delete(LogEntry).where(LogEntry.id.in_(batch.scalar_subquery()))
+    return session.execute(statement).rowcount
+
+def delete_log_file(session: Session, log_file: LogFile) -> int:
+    """Delete a log file, its entries, rollup rows and unshared content in the session's transaction"""
+    content_digest = log_file.content_digest
+    # Rollup rows go first so the per-row delete trigger finds nothing to decrement
+    session.execute(delete(LogEntryRollup).where(LogEntryRollup.log_file_id == log_file.id))
+    count = delete_entries(session, log_file.id)
+    session.delete(log_file)
+    session.flush()
+    blob_store.release(session, content_digest)
+    return count
+
+def database_bytes(connection: Connection) -> int:
+    """Bytes of the database in use, excluding free pages"""
+    page_size = connection.execute(text("PRAGMA page_size")).scalar()
+    page_count = connection.execute(text("PRAGMA page_count")).scalar()
+    free_pages = connection.execute(text("PRAGMA freelist_count")).scalar()
+    return (page_count - free_pages) * page_size
+
+class RetentionService:
+    """Age and size based retention with set-based deletes and compaction
+
+    A zero ``max_age_days``, ``max_database_mb`` or ``max_uploads_mb``
+    disables that policy. Size policies drop the oldest files first.
+    """
+
+    def __init__(self, db_engine: Engine = None, max_age_days: float = None, max_database_mb: float = None,
+                 max_uploads_mb: float = None, delete_batch_size: int = None, vacuum_pages: int = None,
+                 orphan_grace_seconds: float = None):
+        self.engine = db_engine or engine
+        self.max_age_days = max_age_days if max_age_days is not None else float(os.getenv("RETENTION_MAX_AGE_DAYS", "0"))
+        self.max_database_mb = (max_database_mb if max_database_mb is not None
+                                else float(os.getenv("RETENTION_MAX_DATABASE_MB", "0")))
+        self.max_uploads_mb = (max_uploads_mb if max_uploads_mb is not None
+                               else float(os.getenv("RETENTION_MAX_UPLOADS_MB", "0")))
+        self.delete_batch_size = delete_batch_size or int(os.getenv("RETENTION_DELETE_BATCH_SIZE", "5000"))
+        self.vacuum_pages = vacuum_pages or int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+        self.batch_pause_seconds = float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.05"))
+        self.orphan_grace_seconds = (orphan_grace_seconds if orphan_grace_seconds is not None
+                                     else float(os.getenv("RETENTION_ORPHAN_GRACE_SECONDS", "3600")))
+        self.last_report: Optional[Dict] = None
+
+    def purge_log_file(self, log_file_id: int) -> int:
+        """Delete a log file like ``delete_log_file``, its entries ``delete_batch_size`` per transaction
+
+        Rollup rows are dropped up front: a partly purged file stops counting
+        in charts at once instead of shrinking batch by batch.
+        """
+        with Session(self.engine) as session:
+            session.execute(delete(LogEntryRollup).where(LogEntryRollup.log_file_id == log_file_id))
+            session.commit()
+        count = 0
+        while True:
+            with Session(self.engine) as session:
+                deleted = delete_entries(session, log_file_id, self.delete_batch_size)
+                session.commit()
+            count += deleted
+            if deleted < self.delete_batch_size:
+                break
+            # Let writers queued on the connection pool in before the next batch
+            time.sleep(self.batch_pause_seconds)
+        with Session(self.engine) as session:
+            log_file = session.get(LogFile, log_file_id)
+            if log_file is not None:
+                count += delete_log_file(session, log_file)
+                session.commit()
+        return count
+
+    def expire_database(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Apply the age and size policies to SQL log files"""
+        files = entries = 0
+        if self.max_age_days:
+            cutoff = (now or datetime.utcnow()) - timedelta(days=self.max_age_days)
+            with Session(self.engine) as session:
+                expired = session.exec(
+                    select(LogFile.id).where(LogFile.upload_time < cutoff).order_by(LogFile.upload_time)
+                ).all()
+            for log_file_id in expired:
+                entries += self.purge_log_file(log_file_id)
+                files += 1
+
+        if self.max_database_mb:
+            limit = self.max_database_mb * 1024 * 1024
+            while True:
+                with Session(self.engine) as session:
+                    if database_bytes(session.connection()) <= limit:
+                        break
+                    oldest = session.exec(select(LogFile.id).order_by(LogFile.upload_time, LogFile.id).limit(1)).first()
+                if oldest is None:
+                    break
+                entries += self.purge_log_file(oldest)
+                files += 1
+        return {"files": files, "entries": entries}
+
+    def expire_uploads(self, log_manager, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Apply the age and size policies to files stored by ``log_manager``, then prune orphans"""
+        # Snapshot, since uploads add headers while this runs in the retention thread
+        headers = list(log_manager.log_files.items())
+        expired: List[str] = []
+        if self.max_age_days:
+            cutoff = (now or datetime.utcnow()) - timedelta(days=self.max_age_days)
+            expired = [file_id for file_id, header in headers if header.upload_time < cutoff]
+
+        if self.max_uploads_mb:
+            usage = log_manager.storage_usage()
+            expired_ids = set(expired)
+            remaining = sum(size for file_id, size in usage.items() if file_id not in expired_ids)
+            limit = self.max_uploads_mb * 1024 * 1024
+            by_age = sorted((header.upload_time, file_id) for file_id, header in headers if file_id not in expired_ids)
+            for _, file_id in by_age:
+                if remaining <= limit:
+                    break
+                expired.append(file_id)
+                remaining -= usage.get(file_id, 0)
+
+        deleted = log_manager.delete_files(expired) if expired else 0
+        if deleted:
+            log_manager.search_index.compact()
+        return {"files": deleted, "orphans": log_manager.prune_orphans(self.orphan_grace_seconds)}
+
+    def compact(self) -> Dict[str, int]:
+        """Drop zero-count rollups and unreferenced blobs, then return free pages to the OS
+
+        Free pages are released ``vacuum_pages`` at a time, one transaction
+        each. Databases created before auto_vacuum=INCREMENTAL was set keep
+        their free pages for reuse until a one-time full VACUUM.
+        """
+        with Session(self.engine) as session:
+            rollups = session.execute(delete(LogEntryRollup).where(LogEntryRollup.count == 0)).rowcount
+            blob_store.delete_unreferenced(session)
+            session.commit()
+
+        freed = 0
+        with self.engine.connect() as connection:
+            if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                logger.warning("SQLite auto_vacuum is not INCREMENTAL; run a full VACUUM once to enable compaction")
+                return {"rollups": rollups, "pages": 0}
+            connection.commit()
+            dbapi_connection = connection.connection.driver_connection
+            while True:
+                free_pages = dbapi_connection.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free_pages:
+                    break
+                # sqlite3's execute() steps a row-less pragma once, freeing a single
+                # page; executescript() runs it to completion in its own transaction
+                dbapi_connection.executescript(f"PRAGMA incremental_vacuum({min(free_pages, self.vacuum_pages)})")
+                freed += min(free_pages, self.vacuum_pages)
+        return {"rollups": rollups, "pages": freed}
+
+    def run(self, log_manager=None, now: Optional[datetime] = None) -> Dict:
+        """One retention pass over the database and, if given, ``log_manager``'s storage"""
+        start_time = time.time()
+        report = {"database": self.expire_database(now)}
+        if log_manager is not None:
+            report["uploads"] = self.expire_uploads(log_manager, now)
+        report["compaction"] = self.compact()
+        report["took_ms"] = round((time.time() - start_time) * 1000, 2)
+        self.last_report = report
+        logger.info(f"Retention pass: {report}")
+        return report
+
+    async def run_periodically(self, log_manager=None, interval_seconds: float = RETENTION_INTERVAL_SECONDS):
+        """Run a pass every ``interval_seconds`` in a worker thread until cancelled"""
+        while True:
+            try:
+                await asyncio.to_thread(self.run, log_manager)
+            except Exception as e:
+                logger.error(f"Retention pass failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+# Global instance
+retention_service = RetentionService()
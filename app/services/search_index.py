@@ -0,0 +1,256 @@
+"""
+On-disk inverted index for full-text search over parsed log entries
+"""
+import re
+import sqlite3
+from collections import Counter
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from app.models.log import LogEntry
+from app.core.logger import logger
+
+TOKEN_PATTERN = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH]
+
+@dataclass
+class SearchTerm:
+    """Single query term; multi-token and quoted terms are phrases"""
+    tokens: List[str]
+    phrase: Optional[str] = None
+
+    def matches(self, text: str) -> bool:
+        text = text.lower()
+        if self.phrase is not None:
+            return self.phrase in text
+        return set(self.tokens).issubset(tokenize(text))
+
+@dataclass
+class SearchQuery:
+    """Parsed boolean query: AND of OR-groups, minus excluded terms"""
+    groups: List[List[SearchTerm]] = field(default_factory=list)
+    excluded: List[SearchTerm] = field(default_factory=list)
+
+    def matches(self, text: str) -> bool:
+        return (all(any(term.matches(text) for term in group) for group in self.groups)
+                and not any(term.matches(text) for term in self.excluded))
+
+QUERY_PATTERN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+def parse_query(query: str) -> SearchQuery:
+    """Parse a search query
+
+    Whitespace-separated terms are ANDed, ``OR`` joins the neighbouring
+    terms, ``NOT term`` or ``-term`` excludes a term and ``"quoted text"``
+    (or any term spanning several tokens, such as ``req-42``) is matched
+    as a phrase.
+    """
+    parsed = SearchQuery()
+    join_next = False
+    negate_next = False
+
+    for match in QUERY_PATTERN.finditer(query):
+        negated, quoted, word = match.groups()
+        if word == 'OR':
+            join_next = bool(parsed.groups)
+            continue
+        if word == 'AND':
+            continue
+        if word == 'NOT':
+            negate_next = True
+            continue
+
+        if quoted is not None:
+            text = quoted
+        elif word.startswith('-') and len(word) > 1:
+            negated, text = '-', word[1:]
+        else:
+            text = word
+
+        tokens = tokenize(text)
+        if not tokens:
+            continue
+        is_phrase = quoted is not None or len(tokens) > 1
+        term = SearchTerm(tokens=tokens, phrase=text.lower() if is_phrase else None)
+
+        if negated or negate_next:
+            parsed.excluded.append(term)
+        elif join_next:
+            parsed.groups[-1].append(term)
+        else:
+            parsed.groups.append([term])
+        join_next = False
+        negate_next = False
+
+    if not parsed.groups:
+        raise ValueError("Query must contain at least one search term")
+    return parsed
+
+def _format_timestamp(timestamp: datetime) -> str:
+    return timestamp.isoformat(timespec='microseconds')
+
+class SearchIndex:
+    """Inverted index from tokens to log entries, stored in SQLite
+
+    Each indexed entry is a document holding its file ID, position in the
+    file and byte offset into the file's entries JSON Lines, so hits can be
+    loaded with a single seek. Postings map a token to the documents that
+    contain it; token_stats keeps document frequencies used to pick the
+    rarest token to drive a query.
+    """
+
+    def __init__(self, index_path: Path):
+        self.index_path = Path(index_path)
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS docs (
+                    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_id TEXT NOT NULL,
+                    entry_index INTEGER NOT NULL,
+                    byte_offset INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    level TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_docs_file ON docs (file_id);
+                CREATE TABLE IF NOT EXISTS postings (
+                    token TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    PRIMARY KEY (token, doc_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS token_stats (
+                    token TEXT PRIMARY KEY,
+                    doc_count INTEGER NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for one transaction, closed afterwards"""
+        with closing(sqlite3.connect(self.index_path, timeout=30)) as conn, conn:
+            yield conn
+
+    def has_file(self, file_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM docs WHERE file_id = ? LIMIT 1", (file_id,)).fetchone() is not None
+
+    def index_file(self, file_id: str, entries: Iterable[Tuple[LogEntry, int]]):
+        """Index (entry, byte offset) pairs of a file in a single transaction"""
+        doc_counts = Counter()
+        with self._connect() as conn:
+            docs = 0
+            for entry_index, (entry, byte_offset) in enumerate(entries):
+                cursor = conn.execute(
+                    "INSERT INTO docs (file_id, entry_index, byte_offset, timestamp, level) VALUES (?, ?, ?, ?, ?)",
+                    (file_id, entry_index, byte_offset, _format_timestamp(entry.timestamp), entry.level)
+                )
+                doc_id = cursor.lastrowid
+                tokens = set(tokenize(entry.message))
+                doc_counts.update(tokens)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO postings (token, doc_id) VALUES (?, ?)",
+                    ((token, doc_id) for token in tokens)
+                )
+                docs += 1
+            conn.executemany(
+                "INSERT INTO token_stats (token, doc_count) VALUES (?, ?) "
+                "ON CONFLICT (token) DO UPDATE SET doc_count = doc_count + excluded.doc_count",
+                doc_counts.items()
+            )
+        logger.info(f"Indexed {docs} entries of file {file_id} for search")
+
+    def remove_file(self, file_id: str):
+        """Remove a file's documents; their postings are dropped by compact()"""
+        self.remove_files([file_id])
+
+    def remove_files(self, file_ids: List[str]):
+        """Remove the documents of several files in one transaction"""
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM docs WHERE file_id = ?", ((file_id,) for file_id in file_ids))
+
+    def compact(self):
+        """Drop postings of removed documents and recount token frequencies"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM postings WHERE doc_id NOT IN (SELECT doc_id FROM docs)")
+            conn.execute("DELETE FROM token_stats")
+            conn.execute("INSERT INTO token_stats SELECT token, COUNT(*) FROM postings GROUP BY token")
+
+    def search(self, query: str, load_entry: Callable[[str, int], LogEntry],
+               level: Optional[str] = None, since: Optional[datetime] = None,
+               until: Optional[datetime] = None, file_id: Optional[str] = None,
+               limit: int = 50, offset: int = 0) -> List[Tuple[str, int, LogEntry]]:
+        """Search indexed entries, most recently indexed first
+
+        Every term is looked up by its rarest token. The query walks the
+        postings of the rarest group in descending document order and probes
+        the other groups by primary key, so it stops as soon as ``limit``
+        hits are found. Phrases and multi-token terms are then verified
+        against the entry loaded with ``load_entry(file_id, byte_offset)``.
+        Returns (file_id, entry_index, entry) tuples.
+        """
+        parsed = parse_query(query)
+
+        with self._connect() as conn:
+            all_tokens = {token for group in parsed.groups for term in group for token in term.tokens}
+            placeholders = ", ".join("?" for _ in all_tokens)
+            doc_counts = dict(conn.execute(
+                f"SELECT token, doc_count FROM token_stats WHERE token IN ({placeholders})", list(all_tokens)
+            ))
+
+            def rarest(term: SearchTerm) -> str:
+                return min(term.tokens, key=lambda token: doc_counts.get(token, 0))
+
+            group_tokens = [sorted({rarest(term) for term in group}) for group in parsed.groups]
+            group_tokens.sort(key=lambda tokens: sum(doc_counts.get(token, 0) for token in tokens))
+            driving, others = group_tokens[0], group_tokens[1:]
+
+            sql = ("SELECT p.doc_id, d.file_id, d.entry_index, d.byte_offset FROM postings p "
+                   "JOIN docs d ON d.doc_id = p.doc_id "
+                   f"WHERE p.token IN ({', '.join('?' for _ in driving)})")
+            params = list(driving)
+            for tokens in others:
+                sql += (" AND EXISTS (SELECT 1 FROM postings o WHERE o.doc_id = p.doc_id "
+                        f"AND o.token IN ({', '.join('?' for _ in tokens)}))")
+                params.extend(tokens)
+            for term in parsed.excluded:
+                # Excluded phrases are only checked during verification
+                if term.phrase is None:
+                    sql += " AND NOT EXISTS (SELECT 1 FROM postings o WHERE o.doc_id = p.doc_id AND o.token = ?)"
+                    params.append(term.tokens[0])
+            if level:
+                sql += " AND d.level = ?"
+                params.append(level.upper())
+            if since:
+                sql += " AND d.timestamp >= ?"
+                params.append(_format_timestamp(since))
+            if until:
+                sql += " AND d.timestamp < ?"
+                params.append(_format_timestamp(until))
+            if file_id:
+                sql += " AND d.file_id = ?"
+                params.append(file_id)
+            sql += " ORDER BY p.doc_id DESC"
+
+            results = []
+            seen = set()
+            skipped = 0
+            for doc_id, hit_file_id, entry_index, byte_offset in conn.execute(sql, params):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                entry = load_entry(hit_file_id, byte_offset)
+                if not parsed.matches(entry.message):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                results.append((hit_file_id, entry_index, entry))
+                if len(results) >= limit:
+                    break
+        return results
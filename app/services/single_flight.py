@@ -0,0 +1,99 @@
+"""
+Coalescing of identical in-flight calls (single-flight)
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from app.services.metrics_service import metrics_service
+
+class SingleFlight:
+    """Runs at most one call per key at a time
+
+    The first caller for a key executes the function; callers arriving
+    while it runs wait for and share its result (or exception) instead of
+    repeating the work. ``do`` coalesces threads, ``do_async`` coroutines
+    on the same event loop. If an async leader is cancelled (its client went
+    away), a waiting follower takes over the call instead of failing too.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_async: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` for ``key`` unless already running; returns (result, shared)"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            metrics_service.record_coalesced_call(self.name)
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result(), False
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await ``fn()`` for ``key`` unless already running; returns (result, shared)"""
+        joined = False
+        while True:
+            future = self._in_flight_async.get(key)
+            if future is None:
+                break
+            if not joined:
+                joined = True
+                self.coalesced += 1
+                metrics_service.record_coalesced_call(self.name)
+            try:
+                # Shield so a cancelled follower does not cancel the shared call
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: run the call again, the first follower leading
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight_async[key] = future
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody waited for is not reported
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._in_flight_async[key]
+
+    def get_statistics(self) -> Dict:
+        """Get executed and coalesced call counters"""
+        with self._lock:
+            in_flight = len(self._in_flight) + len(self._in_flight_async)
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": in_flight}
+
+# Global single-flight group for LLM analyses
+analysis_flight = SingleFlight("analysis")
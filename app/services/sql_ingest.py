@@ -0,0 +1,72 @@
+"""
+Bulk insertion of parsed log entries into the SQL database
+"""
+import json
+import os
+from itertools import islice
+from typing import Iterable, Iterator, List
+from dotenv import load_dotenv
+from sqlalchemy import func, insert, select
+from sqlmodel import Session
+from app.models.log import LogEntry as ParsedLogEntry
+from app.models.log_sql import LogEntry, sync_logentry_fts, sync_logentry_rollups
+from app.core.logger import logger
+
+load_dotenv()
+
+BULK_INSERT_BATCH_SIZE = int(os.getenv("SQL_BULK_BATCH_SIZE", "5000"))
+
+_encode_metadata = json.JSONEncoder(separators=(',', ':'), default=str).encode
+
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def entry_rows(log_file_id: int, entries: Iterable[ParsedLogEntry]) -> Iterator[dict]:
+    """Plain column dicts for parsed entries, ready for a core INSERT"""
+    for entry in entries:
+        yield {
+            "log_file_id": log_file_id,
+            "timestamp": entry.timestamp,
+            "level": entry.level,
+            "message": entry.message,
+            "source": entry.source,
+            "log_metadata": _encode_metadata(entry.metadata) if entry.metadata is not None else None
+        }
+
+def bulk_insert_entries(session: Session, log_file_id: int, entries: Iterable[ParsedLogEntry],
+                        batch_size: int = None) -> int:
+    """Insert parsed entries with executemany batches in the session's transaction
+
+    Rows go through a core INSERT on the session's connection, bypassing
+    ORM objects and the identity map. Nothing is committed here, so the
+    caller decides the transaction boundary. The new rows are added to the
+    full-text index and the rollups with set-based statements at the end.
+    Returns the number of rows.
+    """
+    return bulk_insert_rows(session, log_file_id, entry_rows(log_file_id, entries), batch_size)
+
+def bulk_insert_rows(session: Session, log_file_id: int, rows: Iterable[dict], batch_size: int = None) -> int:
+    """``bulk_insert_entries`` for rows already shaped like ``entry_rows`` output
+
+    Every row must belong to ``log_file_id``.
+    """
+    batch_size = batch_size or BULK_INSERT_BATCH_SIZE
+    connection = session.connection()
+    statement = insert(LogEntry.__table__)
+    # Ids are assigned in increasing order, so this file's entries above the
+    # current maximum are exactly the rows inserted below
+    last_id = connection.execute(select(func.coalesce(func.max(LogEntry.id), 0))).scalar()
+    count = 0
+    for batch in _batches(rows, batch_size):
+        connection.execute(statement, batch)
+        count += len(batch)
+    if count:
+        sync_logentry_fts(connection, log_file_id, last_id)
+        sync_logentry_rollups(connection, log_file_id, last_id)
+    logger.debug(f"Bulk inserted {count} log entries for log file {log_file_id}")
+    return count
@@ -0,0 +1,92 @@
+"""
+Online log template mining (Drain)
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from app.models.log import LogTemplate
+
+WILDCARD = '<*>'
+
+@dataclass
+class TemplateCluster:
+    """Group of log messages sharing one template"""
+    id: int
+    tokens: List[str]
+    count: int = 0
+
+    @property
+    def template(self) -> str:
+        return ' '.join(self.tokens)
+
+class TemplateMiner:
+    """Drain parse tree assigning a template to every log message
+
+    Messages are routed by token count and then by their first
+    ``depth - 2`` tokens (tokens containing digits go to the wildcard
+    branch) to a leaf holding candidate clusters. A message joins the most
+    similar cluster if at least ``similarity_threshold`` of the template's
+    constant tokens match, generalising differing positions to ``<*>``;
+    otherwise it starts a new cluster. Cluster IDs never change, so they can
+    be stored with the entries.
+    """
+
+    def __init__(self, depth: int = 4, similarity_threshold: float = 0.4, max_children: int = 100):
+        self.depth = depth
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.root: Dict[int, dict] = {}
+        self.clusters: List[TemplateCluster] = []
+
+    def add(self, message: str) -> Tuple[int, List[str]]:
+        """Assign a message to a template, returning its ID and parameters"""
+        # Stack traces and other continuation lines do not shape the template
+        tokens = message.split('\n', 1)[0].split()
+        leaf = self._leaf_for(tokens)
+
+        cluster = self._best_match(leaf, tokens)
+        if cluster is None:
+            cluster = TemplateCluster(id=len(self.clusters), tokens=list(tokens))
+            self.clusters.append(cluster)
+            leaf.append(cluster)
+        else:
+            cluster.tokens = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(cluster.tokens, tokens)
+            ]
+        cluster.count += 1
+
+        params = [token for template_token, token in zip(cluster.tokens, tokens) if template_token == WILDCARD]
+        return cluster.id, params
+
+    def templates(self) -> List[LogTemplate]:
+        """Mined templates, most frequent first"""
+        return [
+            LogTemplate(id=cluster.id, template=cluster.template, count=cluster.count)
+            for cluster in sorted(self.clusters, key=lambda cluster: cluster.count, reverse=True)
+        ]
+
+    def _leaf_for(self, tokens: List[str]) -> list:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:max(self.depth - 2, 0)]:
+            key = WILDCARD if any(char.isdigit() for char in token) else token
+            if key not in node:
+                if len(node) >= self.max_children:
+                    key = WILDCARD
+                node = node.setdefault(key, {})
+            else:
+                node = node[key]
+        return node.setdefault(None, [])
+
+    def _best_match(self, leaf: List[TemplateCluster], tokens: List[str]):
+        best, best_similarity = None, -1.0
+        for cluster in leaf:
+            matching = sum(
+                1 for template_token, token in zip(cluster.tokens, tokens)
+                if template_token != WILDCARD and template_token == token
+            )
+            similarity = matching / len(tokens) if tokens else 1.0
+            if similarity > best_similarity:
+                best, best_similarity = cluster, similarity
+        if best is not None and best_similarity >= self.similarity_threshold:
+            return best
+        return None
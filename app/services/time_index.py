@@ -0,0 +1,90 @@
+"""
+Sparse timestamp index over a stored entries file
+"""
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from app.models.log import LogEntry
+
+BLOCK_SIZE = 256
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to naive UTC, the form stored timestamps are compared in"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+@dataclass
+class TimeIndexPoint:
+    """Start of a block of BLOCK_SIZE entries"""
+    entry_index: int
+    byte_offset: int
+    max_before: datetime  # latest timestamp in this and all earlier blocks
+    min_after: datetime  # earliest timestamp in this and all later blocks
+
+class TimeIndex:
+    """Maps time to entry offsets with one point per block of entries
+
+    Both bounds are monotonic even when entries are slightly out of order,
+    so a range can be located with a binary search: reading starts at the
+    first block that may hold an entry at or after ``since`` and stops at
+    the first block whose entries are all at or after ``until``.
+    """
+
+    def __init__(self, points: List[TimeIndexPoint]):
+        self.points = points
+        self._max_before = [point.max_before for point in points]
+        self._min_after = [point.min_after for point in points]
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[LogEntry, int]]) -> "TimeIndex":
+        """Build the index from (entry, byte offset) pairs in file order"""
+        blocks = []
+        for entry_index, (entry, byte_offset) in enumerate(entries):
+            if entry_index % BLOCK_SIZE == 0:
+                blocks.append([entry_index, byte_offset, entry.timestamp, entry.timestamp])
+            else:
+                block = blocks[-1]
+                block[2] = min(block[2], entry.timestamp)
+                block[3] = max(block[3], entry.timestamp)
+
+        points = []
+        running_max = None
+        for entry_index, byte_offset, _, block_max in blocks:
+            running_max = block_max if running_max is None else max(running_max, block_max)
+            points.append(TimeIndexPoint(entry_index, byte_offset, running_max, running_max))
+        running_min = None
+        for point, (_, _, block_min, _) in zip(reversed(points), reversed(blocks)):
+            running_min = block_min if running_min is None else min(running_min, block_min)
+            point.min_after = running_min
+        return cls(points)
+
+    def locate(self, since: Optional[datetime]) -> Optional[TimeIndexPoint]:
+        """First block that may contain an entry at or after ``since``"""
+        if not self.points:
+            return None
+        if since is None:
+            return self.points[0]
+        position = bisect_left(self._max_before, since)
+        return self.points[position] if position < len(self.points) else None
+
+    def stop_offset(self, until: Optional[datetime]) -> Optional[int]:
+        """Byte offset from which no entry is before ``until``, if any"""
+        if until is None:
+            return None
+        position = bisect_left(self._min_after, until)
+        return self.points[position].byte_offset if position < len(self.points) else None
+
+    def to_json(self) -> list:
+        return [
+            [point.entry_index, point.byte_offset, point.max_before.isoformat(), point.min_after.isoformat()]
+            for point in self.points
+        ]
+
+    @classmethod
+    def from_json(cls, data: list) -> "TimeIndex":
+        return cls([
+            TimeIndexPoint(entry_index, byte_offset, datetime.fromisoformat(max_before), datetime.fromisoformat(min_after))
+            for entry_index, byte_offset, max_before, min_after in data
+        ])
@@ -3,6 +3,7 @@ FAISS vector search service for finding similar incidents
 """
 import json
 import pickle
+import time
 import numpy as np
 import faiss
 from datetime import datetime
@@ -12,6 +13,7 @@ from dataclasses import dataclass, asdict
 from app.services.embedding_service import EmbeddingService
 from app.services.metrics_service import metrics_service
 from app.core.logger import logger
+from app.core.timing import span
 
 @dataclass
 class IncidentRecord:
@@ -76,11 +78,12 @@ class VectorSearchService:
             # Add to incidents list
             self.incidents.append(incident)
             
-            # Rebuild index
-            self._build_index()
-            
-            # Save to disk
-            self._save_data()
+            with span("vector_index"):
+                # Rebuild index
+                self._build_index()
+                
+                # Save to disk
+                self._save_data()
             
             logger.info(f"Added incident {incident.id} to vector database")
             return incident.id
@@ -110,39 +113,47 @@ class VectorSearchService:
             # Generate embedding for query
             query_embedding = self.embedding_service.generate_single_embedding(query_log)
             
-            # Search using FAISS
-            if self.index is not None and self.is_index_built:
-                # Use FAISS for fast search
-                query_embedding_reshaped = query_embedding.reshape(1, -1).astype('float32')
-                distances, indices = self.index.search(query_embedding_reshaped, min(top_k, len(self.incidents)))
-                
-                results = []
-                for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-                    if idx < len(self.incidents):
-                        incident = self.incidents[idx]
-                        # Convert distance to similarity (FAISS returns L2 distance)
-                        similarity = 1.0 / (1.0 + distance)
-                        
-                        if similarity >= similarity_threshold:
-                            results.append({
-                                'incident_id': incident.id,
-                                'similarity_score': float(similarity),
-                                'timestamp': incident.timestamp.isoformat(),
-                                'log_content': incident.log_content[:200] + "..." if len(incident.log_content) > 200 else incident.log_content,
-                                'analysis': incident.analysis,
-                                'severity': incident.severity,
-                                'category': incident.category,
-                                'source_file': incident.source_file
-                            })
+            start_time = time.perf_counter()
+            with span("vector_search"):
+                # Search using FAISS
+                if self.index is not None and self.is_index_built:
+                    # Use FAISS for fast search
+                    query_type = "faiss"
+                    query_embedding_reshaped = query_embedding.reshape(1, -1).astype('float32')
+                    distances, indices = self.index.search(query_embedding_reshaped, min(top_k, len(self.incidents)))
+                    
+                    results = []
+                    for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
+                        if idx < len(self.incidents):
+                            incident = self.incidents[idx]
+                            # Convert distance to similarity (FAISS returns L2 distance)
+                            similarity = 1.0 / (1.0 + distance)
+                            
+                            if similarity >= similarity_threshold:
+                                results.append({
+                                    'incident_id': incident.id,
+                                    'similarity_score': float(similarity),
+                                    'timestamp': incident.timestamp.isoformat(),
+                                    'log_content': incident.log_content[:200] + "..." if len(incident.log_content) > 200 else incident.log_content,
+                                    'analysis': incident.analysis,
+                                    'severity': incident.severity,
+                                    'category': incident.category,
+                                    'source_file': incident.source_file
+                                })
+                    
+                    # Sort by similarity score (descending)
+                    results.sort(key=lambda x: x['similarity_score'], reverse=True)
+                    results = results[:top_k]
                 
-                # Sort by similarity score (descending)
-                results.sort(key=lambda x: x['similarity_score'], reverse=True)
-                return results[:top_k]
-            
-            else:
-                # Fallback to brute force search
-                logger.warning("FAISS index not available, using brute force search")
-                return self._brute_force_search(query_embedding, top_k, similarity_threshold)
+                else:
+                    # Fallback to brute force search
+                    logger.warning("FAISS index not available, using brute force search")
+                    query_type = "brute_force"
+                    results = self._brute_force_search(query_embedding, top_k, similarity_threshold)
+            
+            metrics_service.record_vector_search(query_type, len(results), time.perf_counter() - start_time,
+                                                 [result['similarity_score'] for result in results])
+            return results
                 
         except Exception as e:
             logger.error(f"Error searching similar incidents: {str(e)}")
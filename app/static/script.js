@@ -10,6 +10,11 @@ let currentSortField = 'timestamp';
 let currentSortDirection = 'desc';
 let selectedEntries = new Set();
 
+// Log entries are fetched a page at a time, newest first; the cursor of the
+// next page is kept until the table pages past the loaded entries
+const LOG_ENTRIES_PAGE_SIZE = 200;
+let logEntriesCursor = null;
+
 // Utility functions
 function showLoading() {
 	document.getElementById('loading-overlay').classList.remove('hidden');
@@ -118,6 +123,55 @@ async function refreshAllData() {
 	}
 }
 
+// Fetch one page of log entries after a keyset pagination cursor
+async function fetchLogEntriesPage(cursor = null) {
+	const params = new URLSearchParams({
+		limit: String(LOG_ENTRIES_PAGE_SIZE),
+		order: 'desc',
+	});
+	if (cursor) params.set('cursor', cursor);
+	const response = await fetch(`${API_BASE}/log_entries_sql?${params}`);
+	if (!response.ok) {
+		throw new Error(
+			`Failed to fetch log_entries_sql: ${response.status} ${response.statusText}`
+		);
+	}
+	return response.json();
+}
+
+// Append the next page of entries from the server, keeping the source filter selection
+async function loadMoreLogEntries() {
+	const page = await fetchLogEntriesPage(logEntriesCursor);
+	window.allLogEntries.push(...page.entries);
+	logEntriesCursor = page.next_cursor;
+
+	const sourceFilter = document.getElementById('source-filter');
+	const selectedSource = sourceFilter.value;
+	populateSourceFilter(window.allLogEntries);
+	sourceFilter.value = selectedSource;
+}
+
+// Move through the table, fetching more entries once the loaded ones run out
+async function changePage(delta) {
+	const page = window.currentPage + delta;
+	if (page < 1) return;
+
+	let entries = getCurrentFilteredEntries();
+	try {
+		while (entries.length < page * window.entriesPerPage && logEntriesCursor) {
+			await loadMoreLogEntries();
+			entries = getCurrentFilteredEntries();
+		}
+	} catch (error) {
+		console.error('Error loading more log entries:', error);
+		showNotification('Failed to load more log entries', 'error');
+	}
+	if ((page - 1) * window.entriesPerPage >= entries.length) return;
+
+	window.currentPage = page;
+	displayLogEntries(entries);
+}
+
 // Load dashboard data
 async function loadDashboard() {
 	try {
@@ -129,37 +183,36 @@ async function loadDashboard() {
 				`Failed to fetch logs_sql: ${logsResponse.status} ${logsResponse.statusText}`
 			);
 		}
-		const logs = await logsResponse.json();
+		const logsPage = await logsResponse.json();
+		const logs = logsPage.files;
 		console.log('logs', logs);
 
-		// Load log entries from SQL database
-		const entriesResponse = await fetch(`${API_BASE}/log_entries_sql`);
-		console.log('entriesResponse', entriesResponse);
-		if (!entriesResponse.ok) {
-			throw new Error(
-				`Failed to fetch log_entries_sql: ${entriesResponse.status} ${entriesResponse.statusText}`
-			);
+		// Entry counts come from the pre-aggregated rollups, not the raw entries
+		const [levelsResponse, sourcesResponse] = await Promise.all([
+			fetch(`${API_BASE}/stats/levels?include_series=false`),
+			fetch(`${API_BASE}/stats/sources?include_series=false`),
+		]);
+		if (!levelsResponse.ok || !sourcesResponse.ok) {
+			throw new Error('Failed to fetch entry statistics');
 		}
-		const entries = await entriesResponse.json();
-		console.log('entries', entries);
+		const levelTotals = (await levelsResponse.json()).totals;
+		const sourceTotals = (await sourcesResponse.json()).totals;
 
 		// Calculate statistics from database
-		const totalLogs = logs.length || 0;
-		const totalEntries = entries.length || 0;
-		const errorEntries =
-			entries.filter((entry) => entry.level === 'ERROR').length || 0;
-		const warnEntries =
-			entries.filter((entry) => entry.level === 'WARN').length || 0;
-		const criticalEntries =
-			entries.filter((entry) => entry.level === 'CRITICAL').length || 0;
+		const totalLogs = logsPage.total_count || 0;
+		const totalEntries = Object.values(levelTotals).reduce(
+			(sum, count) => sum + count,
+			0
+		);
+		const criticalEntries = levelTotals.CRITICAL || 0;
 
 		// Update stats cards with real database data
 		document.getElementById('total-logs').textContent = totalLogs;
 		document.getElementById('total-incidents').textContent = totalEntries;
 		document.getElementById('critical-incidents').textContent = criticalEntries;
-		document.getElementById('total-categories').textContent = new Set(
-			entries.map((entry) => entry.source).filter(Boolean)
-		).size;
+		document.getElementById('total-categories').textContent = Object.keys(
+			sourceTotals
+		).filter(Boolean).length;
 
 		// Update files list with SQL data
 		updateFilesList(logs);
@@ -378,10 +431,14 @@ async function analyzeFile(logId) {
 		}
 		const logFile = await logResponse.json();
 
+		// Raw content is served separately from the file record
+		const contentResponse = await fetch(`${API_BASE}/logs_sql/${logId}/content`);
+		const content = contentResponse.ok ? await contentResponse.text() : '';
+
 		// Use full raw log content for analysis
-		const analysisPrompt = `You are an expert DevOps engineer. Analyze the following log file and stack trace. Identify the root cause, point to the exact line or function if possible, and propose a concrete solution. If the error is related to a known library or framework, suggest a fix or workaround.\n\nLog file content:\n${logFile.content}`;
+		const analysisPrompt = `You are an expert DevOps engineer. Analyze the following log file and stack trace. Identify the root cause, point to the exact line or function if possible, and propose a concrete solution. If the error is related to a known library or framework, suggest a fix or workaround.\n\nLog file content:\n${content}`;
 
-		if (!logFile.content || !logFile.content.trim()) {
+		if (!content.trim()) {
 			showNotification('No log content to analyze for this file.', 'warning');
 			hideLoading();
 			return;
@@ -408,18 +465,10 @@ async function analyzeFile(logId) {
 			headers: {
 				'Content-Type': 'application/json',
 			},
+			// Partial update: the stored content is left as is
 			body: JSON.stringify({
-				id: logFile.id,
-				filename: logFile.filename,
-				size: logFile.size,
-				upload_time:
-					typeof logFile.upload_time === 'string'
-						? logFile.upload_time
-						: new Date(logFile.upload_time).toISOString(),
-				log_count: logFile.log_count,
 				log_analysis_status: 'completed',
 				analysis_result: analysisResult.analysis,
-				content: logFile.content || null,
 			}),
 		});
 
@@ -574,8 +623,10 @@ function formatFileSize(bytes) {
 // Load log entries and display in table
 async function loadLogEntries() {
 	try {
-		const response = await fetch(`${API_BASE}/log_entries_sql`);
-		const entries = await response.json();
+		// Only the first page; changePage fetches more on demand
+		const page = await fetchLogEntriesPage();
+		const entries = page.entries;
+		logEntriesCursor = page.next_cursor;
 
 		// Store entries globally for filtering
 		window.allLogEntries = entries;
@@ -626,14 +677,18 @@ function displayLogEntries(entries) {
 		endIndex,
 		entries.length
 	);
-	document.getElementById('entries-total').textContent = entries.length;
+	// "+" while more entries are left on the server
+	document.getElementById('entries-total').textContent = `${entries.length}${
+		logEntriesCursor ? '+' : ''
+	}`;
 	document.getElementById(
 		'current-page'
 	).textContent = `Page ${window.currentPage}`;
 
 	// Update pagination buttons
 	document.getElementById('prev-page').disabled = window.currentPage <= 1;
-	document.getElementById('next-page').disabled = endIndex >= entries.length;
+	document.getElementById('next-page').disabled =
+		endIndex >= entries.length && !logEntriesCursor;
 
 	// Update filter summary
 	updateFilterSummary(entries);
@@ -0,0 +1,7 @@
+import pytest
+from app.services.analysis_cache import analysis_cache
+
+@pytest.fixture(autouse=True)
+def disable_analysis_cache(monkeypatch):
+    """Keep analyses from leaking between tests through the persistent cache"""
+    monkeypatch.setattr(analysis_cache, "enabled", False)
@@ -0,0 +1,81 @@
+from app.services.analysis_cache import AnalysisCache, cache_key
+
+def _counting_analyzer(cache):
+    calls = []
+
+    @cache.cached(model="test-model", prompt_version="1")
+    def analyze(log_text):
+        calls.append(log_text)
+        return f"analysis #{len(calls)}"
+
+    return analyze, calls
+
+def test_logs_differing_only_in_timestamps_and_ids_share_a_key():
+    first = cache_key("2024-07-05T10:00:00Z ERROR request 8f14e45f-ceea-467f-a0e6-1f2a3b4c5d6e failed", "m", "1")
+    second = cache_key("2024-07-06 11:30:15 ERROR request 1c9ac015-9c65-4bd9-9f3b-52fd0c6a2b1e failed", "m", "1")
+    assert first == second
+    assert first != cache_key("2024-07-05T10:00:00Z ERROR request failed", "m", "1")
+    assert first != cache_key("2024-07-05T10:00:00Z ERROR request 8f14e45f-ceea-467f-a0e6-1f2a3b4c5d6e failed", "m", "2")
+
+def test_logs_differing_in_ports_or_error_codes_do_not_share_a_key():
+    assert cache_key("ERROR connection to db:5432 refused", "m", "1") != cache_key("ERROR connection to db:3306 refused", "m", "1")
+    assert cache_key("ERROR code 1045 access denied", "m", "1") != cache_key("ERROR code 2003 access denied", "m", "1")
+    assert cache_key("ERROR user_id=1045 denied", "m", "1") == cache_key("ERROR user_id=2003 denied", "m", "1")
+    assert cache_key("ERROR order 123456789 failed", "m", "1") == cache_key("ERROR order 987654321 failed", "m", "1")
+
+def test_repeated_analysis_is_served_from_cache(tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"))
+    analyze, calls = _counting_analyzer(cache)
+
+    assert analyze("ERROR at 2024-07-05T10:00:00Z") == "analysis #1"
+    assert analyze("ERROR at 2024-07-06T12:00:00Z") == "analysis #1"
+    assert len(calls) == 1
+    assert cache.get_statistics()["hits"] == 1
+    assert cache.get_statistics()["misses"] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"), max_entries=2)
+    analyze, calls = _counting_analyzer(cache)
+
+    analyze("first")
+    analyze("second")
+    analyze("first")
+    analyze("third")
+    analyze("first")
+    analyze("second")
+    assert calls == ["first", "second", "third", "second"]
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"), ttl_seconds=1)
+    cache.ttl_seconds = 0
+    analyze, calls = _counting_analyzer(cache)
+
+    analyze("log")
+    analyze("log")
+    assert len(calls) == 2
+
+def test_concurrent_identical_requests_share_one_call(tmp_path):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"))
+    cache.enabled = False
+    release = threading.Event()
+    calls = []
+
+    @cache.cached(model="test-model", prompt_version="1")
+    def analyze(log_text):
+        calls.append(log_text)
+        release.wait(5)
+        return "shared analysis"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(analyze, f"ERROR at 2024-07-05T10:00:0{i}Z") for i in range(4)]
+        while len(calls) < 1:
+            pass
+        threading.Timer(0.2, release.set).start()
+        results = [future.result() for future in futures]
+
+    assert results == ["shared analysis"] * 4
+    assert len(calls) == 1
+    assert cache.get_statistics()["single_flight"]["in_flight"] == 0
@@ -18,3 +18,56 @@ def test_analyze_empty_log():
     response = client.post("/analyze", json={"log": "   "})
     assert response.status_code == 400
     assert response.json()["detail"] == "Log cannot be empty."
+
+def _events(response):
+    """Parse an SSE body into (event, data) pairs"""
+    import json
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_analyze_stream_relays_tokens(monkeypatch):
+    from app.api import analyze
+    from app.services import mock_gpt_service
+
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_TOKEN_DELAY", 0)
+    monkeypatch.setattr(analyze, "stream_analysis", mock_gpt_service.stream_analysis)
+
+    response = client.post("/analyze/stream", json={"log": "Database connection failed at 10:23"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(response)
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens).startswith("🔍 **Database Error Analysis:**")
+    assert events[-1][0] == "done"
+    assert events[-1][1]["time_to_first_token_ms"] is not None
+
+def test_log_file_stream_persists_analysis(tmp_path, monkeypatch):
+    from app.api import logs
+    from app.services import mock_gpt_service
+    from app.services.log_manager import LogManager
+
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_TOKEN_DELAY", 0)
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    added = []
+    monkeypatch.setattr(manager, "_add_to_vector_db", lambda *args: added.append(args))
+    monkeypatch.setattr(logs, "log_manager", manager)
+    log_path = tmp_path / "app.log"
+    log_path.write_text("2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed\n")
+    log_file = manager.upload_file(log_path, "app.log")
+
+    response = client.post(f"/logs/{log_file.id}/analyze/stream")
+    events = _events(response)
+    streamed = "".join(data["text"] for event, data in events if event == "token")
+
+    assert events[-1][0] == "done"
+    assert manager.get_file(log_file.id).analysis_result == streamed
+    assert manager.get_file(log_file.id).log_analysis_status == "completed"
+    assert len(added) == 1
+    assert client.post("/logs/missing/analyze/stream").status_code == 404
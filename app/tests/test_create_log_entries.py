@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Session, select, func
+from app.api.logs_sql import parse_entries, store_log_file
+from app.db import create_sqlite_engine
+from app.models.log_sql import LogEntry, LogFile, LogFileCreate
+from app.services.blob_store import blob_store
+from create_log_entries import LogEntryBackfill, create_log_entries
+
+SAMPLE_LOG = """2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed
+Traceback (most recent call last):
+  File "db.py", line 42, in connect_db
+2024-07-05 16:12:35 [WARN] database:connect_db:42 - Retrying connection...
+2024-07-05 16:12:36 [INFO] api:handler:10 - Request served
+"""
+
+def _setup(tmp_path):
+    url = f"sqlite:///{tmp_path / 'logs.db'}"
+    engine = create_sqlite_engine(url, echo=False)
+    SQLModel.metadata.create_all(engine)
+    return url, engine
+
+def _add_file(session, filename, content, parse=False):
+    log_file_create = LogFileCreate(filename=filename, size=len(content), upload_time=datetime(2024, 7, 5),
+                                    content=content)
+    log_file = store_log_file(session, log_file_create, parse_entries(log_file_create) if parse else [])
+    session.commit()
+    return log_file.id
+
+def _entries(engine, log_file_id):
+    with Session(engine) as session:
+        return session.exec(
+            select(LogEntry.message).where(LogEntry.log_file_id == log_file_id).order_by(LogEntry.id)
+        ).all()
+
+def test_backfill_parses_each_file_once(tmp_path):
+    url, engine = _setup(tmp_path)
+    with Session(engine) as session:
+        backfilled = _add_file(session, "app.log", SAMPLE_LOG)
+        uploaded = _add_file(session, "uploaded.log", SAMPLE_LOG, parse=True)
+
+    totals = create_log_entries(url, db_engine=engine)
+    assert totals["parsed"] == 1 and totals["recorded"] == 1 and totals["entries"] == 3
+    # Continuation lines belong to the entry they follow, as on upload
+    assert _entries(engine, backfilled) == _entries(engine, uploaded)
+    assert _entries(engine, backfilled)[0].endswith('line 42, in connect_db')
+
+    totals = create_log_entries(url, db_engine=engine)
+    assert totals["parsed"] == 0 and totals["skipped"] == 2
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(LogEntry)).one() == 6
+        assert session.get(LogFile, backfilled).log_count == 3
+
+def test_backfill_replaces_entries_of_changed_content(tmp_path):
+    url, engine = _setup(tmp_path)
+    with Session(engine) as session:
+        log_file_id = _add_file(session, "app.log", SAMPLE_LOG)
+    create_log_entries(url, db_engine=engine)
+
+    with Session(engine) as session:
+        log_file = session.get(LogFile, log_file_id)
+        log_file.content_digest = blob_store.put(session, b"2024-07-06 08:00:00 [INFO] api:handler:1 - Restarted\n")
+        session.commit()
+
+    totals = create_log_entries(url, db_engine=engine)
+    assert totals["parsed"] == 1
+    assert _entries(engine, log_file_id) == ["Restarted"]
+    with Session(engine) as session:
+        assert session.get(LogEntryBackfill, log_file_id).entry_count == 1
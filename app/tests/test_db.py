@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+import anyio
+import httpx
+import pytest
+from sqlmodel import SQLModel, Session
+from app import db
+from app.api.logs_sql import parse_entries, store_log_file
+from app.main import app
+from app.services.blob_store import blob_store
+from app.models.log_sql import LogFileCreate
+
+SAMPLE_LOG = "".join(
+    f"2024-07-05 16:{index // 60:02d}:{index % 60:02d} [INFO] api:handler:10 - Request {index} served\n"
+    for index in range(300)
+)
+
+@pytest.fixture
+def small_read_pool(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'logs.db'}"
+    monkeypatch.setattr(db, "SQLITE_POOL_TIMEOUT", 5)
+    # Several chunks per content stream
+    monkeypatch.setattr(blob_store, "chunk_size", 256)
+    engine = db.create_sqlite_engine(url, echo=False)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        log_file_create = LogFileCreate(filename="app.log", size=len(SAMPLE_LOG), upload_time=datetime(2024, 7, 5),
+                                        content=SAMPLE_LOG)
+        log_file = store_log_file(session, log_file_create, parse_entries(log_file_create))
+        session.commit()
+        log_file_id = log_file.id
+    monkeypatch.setattr(db, "read_engine", db.create_sqlite_engine(url, pool_size=2, read_only=True, echo=False))
+    return log_file_id
+
+def _fan_out(path, params=None):
+    async def fan_out():
+        # Far more requests than threads, and more threads than pooled connections
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 4
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(path, params=params) for _ in range(50)))
+
+    return asyncio.run(asyncio.wait_for(fan_out(), 20))
+
+def test_sync_reads_beyond_the_pool_size_do_not_deadlock(small_read_pool):
+    responses = _fan_out("/log_entries_sql", {"limit": 1000})
+    assert [(response.status_code, len(response.json()["entries"])) for response in responses] == [(200, 300)] * 50
+
+def test_content_streams_beyond_the_pool_size_do_not_deadlock(small_read_pool):
+    responses = _fan_out(f"/logs_sql/{small_read_pool}/content")
+    assert [(response.status_code, response.text) for response in responses] == [(200, SAMPLE_LOG)] * 50
@@ -0,0 +1,109 @@
+import json
+from app.services.log_manager import LogManager
+
+SAMPLE_LOG = """2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed: timeout after 30s
+2024-07-05 16:12:35 [WARN] database:connect_db:42 - Retrying connection...
+2024-07-05 16:12:36 [INFO] api:handler:10 - Request served
+"""
+
+def _upload(manager, tmp_path):
+    log_path = tmp_path / "app.log"
+    log_path.write_text(SAMPLE_LOG)
+    return manager.upload_file(log_path, "app.log")
+
+def test_metadata_header_is_stored_without_entries(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload(manager, tmp_path)
+
+    header = json.loads(manager._metadata_path(log_file.id).read_text())
+    assert "entries" not in header
+    assert header["log_count"] == 3
+
+    lines = manager._entries_path(log_file.id).read_text().splitlines()
+    assert len(lines) == 3
+
+def test_header_update_keeps_entries_file(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload(manager, tmp_path)
+    entries_before = manager._entries_path(log_file.id).read_text()
+
+    log_file.log_analysis_status = "completed"
+    manager._save_metadata(log_file)
+
+    reloaded = LogManager(storage_dir=str(tmp_path / "uploads"))
+    assert reloaded.get_file(log_file.id).log_analysis_status == "completed"
+    assert manager._entries_path(log_file.id).read_text() == entries_before
+    assert len(reloaded._load_entries(log_file.id)) == 3
+
+def test_legacy_metadata_with_entries_is_split(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload(manager, tmp_path)
+    legacy = json.loads(manager._metadata_path(log_file.id).read_text())
+    legacy["entries"] = [manager._entry_to_dict(entry) for entry in log_file.entries]
+    manager._metadata_path(log_file.id).write_text(json.dumps(legacy))
+    manager._entries_path(log_file.id).unlink()
+
+    reloaded = LogManager(storage_dir=str(tmp_path / "uploads"))
+    assert "entries" not in json.loads(reloaded._metadata_path(log_file.id).read_text())
+    assert len(reloaded._load_entries(log_file.id)) == 3
+
+def test_summary_is_computed_during_parsing(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload(manager, tmp_path)
+
+    summary = manager.get_summary(log_file.id)
+    assert summary.level_counts == {"ERROR": 1, "WARN": 1, "INFO": 1}
+    assert summary.error_count == 1
+    assert summary.errors_per_minute == {"2024-07-05T16:12": 1}
+    assert summary.top_sources == {"database": 2, "api": 1}
+    assert summary.first_timestamp.second == 34
+    assert summary.last_timestamp.second == 36
+
+    reloaded = LogManager(storage_dir=str(tmp_path / "uploads"))
+    assert reloaded.get_file(log_file.id).summary == summary
+
+def test_listing_is_header_only_and_paginated(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    uploaded = [_upload(manager, tmp_path) for _ in range(3)]
+
+    first = manager.get_all_files(limit=2, sort_by="upload_time", order="asc")
+    assert first.total_count == 3
+    assert [f.id for f in first.files] == [f.id for f in uploaded[:2]]
+    assert not hasattr(first.files[0], "entries")
+
+    second = manager.get_all_files(limit=2, cursor=first.next_cursor, sort_by="upload_time", order="asc")
+    assert [f.id for f in second.files] == [uploaded[2].id]
+    assert second.next_cursor is None
+
+    assert manager.get_all_files(status="completed").total_count == 0
+    assert len(manager.get_entries(uploaded[0].id, offset=1, limit=5)) == 2
+
+def test_templates_are_mined_and_persisted(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload(manager, tmp_path)
+
+    templates = manager.get_templates(log_file.id)
+    assert sum(template.count for template in templates) == 3
+    template_ids = {entry.metadata["template_id"] for entry in manager._load_entries(log_file.id)}
+    assert template_ids == {template.id for template in templates}
+
+def test_near_duplicate_incident_reuses_stored_analysis(tmp_path, monkeypatch):
+    from app.services import log_manager as log_manager_module
+
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload(manager, tmp_path)
+    match = {"incident_id": "incident-1", "similarity_score": 0.98, "source_file": "old.log",
+             "analysis": "Stored analysis"}
+    monkeypatch.setattr(log_manager_module.vector_service, "search_similar_incidents",
+                        lambda query, top_k, similarity_threshold: [match])
+
+    def fail(log_text):
+        raise AssertionError("model should not be called")
+
+    monkeypatch.setattr(log_manager_module, "analyze_logs", fail)
+
+    result = manager.analyze_file(log_file.id, reuse_similar=True)
+    assert result.analysis == "Stored analysis"
+    assert result.metadata["served_from"] == "vector_index"
+    assert result.metadata["reuse"]["incident_id"] == "incident-1"
+    assert manager.get_file(log_file.id).analysis_result == "Stored analysis"
@@ -0,0 +1,24 @@
+from app.services.log_reducer import reduce_logs, estimate_tokens
+
+def test_small_logs_pass_through_with_repeats_collapsed():
+    log = "\n".join(f"2024-07-05 10:00:{second:02d} INFO heartbeat {second}" for second in range(50))
+    result = reduce_logs(log, token_budget=1000)
+
+    assert result.text == "2024-07-05 10:00:00 INFO heartbeat 0 [repeated 50x]"
+    assert result.kept_lines == 1
+    assert result.compression_ratio > 10
+
+def test_error_windows_are_kept_within_budget():
+    def word(i):
+        return "".join(chr(97 + (i // 26 ** k) % 26) for k in range(3))
+
+    lines = [f"2024-07-05 10:00:00 INFO request handled by worker {word(i)}" for i in range(400)]
+    lines[300] = "2024-07-05 10:05:00 ERROR Database connection failed"
+    lines.insert(301, "    at connect (db.js:42:15)")
+    result = reduce_logs("\n".join(lines), token_budget=200)
+
+    assert result.reduced_tokens <= 200
+    assert "ERROR Database connection failed" in result.text
+    assert "at connect (db.js:42:15)" in result.text
+    assert "lines omitted" in result.text
+    assert result.to_metadata()["original_tokens"] == estimate_tokens("\n".join(lines))
@@ -1,5 +1,8 @@
+from datetime import datetime
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api import logs
+from app.services.log_manager import LogManager
 
 client = TestClient(app)
 
@@ -9,3 +12,34 @@ def test_get_logs():
     assert "files" in data
     assert "total_count" in data
     assert "total_size" in data
+
+def test_upload_time_filters_accept_timezone_aware_bounds(tmp_path, monkeypatch):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_path = tmp_path / "app.log"
+    log_path.write_text("2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed\n")
+    old, new = (manager.upload_file(log_path, "app.log") for _ in range(2))
+    manager.log_files[old.id].upload_time = datetime(2024, 1, 1, 12)
+    monkeypatch.setattr(logs, "log_manager", manager)
+
+    response = client.get("/logs", params={"uploaded_after": "2024-01-01T13:00:00+02:00"})
+    assert response.status_code == 200
+    assert {f["id"] for f in response.json()["files"]} == {old.id, new.id}
+
+    response = client.get("/logs", params={"uploaded_after": "2024-01-01T12:00:01Z"})
+    assert [f["id"] for f in response.json()["files"]] == [new.id]
+    response = client.get("/logs", params={"uploaded_before": "2024-01-02T00:00:00Z"})
+    assert [f["id"] for f in response.json()["files"]] == [old.id]
+
+def test_cursor_from_another_sort_order_is_rejected(tmp_path, monkeypatch):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_path = tmp_path / "app.log"
+    log_path.write_text("2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed\n")
+    for _ in range(2):
+        manager.upload_file(log_path, "app.log")
+    monkeypatch.setattr(logs, "log_manager", manager)
+
+    by_size = client.get("/logs", params={"limit": 1, "sort_by": "size"}).json()["next_cursor"]
+    by_name = client.get("/logs", params={"limit": 1, "sort_by": "filename"}).json()["next_cursor"]
+    assert client.get("/logs", params={"cursor": by_size}).status_code == 400
+    assert client.get("/logs", params={"cursor": by_name, "sort_by": "size"}).status_code == 400
+    assert client.get("/logs", params={"cursor": by_size, "sort_by": "log_count"}).status_code == 200
@@ -0,0 +1,209 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session, create_engine, select
+from app.main import app
+from app.db import get_session, get_read_session
+from app.models.log_sql import BlobChunk, LogEntry, LogFile
+from app.services.blob_store import blob_store, move_inline_content
+
+client = TestClient(app)
+
+SAMPLE_LOG = """2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed: timeout after 30s
+2024-07-05 16:12:35 [WARN] database:connect_db:42 - Retrying connection...
+2024-07-05 16:12:36 [INFO] api:handler:10 - Request served
+"""
+
+@pytest.fixture(autouse=True)
+def sql_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    def override_get_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
+    yield engine
+    app.dependency_overrides.pop(get_session, None)
+    app.dependency_overrides.pop(get_read_session, None)
+
+def _create_log_file(filename="app.log", upload_time="2024-07-05T15:00:00"):
+    response = client.post("/logs_sql", json={
+        "filename": filename,
+        "size": len(SAMPLE_LOG),
+        "upload_time": upload_time,
+        "log_count": 0,
+        "content": SAMPLE_LOG,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def test_list_log_files_is_header_only_and_paginated():
+    for hour in range(3):
+        _create_log_file(f"app{hour}.log", f"2024-07-05T1{hour}:00:00")
+
+    first = client.get("/logs_sql", params={"limit": 2, "order": "asc"}).json()
+    assert first["total_count"] == 3
+    assert [f["filename"] for f in first["files"]] == ["app0.log", "app1.log"]
+    assert "content" not in first["files"][0]
+
+    second = client.get("/logs_sql", params={"limit": 2, "order": "asc", "cursor": first["next_cursor"]}).json()
+    assert [f["filename"] for f in second["files"]] == ["app2.log"]
+    assert second["next_cursor"] is None
+
+def test_upload_time_filters_and_cursors_are_validated():
+    old = _create_log_file("old.log", "2024-07-05T15:00:00")
+    new = _create_log_file("new.log", "2024-07-05T16:00:00")
+
+    files = client.get("/logs_sql", params={"uploaded_after": "2024-07-05T17:30:00+02:00"}).json()["files"]
+    assert [f["id"] for f in files] == [new["id"]]
+    files = client.get("/logs_sql", params={"uploaded_before": "2024-07-05T15:00:01Z"}).json()["files"]
+    assert [f["id"] for f in files] == [old["id"]]
+
+    by_size = client.get("/logs_sql", params={"limit": 1, "sort_by": "size"}).json()["next_cursor"]
+    assert client.get("/logs_sql", params={"cursor": by_size}).status_code == 400
+
+def test_read_log_file_loads_content_on_request():
+    log_file = _create_log_file()
+    assert log_file["log_count"] == 3
+    assert client.get(f"/logs_sql/{log_file['id']}").json()["content"] is None
+    assert client.get(f"/logs_sql/{log_file['id']}", params={"include_content": True}).json()["content"] == SAMPLE_LOG
+
+def test_content_is_chunked_deduplicated_and_streamed(sql_session, monkeypatch):
+    monkeypatch.setattr(blob_store, "chunk_size", 64)
+    first = _create_log_file()
+    second = _create_log_file("copy.log")
+    assert first["content_digest"] == second["content_digest"]
+
+    response = client.get(f"/logs_sql/{first['id']}/content")
+    assert response.text == SAMPLE_LOG
+    assert response.headers["content-length"] == str(len(SAMPLE_LOG))
+    etag = response.headers["etag"]
+    assert client.get(f"/logs_sql/{first['id']}/content", headers={"If-None-Match": etag}).status_code == 304
+
+    with Session(sql_session) as session:
+        chunks = session.exec(select(BlobChunk)).all()
+        assert len(chunks) == -(-len(SAMPLE_LOG) // 64)
+        assert "content" not in LogFile.__table__.columns
+
+    # Shared content survives the first delete and goes with the last
+    client.delete(f"/logs_sql/{first['id']}")
+    assert client.get(f"/logs_sql/{second['id']}/content").text == SAMPLE_LOG
+    client.delete(f"/logs_sql/{second['id']}")
+    with Session(sql_session) as session:
+        assert session.exec(select(BlobChunk)).all() == []
+
+def test_update_log_file_is_partial():
+    log_file = _create_log_file()
+    updated = client.put(f"/logs_sql/{log_file['id']}", json={
+        "log_analysis_status": "completed", "analysis_result": "ok"
+    }).json()
+    assert updated["log_analysis_status"] == "completed"
+    assert updated["content_digest"] == log_file["content_digest"]
+
+    updated = client.put(f"/logs_sql/{log_file['id']}", json={"content": "replaced"}).json()
+    assert client.get(f"/logs_sql/{log_file['id']}/content").text == "replaced"
+    assert updated["filename"] == "app.log"
+
+def test_inline_content_is_moved_to_blob_store():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE logfile (id INTEGER PRIMARY KEY, filename VARCHAR NOT NULL, size INTEGER NOT NULL, "
+            "upload_time DATETIME NOT NULL, log_count INTEGER NOT NULL, log_analysis_status VARCHAR NOT NULL, "
+            "analysis_result VARCHAR, content VARCHAR)"
+        ))
+        connection.execute(text(
+            "INSERT INTO logfile VALUES (1, 'old.log', 10, '2024-07-05 15:00:00', 3, 'pending', NULL, :content)"
+        ), {"content": SAMPLE_LOG})
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        assert move_inline_content(connection) == 1
+
+    with Session(engine) as session:
+        log_file = session.get(LogFile, 1)
+        assert blob_store.read_text(session, log_file.content_digest) == SAMPLE_LOG
+
+def test_create_log_file_bulk_inserts_entries(sql_session, monkeypatch):
+    from app.services import sql_ingest
+    monkeypatch.setattr(sql_ingest, "BULK_INSERT_BATCH_SIZE", 2)
+
+    log_file = _create_log_file()
+    assert log_file["log_count"] == 3
+
+    with Session(sql_session) as session:
+        entries = session.exec(select(LogEntry).where(LogEntry.log_file_id == log_file["id"])).all()
+    assert [entry.level for entry in entries] == ["ERROR", "WARN", "INFO"]
+    assert json.loads(entries[0].log_metadata)["function_name"] == "connect_db"
+
+def test_log_entries_are_filtered_and_keyset_paginated():
+    first_file = _create_log_file("a.log")
+    _create_log_file("b.log")
+
+    page = client.get("/log_entries_sql", params={"log_file_id": first_file["id"], "limit": 2}).json()
+    assert [entry["message"] for entry in page["entries"]] == [
+        "Database connection failed: timeout after 30s", "Retrying connection..."
+    ]
+    rest = client.get("/log_entries_sql", params={
+        "log_file_id": first_file["id"], "limit": 2, "cursor": page["next_cursor"]
+    }).json()
+    assert [entry["message"] for entry in rest["entries"]] == ["Request served"]
+    assert rest["next_cursor"] is None
+
+    errors = client.get("/log_entries_sql", params={"level": "ERROR", "order": "desc"}).json()["entries"]
+    assert len(errors) == 2
+    assert errors[0]["id"] > errors[1]["id"]
+
+    window = client.get("/log_entries_sql", params={
+        "since": "2024-07-05T16:12:35", "until": "2024-07-05T16:12:36", "source": "database"
+    }).json()["entries"]
+    assert [entry["level"] for entry in window] == ["WARN", "WARN"]
+
+    assert client.get("/log_entries_sql", params={"cursor": "bogus"}).status_code == 400
+
+def test_timezone_aware_entry_bounds_are_converted_to_utc():
+    _create_log_file()
+    bounds = {"since": "2024-07-05T18:12:35+02:00", "until": "2024-07-05T16:12:36Z"}
+
+    window = client.get("/log_entries_sql", params=bounds).json()["entries"]
+    assert [entry["level"] for entry in window] == ["WARN"]
+    hits = client.get("/log_entries_sql/search", params={"q": "connection", **bounds}).json()["hits"]
+    assert [hit["entry"]["level"] for hit in hits] == ["WARN"]
+
+def test_search_log_entries_ranks_and_filters():
+    log_file = _create_log_file()
+
+    result = client.get("/log_entries_sql/search", params={"q": "connection"}).json()
+    assert sorted(hit["entry"]["level"] for hit in result["hits"]) == ["ERROR", "WARN"]
+    assert result["hits"][0]["rank"] <= result["hits"][1]["rank"]
+    assert all("<mark>connection</mark>" in hit["snippet"] for hit in result["hits"])
+
+    result = client.get("/log_entries_sql/search", params={"q": "connection", "level": "WARN"}).json()
+    assert [hit["entry"]["message"] for hit in result["hits"]] == ["Retrying connection..."]
+
+    result = client.get("/log_entries_sql/search", params={"q": '"request served"', "log_file_id": log_file["id"]}).json()
+    assert len(result["hits"]) == 1
+
+    result = client.get("/log_entries_sql/search", params={"q": "connection", "sort": "recent"}).json()
+    assert result["hits"][0]["entry"]["id"] > result["hits"][1]["entry"]["id"]
+
+    assert client.get("/log_entries_sql/search", params={"q": '"unbalanced'}).status_code == 400
+
+def test_search_index_follows_inserts_updates_and_deletes():
+    log_file = _create_log_file()
+    created = client.post("/log_entries_sql", json={
+        "log_file_id": log_file["id"], "timestamp": "2024-07-05T16:13:00", "level": "ERROR", "message": "Cache eviction storm"
+    }).json()
+    assert client.get("/log_entries_sql/search", params={"q": "eviction"}).json()["hits"][0]["entry"]["id"] == created["id"]
+    entry = client.get("/log_entries_sql", params={"log_file_id": log_file["id"], "limit": 1}).json()["entries"][0]
+
+    client.put(f"/log_entries_sql/{entry['id']}", json={**entry, "message": "Disk quota exceeded"})
+    assert client.get("/log_entries_sql/search", params={"q": "quota"}).json()["hits"][0]["entry"]["id"] == entry["id"]
+    assert client.get("/log_entries_sql/search", params={"q": "timeout"}).json()["hits"] == []
+
+    client.delete(f"/log_entries_sql/{entry['id']}")
+    assert client.get("/log_entries_sql/search", params={"q": "quota"}).json()["hits"] == []
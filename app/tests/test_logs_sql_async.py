@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.api import logs_sql_async
+from app.db import create_async_sqlite_engine, create_sqlite_engine, get_async_session, get_async_read_session
+
+SAMPLE_LOG = """2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed: timeout after 30s
+2024-07-05 16:12:35 [WARN] database:connect_db:42 - Retrying connection...
+2024-07-05 16:12:36 [INFO] api:handler:10 - Request served
+"""
+
+app = FastAPI()
+app.include_router(logs_sql_async.router)
+
+@pytest.fixture
+def client(tmp_path):
+    database = tmp_path / "logs.db"
+    engine = create_sqlite_engine(f"sqlite:///{database}", echo=False)
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{database}", echo=False)
+    read_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{database}", pool_size=4, read_only=True, echo=False)
+
+    async def override_get_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    async def override_get_read_session():
+        async with AsyncSession(read_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_get_session
+    app.dependency_overrides[get_async_read_session] = override_get_read_session
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+def _create_log_file(client, filename="app.log"):
+    response = client.post("/logs_sql", json={
+        "filename": filename, "size": len(SAMPLE_LOG), "upload_time": "2024-07-05T15:00:00", "content": SAMPLE_LOG
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def test_async_log_file_crud(client):
+    log_file = _create_log_file(client)
+    assert log_file["log_count"] == 3
+
+    listing = client.get("/logs_sql").json()
+    assert listing["total_count"] == 1 and "content" not in listing["files"][0]
+    assert client.get(f"/logs_sql/{log_file['id']}", params={"include_content": True}).json()["content"] == SAMPLE_LOG
+    assert client.get(f"/logs_sql/{log_file['id']}/content").text == SAMPLE_LOG
+
+    updated = client.put(f"/logs_sql/{log_file['id']}", json={"log_analysis_status": "completed"}).json()
+    assert updated["log_analysis_status"] == "completed"
+    assert client.delete(f"/logs_sql/{log_file['id']}").json() == {"ok": True}
+    assert client.get(f"/logs_sql/{log_file['id']}").status_code == 404
+
+def test_async_log_entries_page_and_search(client):
+    log_file = _create_log_file(client)
+    page = client.get("/log_entries_sql", params={"log_file_id": log_file["id"], "limit": 2}).json()
+    rest = client.get("/log_entries_sql", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [entry["level"] for entry in page["entries"] + rest["entries"]] == ["ERROR", "WARN", "INFO"]
+
+    hits = client.get("/log_entries_sql/search", params={"q": "connection", "level": "WARN"}).json()["hits"]
+    assert [hit["entry"]["message"] for hit in hits] == ["Retrying connection..."]
+    assert client.get("/log_entries_sql/search", params={"q": '"unbalanced'}).status_code == 400
+
+    entry = client.post("/log_entries_sql", json={
+        "log_file_id": log_file["id"], "timestamp": "2024-07-05T16:13:00", "level": "ERROR", "message": "Disk full"
+    }).json()
+    client.put(f"/log_entries_sql/{entry['id']}", json={**entry, "message": "Disk quota exceeded"})
+    assert client.get(f"/log_entries_sql/{entry['id']}").json()["message"] == "Disk quota exceeded"
+    client.delete(f"/log_entries_sql/{entry['id']}")
+    assert client.get("/log_entries_sql/search", params={"q": "quota"}).json()["hits"] == []
+
+def test_app_imports_without_aiosqlite():
+    # The async engines are built on first use, so the sync app starts without the driver
+    code = "import sys; sys.modules['aiosqlite'] = None; import app.main"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
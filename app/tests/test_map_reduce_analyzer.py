@@ -0,0 +1,39 @@
+from app.services import mock_gpt_service
+from app.services.log_manager import LogManager
+
+def _upload_large_log(manager, tmp_path, lines=40):
+    content = "\n".join(
+        f"2024-07-05 10:{minute:02d}:00 [ERROR] database:connect_db:42 - Database connection failed on shard {minute}"
+        for minute in range(lines)
+    )
+    path = tmp_path / "large.log"
+    path.write_text(content)
+    return manager.upload_file(path, "large.log")
+
+def test_map_reduce_analyzes_chunks_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0.1)
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload_large_log(manager, tmp_path)
+
+    result = manager.analyze_file(log_file.id, mode="map_reduce", chunk_entries=5, max_concurrency=8)
+
+    assert "Database" in result.analysis
+    assert result.metadata["mode"] == "map_reduce"
+    assert result.metadata["chunks"] == 8
+    assert result.metadata["map_wall_ms"] < result.metadata["map_sequential_ms"] / 2
+    assert manager.get_file(log_file.id).log_analysis_status == "completed"
+
+def test_time_bounded_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload_large_log(manager, tmp_path)
+
+    result = manager.analyze_file(log_file.id, mode="map_reduce", chunk_minutes=15)
+    assert result.metadata["chunks"] == 3
+
+def test_auto_mode_uses_single_call_when_log_fits(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_file = _upload_large_log(manager, tmp_path)
+
+    assert manager.analyze_file(log_file.id).metadata["mode"] == "single"
@@ -0,0 +1,48 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core.middleware import MetricsMiddleware
+from app.services.metrics_service import metrics_service
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/items/{item_id}")
+def read_item(item_id: int):
+    return {"item_id": item_id}
+
+@app.post("/echo")
+async def echo(request: Request):
+    body = await request.body()
+    return StreamingResponse(iter([body, body]), media_type="text/plain")
+
+client = TestClient(app)
+
+def _sample(name, **labels):
+    return metrics_service.registry.get_sample_value(name, labels) or 0
+
+def test_requests_are_labeled_by_route_template():
+    before = _sample("smart_dashboard_requests_total", method="GET", endpoint="/items/{item_id}", status="200")
+    unmatched = _sample("smart_dashboard_requests_total", method="GET", endpoint="<unmatched>", status="404")
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/no/such/path")
+
+    assert _sample("smart_dashboard_requests_total", method="GET", endpoint="/items/{item_id}", status="200") == before + 2
+    assert _sample("smart_dashboard_requests_total", method="GET", endpoint="<unmatched>", status="404") == unmatched + 1
+    assert _sample("smart_dashboard_requests_total", method="GET", endpoint="/items/1", status="200") == 0
+    assert _sample("smart_dashboard_requests_in_progress", method="GET") == 0
+
+def test_request_and_response_sizes_of_streamed_responses():
+    labels = {"method": "POST", "endpoint": "/echo"}
+    request_bytes = _sample("smart_dashboard_request_size_bytes_sum", **labels)
+    response_bytes = _sample("smart_dashboard_response_size_bytes_sum", **labels)
+    observed = _sample("smart_dashboard_request_duration_seconds_count", **labels)
+
+    response = client.post("/echo", content=b"x" * 1000)
+    assert response.content == b"x" * 2000
+
+    assert _sample("smart_dashboard_request_size_bytes_sum", **labels) == request_bytes + 1000
+    assert _sample("smart_dashboard_response_size_bytes_sum", **labels) == response_bytes + 2000
+    assert _sample("smart_dashboard_request_duration_seconds_count", **labels) == observed + 1
@@ -0,0 +1,100 @@
+import json
+import pytest
+from sqlmodel import SQLModel, Session, create_engine, select, func
+from app import migrate_logs_to_db
+from app.migrate_logs_to_db import MigrationCheckpoint, migrate
+from app.models.log_sql import LogEntry, LogFile
+from app.services.log_manager import LogManager
+
+SAMPLE_LOG = "".join(
+    f"2024-07-05 16:{index // 60:02d}:{index % 60:02d} [{'ERROR' if index % 5 == 0 else 'INFO'}] "
+    f"api:handler:{index} - Request {index} served\n"
+    for index in range(40)
+)
+
+@pytest.fixture
+def uploads(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    for name in ("app.log", "other.log"):
+        log_path = tmp_path / name
+        log_path.write_text(SAMPLE_LOG)
+        manager.upload_file(log_path, name)
+    return tmp_path / "uploads"
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+def _counts(engine):
+    with Session(engine) as session:
+        return (session.exec(select(func.count()).select_from(LogFile)).one(),
+                session.exec(select(func.count()).select_from(LogEntry)).one())
+
+def test_migrates_entries_in_segments(uploads, db_engine):
+    totals = migrate(uploads, db_engine, workers=0, segment_size=500, report=False)
+    assert totals["files"] == 2 and totals["entries"] == 80
+    assert _counts(db_engine) == (2, 80)
+
+    with Session(db_engine) as session:
+        log_file = session.exec(select(LogFile).where(LogFile.filename == "app.log")).one()
+        messages = session.exec(
+            select(LogEntry.message).where(LogEntry.log_file_id == log_file.id).order_by(LogEntry.id)
+        ).all()
+        assert messages == [f"Request {index} served" for index in range(40)]
+        assert log_file.log_count == 40
+
+def test_resumes_after_interruption_without_duplicates(uploads, db_engine, monkeypatch):
+    write_segment = migrate_logs_to_db._write_segment
+    written = []
+
+    def crash_after_three(session, segment, rows):
+        if len(written) == 3:
+            raise RuntimeError("interrupted")
+        written.append(segment)
+        return write_segment(session, segment, rows)
+
+    monkeypatch.setattr(migrate_logs_to_db, "_write_segment", crash_after_three)
+    with pytest.raises(RuntimeError):
+        migrate(uploads, db_engine, workers=0, segment_size=500, report=False)
+    assert 0 < _counts(db_engine)[1] < 80
+
+    monkeypatch.setattr(migrate_logs_to_db, "_write_segment", write_segment)
+    migrate(uploads, db_engine, workers=0, segment_size=500, report=False)
+    assert _counts(db_engine) == (2, 80)
+
+    # A finished migration is a no-op
+    totals = migrate(uploads, db_engine, workers=0, report=False)
+    assert totals["skipped"] == 2 and totals["entries"] == 0
+    assert _counts(db_engine) == (2, 80)
+    with Session(db_engine) as session:
+        assert all(checkpoint.done and checkpoint.entry_count == 40
+                   for checkpoint in session.exec(select(MigrationCheckpoint)))
+
+def test_legacy_metadata_is_split_before_migrating(tmp_path, db_engine, monkeypatch):
+    # A read size far below one entry exercises values split across reads
+    monkeypatch.setattr(migrate_logs_to_db, "LEGACY_READ_SIZE", 7)
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    entries = [{"id": str(index), "timestamp": f"2024-07-05T16:12:{index:02d}", "level": "ERROR",
+                "message": f"Database connection failed \u00e9 {index}", "source": "database", "metadata": {"line": index}}
+               for index in range(30)]
+    (uploads_dir / "legacy_metadata.json").write_text(json.dumps({
+        "id": "legacy", "filename": "legacy.log", "size": 10, "upload_time": "2024-07-05T18:00:00",
+        "log_count": 30, "log_analysis_status": "completed", "analysis_result": "ok", "entries": entries
+    }, indent=2))
+
+    totals = migrate(uploads_dir, db_engine, workers=0, segment_size=500, report=False)
+    assert totals["entries"] == 30
+    with Session(db_engine) as session:
+        rows = session.exec(select(LogEntry).order_by(LogEntry.id)).all()
+        assert [row.log_metadata for row in rows] == [f'{{"line":{index}}}' for index in range(30)]
+        assert session.get(LogFile, rows[0].log_file_id).analysis_result == "ok"
+
+    # The split leaves the layout LogManager writes
+    assert "entries" not in json.loads((uploads_dir / "legacy_metadata.json").read_text())
+    manager = LogManager(storage_dir=str(uploads_dir))
+    assert [entry.message for entry in manager.get_entries("legacy", limit=2)] == [
+        "Database connection failed \u00e9 0", "Database connection failed \u00e9 1"
+    ]
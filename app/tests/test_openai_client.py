@@ -0,0 +1,153 @@
+import asyncio
+import json
+import httpx
+import pytest
+from app.services import gpt_service, mock_gpt_service, openai_client
+from app.services.openai_client import AsyncChatClient, CircuitBreaker, LLMUnavailableError
+
+COMPLETION = {
+    "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "test",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "analysis"}, "finish_reason": "stop"}]
+}
+
+def _client(statuses, **kwargs):
+    """Client whose transport answers with the given status codes in turn"""
+    calls = []
+
+    def handler(request):
+        status = statuses[min(len(calls), len(statuses) - 1)]
+        calls.append(status)
+        return httpx.Response(status, json=COMPLETION if status == 200 else {"error": {"message": "boom"}})
+
+    client = AsyncChatClient(model="test", api_key="sk-test", base_url="http://stub/v1",
+                             transport=httpx.MockTransport(handler), **kwargs)
+    return client, calls
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(openai_client, "OPENAI_BACKOFF_BASE_SECONDS", 0)
+
+def test_transient_errors_are_retried():
+    client, calls = _client([429, 503, 200])
+    assert asyncio.run(client.complete("system", "log")) == "analysis"
+    assert calls == [429, 503, 200]
+    assert client.retries == 2
+
+def test_client_errors_are_not_retried():
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    client, calls = _client([400], breaker=breaker)
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(client.complete("system", "log"))
+    assert calls == [400]
+    # A rejected request is neither a success nor an outage
+    assert breaker.failures == 1
+
+    client, calls = _client([401], breaker=breaker)
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(client.complete("system", "log"))
+    assert breaker.failures == 2
+
+def test_retry_after_is_capped_at_the_backoff_maximum(monkeypatch):
+    delays = []
+
+    async def record_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(openai_client, "OPENAI_BACKOFF_MAX_SECONDS", 2)
+    monkeypatch.setattr(openai_client.asyncio, "sleep", record_sleep)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, json={"error": {"message": "slow down"}}, headers={"retry-after": "3600"})
+        return httpx.Response(200, json=COMPLETION)
+
+    client = AsyncChatClient(model="test", api_key="sk-test", base_url="http://stub/v1",
+                             transport=httpx.MockTransport(handler))
+    assert asyncio.run(client.complete("system", "log")) == "analysis"
+    assert delays == [2]
+
+def test_client_of_a_previous_event_loop_is_closed():
+    client, _ = _client([200])
+    asyncio.run(client.complete("system", "log"))
+    first = client._http_client
+    asyncio.run(client.complete("system", "log"))
+    assert first.is_closed
+    assert client._http_client is not first and not client._http_client.is_closed
+
+def test_circuit_opens_after_repeated_failures():
+    client, calls = _client([500], max_retries=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(client.complete("system", "log"))
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(client.complete("system", "log"))
+    assert len(calls) == 4
+
+def test_half_open_trial_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def _half_open_client(handler):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return AsyncChatClient(model="test", api_key="sk-test", base_url="http://stub/v1",
+                           transport=httpx.MockTransport(handler), breaker=breaker)
+
+def test_cancelled_half_open_trial_frees_the_slot():
+    async def hang(request):
+        await asyncio.sleep(60)
+
+    client = _half_open_client(hang)
+
+    async def cancel_trial():
+        task = asyncio.create_task(client.complete("system", "log"))
+        await asyncio.sleep(0.05)
+        assert not client.breaker.allow()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.allow()
+
+def test_closed_half_open_stream_frees_the_slot():
+    chunk = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "test",
+             "choices": [{"index": 0, "delta": {"content": "token"}, "finish_reason": None}]}
+    body = "".join(f"data: {json.dumps(chunk)}\n\n" for _ in range(3)) + "data: [DONE]\n\n"
+    client = _half_open_client(lambda request: httpx.Response(
+        200, content=body.encode(), headers={"content-type": "text/event-stream"}))
+
+    async def close_after_first_token():
+        stream = client.stream("system", "log")
+        assert await stream.__anext__() == "token"
+        await stream.aclose()
+
+    asyncio.run(close_after_first_token())
+    assert client.in_flight == 0
+    assert client.breaker.allow()
+
+def test_unavailable_model_falls_back_to_mock(monkeypatch):
+    client, _ = _client([500], max_retries=0, breaker=CircuitBreaker(failure_threshold=1))
+    monkeypatch.setattr(gpt_service, "client", client)
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+
+    analysis = asyncio.run(gpt_service.analyze_logs("ERROR Database connection failed"))
+    assert "Database Error Analysis" in analysis
+
+def test_rejected_request_falls_back_to_mock(monkeypatch):
+    client, _ = _client([400])
+    monkeypatch.setattr(gpt_service, "client", client)
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+
+    analysis = asyncio.run(gpt_service.analyze_logs("ERROR Database connection failed"))
+    assert "Database Error Analysis" in analysis
@@ -0,0 +1,143 @@
+import os
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session, select, func
+from app.api.logs_sql import parse_entries, store_log_file
+from app.db import create_sqlite_engine, get_session, get_read_session
+from app.main import app
+from app.models.log_sql import BlobManifest, LogEntry, LogEntryRollup, LogFile, LogFileCreate
+from app.services.log_manager import LogManager
+from app.services.retention import RetentionService
+
+SAMPLE_LOG = "".join(
+    f"2024-07-05 16:12:{index:02d} [{'ERROR' if index % 3 == 0 else 'INFO'}] api:handler:10 - Request {index} served\n"
+    for index in range(12)
+)
+
+def _engine(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'logs.db'}", echo=False)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+def _add_file(engine, filename, upload_time, content=SAMPLE_LOG):
+    with Session(engine) as session:
+        log_file_create = LogFileCreate(filename=filename, size=len(content), upload_time=upload_time, content=content)
+        log_file = store_log_file(session, log_file_create, parse_entries(log_file_create))
+        session.commit()
+        return log_file.id
+
+def _count(engine, model, *conditions):
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(model).where(*conditions)).one()
+
+def test_delete_endpoint_removes_entries_and_rollups(tmp_path):
+    engine = _engine(tmp_path)
+    log_file_id = _add_file(engine, "app.log", datetime(2024, 7, 5))
+
+    def override_get_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
+    try:
+        assert TestClient(app).delete(f"/logs_sql/{log_file_id}").json() == {"ok": True}
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        app.dependency_overrides.pop(get_read_session, None)
+
+    # Entries are deleted, not unlinked from their file
+    assert _count(engine, LogEntry) == 0
+    assert _count(engine, LogEntryRollup) == 0
+    assert _count(engine, BlobManifest) == 0
+
+def test_age_policy_purges_old_files_in_batches(tmp_path):
+    engine = _engine(tmp_path)
+    old = _add_file(engine, "old.log", datetime(2024, 1, 1))
+    recent = _add_file(engine, "recent.log", datetime(2024, 7, 1), content=SAMPLE_LOG.replace("Request", "Call"))
+
+    service = RetentionService(engine, max_age_days=30, delete_batch_size=5)
+    report = service.run(now=datetime(2024, 7, 5))
+    assert report["database"] == {"files": 1, "entries": 12}
+    with Session(engine) as session:
+        assert session.get(LogFile, old) is None
+        assert session.get(LogFile, recent) is not None
+    assert _count(engine, LogEntry) == _count(engine, LogEntry, LogEntry.log_file_id == recent) == 12
+    # Rollups of the purged file are gone and the rest still match the entries
+    assert _count(engine, LogEntryRollup, LogEntryRollup.log_file_id == old) == 0
+    with Session(engine) as session:
+        assert session.exec(
+            text("SELECT sum(count) FROM logentryrollup WHERE resolution = '1m' AND dimension = 'level'")
+        ).scalar() == 12
+
+def test_size_policy_drops_oldest_files_and_compaction_frees_pages(tmp_path):
+    engine = _engine(tmp_path)
+    large = "".join(f"2024-07-05 16:12:00 [INFO] api:handler:10 - Payload {os.urandom(64).hex()}\n" for _ in range(3000))
+    oldest = _add_file(engine, "oldest.log", datetime(2024, 7, 1), content=large)
+    newest = _add_file(engine, "newest.log", datetime(2024, 7, 2))
+    with engine.connect() as connection:
+        pages_before = connection.execute(text("PRAGMA page_count")).scalar()
+        page_size = connection.execute(text("PRAGMA page_size")).scalar()
+
+    service = RetentionService(engine, max_database_mb=pages_before * page_size / 2 / 2**20)
+    report = service.run()
+    assert report["database"]["files"] == 1
+    with Session(engine) as session:
+        assert session.get(LogFile, oldest) is None
+        assert session.get(LogFile, newest) is not None
+
+    assert report["compaction"]["pages"] > 0
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA freelist_count")).scalar() == 0
+        assert connection.execute(text("PRAGMA page_count")).scalar() < pages_before
+
+def test_uploads_retention_and_orphan_pruning(tmp_path):
+    storage_dir = tmp_path / "uploads"
+    manager = LogManager(storage_dir=str(storage_dir))
+    log_path = tmp_path / "app.log"
+    log_path.write_text(SAMPLE_LOG)
+    old = manager.upload_file(log_path, "app.log")
+    kept = manager.upload_file(log_path, "app.log")
+    manager.log_files[old.id].upload_time = datetime.utcnow() - timedelta(days=60)
+
+    stale = storage_dir / "0b7c5a6e-0000-4000-8000-000000000000_entries.jsonl"
+    fresh = storage_dir / "0b7c5a6e-0000-4000-8000-000000000001_entries.jsonl"
+    for orphan in (stale, fresh):
+        orphan.write_text("{}\n")
+    an_hour_ago = time.time() - 7200
+    os.utime(stale, (an_hour_ago, an_hour_ago))
+
+    report = RetentionService(max_age_days=30).expire_uploads(manager)
+    assert report == {"files": 1, "orphans": 1}
+    assert manager.get_file(old.id) is None and manager.get_file(kept.id) is not None
+    assert not any(path.name.startswith(old.id) for path in storage_dir.iterdir())
+    assert fresh.exists() and not stale.exists()
+    assert (storage_dir / "search_index.db").exists()
+    assert {file_id for file_id, _, _ in manager.search("Request")} == {kept.id}
+
+    # The size policy drops files oldest first until the rest fits
+    assert RetentionService(max_uploads_mb=1e-6).expire_uploads(manager)["files"] == 1
+    assert manager.log_files == {}
+
+def test_uploads_during_a_retention_pass_do_not_abort_it(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_path = tmp_path / "app.log"
+    log_path.write_text(SAMPLE_LOG)
+    old = manager.upload_file(log_path, "app.log")
+    header = manager.log_files[old.id]
+
+    class UploadWhileRead:
+        # Reading the header lands another upload, as a concurrent request would
+        @property
+        def upload_time(self):
+            manager.upload_file(log_path, "app.log")
+            return datetime.utcnow() - timedelta(days=60)
+
+        def __getattr__(self, name):
+            return getattr(header, name)
+
+    manager.log_files[old.id] = UploadWhileRead()
+    assert RetentionService(max_age_days=30).expire_uploads(manager)["files"] == 1
+    assert len(manager.log_files) == 1 and old.id not in manager.log_files
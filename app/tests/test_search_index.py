@@ -0,0 +1,58 @@
+from datetime import datetime
+import pytest
+from app.services.log_manager import LogManager
+from app.services.search_index import parse_query
+
+SAMPLE_LOG = """2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed req-1234: timeout after 30s
+2024-07-05 16:12:35 [WARN] database:connect_db:42 - Retrying connection req-1234
+2024-07-05 16:12:36 [ERROR] api:handler:10 - NullPointerException in handler req-9999
+2024-07-05 16:12:37 [INFO] api:handler:10 - Request served after timeout
+"""
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_path = tmp_path / "app.log"
+    log_path.write_text(SAMPLE_LOG)
+    manager.upload_file(log_path, "app.log")
+    return manager
+
+def _messages(results):
+    return [entry.message for _, _, entry in results]
+
+def test_boolean_queries(manager):
+    assert len(manager.search("timeout")) == 2
+    assert len(manager.search("timeout connection")) == 1
+    assert len(manager.search("nullpointerexception OR retrying")) == 2
+    assert _messages(manager.search("timeout -served")) == [
+        "Database connection failed req-1234: timeout after 30s"
+    ]
+
+def test_phrase_and_filters(manager):
+    assert len(manager.search("req-1234")) == 2
+    assert len(manager.search('"timeout after"')) == 1
+    assert len(manager.search('"after timeout"')) == 1
+    assert len(manager.search("req-1234", level="warn")) == 1
+
+def test_timezone_aware_bounds_are_converted_to_utc(manager):
+    since = datetime.fromisoformat("2024-07-05T18:12:35+02:00")
+    assert len(manager.search("req", since=since)) == 2
+    assert len(manager.search("req", until=datetime.fromisoformat("2024-07-05T16:12:35Z"))) == 1
+
+def test_results_are_latest_first_and_removed_with_file(manager):
+    results = manager.search("req")
+    assert [entry_index for _, entry_index, _ in results] == [2, 1, 0]
+
+    file_id = results[0][0]
+    manager.delete_file(file_id)
+    assert manager.search("req") == []
+
+def test_reindexes_existing_files_on_startup(manager):
+    for path in manager.storage_dir.glob("search_index.db*"):
+        path.unlink()
+    reloaded = LogManager(storage_dir=str(manager.storage_dir))
+    assert len(reloaded.search("req-1234")) == 2
+
+def test_query_without_terms_is_rejected():
+    with pytest.raises(ValueError):
+        parse_query("-timeout")
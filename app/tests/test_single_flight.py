@@ -0,0 +1,84 @@
+import threading
+import pytest
+from app.services.single_flight import SingleFlight
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def follower():
+        try:
+            flight.do("key", lambda: "never called")
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=lambda: pytest.raises(RuntimeError, flight.do, "key", failing))
+    leader.start()
+    started.wait(5)
+    thread = threading.Thread(target=follower)
+    thread.start()
+    while flight.coalesced < 1:
+        pass
+    release.set()
+    leader.join()
+    thread.join()
+
+    assert errors == ["upstream down"]
+    assert flight.get_statistics() == {"calls": 1, "coalesced": 1, "in_flight": 0}
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight("test")
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.do("key", lambda: 2) == (2, False)
+    assert flight.coalesced == 0
+
+def test_concurrent_coroutines_share_one_call():
+    import asyncio
+    flight = SingleFlight("test")
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", slow) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert [result for result, _ in results] == ["result"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert calls == [1]
+
+def test_cancelled_leader_hands_the_call_to_a_follower():
+    import asyncio
+    flight = SingleFlight("test")
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("key", slow))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(flight.do_async("key", slow)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return results
+
+    results = asyncio.run(main())
+    assert [result for result, _ in results] == ["result"] * 3
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert calls == [1, 1]
+    assert flight.get_statistics()["in_flight"] == 0
@@ -0,0 +1,91 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine, select, func
+from app.main import app
+from app.db import get_session, get_read_session
+from app.models.log_sql import ROLLUPS, LogEntryRollup
+
+client = TestClient(app)
+
+SAMPLE_LOG = """2024-07-05 16:12:34 [ERROR] database:connect_db:42 - Database connection failed: timeout after 30s
+2024-07-05 16:12:35 [WARN] database:connect_db:42 - Retrying connection...
+2024-07-05 16:13:10 [ERROR] database:connect_db:42 - Database connection failed: timeout after 30s
+2024-07-05 17:02:00 [INFO] api:handler:10 - Request served
+"""
+
+@pytest.fixture(autouse=True)
+def sql_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    def override_get_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
+    yield engine
+    app.dependency_overrides.pop(get_session, None)
+    app.dependency_overrides.pop(get_read_session, None)
+
+def _create_log_file(filename="app.log"):
+    return client.post("/logs_sql", json={
+        "filename": filename, "size": len(SAMPLE_LOG), "upload_time": "2024-07-05T18:00:00", "content": SAMPLE_LOG
+    }).json()
+
+def test_level_stats_per_minute_and_hour():
+    _create_log_file()
+
+    minutes = client.get("/stats/levels", params={"bucket": "1m", "since": "2024-07-05T16:13:00"}).json()
+    assert [(b["bucket_start"], b["counts"]) for b in minutes["series"]] == [
+        ("2024-07-05T16:13:00", {"ERROR": 1}),
+        ("2024-07-05T17:02:00", {"INFO": 1}),
+    ]
+
+    # A since inside a bucket keeps that bucket
+    within = client.get("/stats/levels", params={"bucket": "1m", "since": "2024-07-05T16:12:35"}).json()
+    assert within["series"][0]["bucket_start"] == "2024-07-05T16:12:00"
+    within = client.get("/stats/levels", params={"bucket": "1h", "since": "2024-07-05T16:30:00"}).json()
+    assert within["totals"] == {"ERROR": 2, "WARN": 1, "INFO": 1}
+
+    # Aware bounds are converted to UTC before flooring
+    aware = client.get("/stats/levels", params={
+        "bucket": "1m", "since": "2024-07-05T18:13:05+02:00", "until": "2024-07-05T17:00:00Z"
+    }).json()
+    assert [(b["bucket_start"], b["counts"]) for b in aware["series"]] == [("2024-07-05T16:13:00", {"ERROR": 1})]
+
+    hours = client.get("/stats/levels", params={"bucket": "1h"}).json()
+    assert [b["counts"] for b in hours["series"]] == [{"ERROR": 2, "WARN": 1}, {"INFO": 1}]
+    assert hours["totals"] == {"ERROR": 2, "WARN": 1, "INFO": 1}
+
+    sources = client.get("/stats/sources", params={"include_series": False}).json()
+    assert sources["series"] == []
+    assert sources["totals"] == {"database": 3, "api": 1}
+
+def test_rollups_follow_inserts_updates_and_deletes(sql_session):
+    first = _create_log_file()
+    second = _create_log_file("other.log")
+    assert client.get("/stats/levels", params={"log_file_id": second["id"]}).json()["totals"]["ERROR"] == 2
+
+    entry = client.post("/log_entries_sql", json={
+        "log_file_id": first["id"], "timestamp": "2024-07-05T16:59:00", "level": "CRITICAL", "message": "Out of memory"
+    }).json()
+    assert client.get("/stats/levels").json()["totals"]["CRITICAL"] == 1
+
+    client.put(f"/log_entries_sql/{entry['id']}", json={**entry, "level": "ERROR"})
+    totals = client.get("/stats/levels").json()["totals"]
+    assert "CRITICAL" not in totals and totals["ERROR"] == 5
+
+    client.delete(f"/log_entries_sql/{entry['id']}")
+    assert client.get("/stats/levels").json()["totals"]["ERROR"] == 4
+
+    # The rollups always agree with a scan of the raw table
+    with Session(sql_session) as session:
+        for resolution, dimension in ROLLUPS:
+            rolled_up = session.exec(
+                select(func.sum(LogEntryRollup.count))
+                .where(LogEntryRollup.resolution == resolution, LogEntryRollup.dimension == dimension)
+            ).one()
+            assert rolled_up == session.exec(text("SELECT count(*) FROM logentry")).scalar()
@@ -0,0 +1,21 @@
+from app.services.template_miner import TemplateMiner
+
+def test_messages_with_different_parameters_share_a_template():
+    miner = TemplateMiner()
+    first_id, _ = miner.add("Connection to db-1 failed after 30 ms")
+    second_id, params = miner.add("Connection to db-2 failed after 45 ms")
+    other_id, _ = miner.add("User alice logged in")
+
+    assert first_id == second_id
+    assert other_id != first_id
+    assert params == ["db-2", "45"]
+
+    templates = miner.templates()
+    assert templates[0].template == "Connection to <*> failed after <*> ms"
+    assert templates[0].count == 2
+
+def test_only_first_line_shapes_the_template():
+    miner = TemplateMiner()
+    first_id, _ = miner.add("Unhandled error 1\n    at handler (app.js:10)")
+    second_id, _ = miner.add("Unhandled error 2\n    at worker (app.js:99)\n    at main (app.js:1)")
+    assert first_id == second_id
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import logs
+from app.services import time_index
+from app.services.log_manager import LogManager
+
+client = TestClient(app)
+
+API_LOG = "\n".join(
+    f"2024-07-05 10:{minute:02d}:00 [INFO] api:handler:10 - api request {minute}" for minute in range(0, 10, 2)
+)
+DB_LOG = "\n".join(
+    f"2024-07-05 10:{minute:02d}:30 [ERROR] db:query:20 - db error {minute}" for minute in range(1, 10, 2)
+)
+
+def _manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(time_index, "BLOCK_SIZE", 2)
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    file_ids = []
+    for name, content in (("api.log", API_LOG), ("db.log", DB_LOG)):
+        path = tmp_path / name
+        path.write_text(content)
+        file_ids.append(manager.upload_file(path, name).id)
+    return manager, file_ids
+
+def test_time_index_locates_range(monkeypatch):
+    monkeypatch.setattr(time_index, "BLOCK_SIZE", 2)
+    entries = [(type("Entry", (), {"timestamp": datetime(2024, 7, 5, 10, minute)})(), minute * 100)
+               for minute in range(10)]
+    index = time_index.TimeIndex.build(entries)
+    assert index.locate(datetime(2024, 7, 5, 10, 3)).entry_index == 2
+    assert index.stop_offset(datetime(2024, 7, 5, 10, 5)) == 600
+    assert index.stop_offset(datetime(2024, 7, 5, 11)) is None
+    assert index.locate(datetime(2024, 7, 5, 11)) is None
+
+def test_timeline_merges_files_in_time_order(tmp_path, monkeypatch):
+    manager, file_ids = _manager(tmp_path, monkeypatch)
+    timeline = list(manager.iter_timeline(
+        file_ids, since=datetime(2024, 7, 5, 10, 2), until=datetime(2024, 7, 5, 10, 5)
+    ))
+    assert [entry.message for _, _, entry in timeline] == [
+        "api request 2", "db error 3", "api request 4"
+    ]
+    assert [entry_index for _, entry_index, _ in timeline] == [1, 1, 2]
+
+def test_timeline_endpoint_streams_ndjson(tmp_path, monkeypatch):
+    manager, file_ids = _manager(tmp_path, monkeypatch)
+    monkeypatch.setattr(logs, "log_manager", manager)
+
+    response = client.get("/timeline", params={"files": ",".join(file_ids), "since": "2024-07-05T10:07:00"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["entry"]["message"] for line in lines] == ["db error 7", "api request 8", "db error 9"]
+
+    assert client.get("/timeline", params={"files": "missing"}).status_code == 404
+
+def test_timeline_accepts_timezone_aware_bounds(tmp_path, monkeypatch):
+    manager, file_ids = _manager(tmp_path, monkeypatch)
+    monkeypatch.setattr(logs, "log_manager", manager)
+
+    # Converted to naive UTC: 12:07+02:00 is 10:07
+    for since in ("2024-07-05T10:07:00Z", "2024-07-05T12:07:00+02:00"):
+        response = client.get("/timeline", params={"since": since, "until": "2024-07-05T10:09:00Z"})
+        assert response.status_code == 200
+        assert [json.loads(line)["entry"]["message"] for line in response.text.splitlines()] == [
+            "db error 7", "api request 8"
+        ]
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.middleware import MetricsMiddleware
+from app.core.timing import collect_timings, span, timed
+from app.services import mock_gpt_service
+from app.services.log_manager import LogManager
+from app.services.metrics_service import metrics_service
+
+SAMPLE_LOG = "".join(
+    f"2024-07-05 10:{minute:02d}:00 [ERROR] database:connect_db:42 - Database connection failed on shard {minute}\n"
+    for minute in range(20)
+)
+
+def _stage_count(stage, outcome="ok"):
+    labels = {"stage": stage, "outcome": outcome}
+    return metrics_service.registry.get_sample_value("smart_dashboard_stage_duration_seconds_count", labels) or 0
+
+def test_spans_record_outcome_and_reject_unknown_stages():
+    ok, error = _stage_count("parse"), _stage_count("parse", "error")
+
+    with span("parse"):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("parse"):
+            raise RuntimeError("boom")
+
+    assert _stage_count("parse") == ok + 1
+    assert _stage_count("parse", "error") == error + 1
+    with pytest.raises(ValueError):
+        timed("parse_v2")
+
+def test_pipeline_stages_of_upload_and_map_reduce_analysis(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock_gpt_service, "SIMULATED_LATENCY", 0)
+    manager = LogManager(storage_dir=str(tmp_path / "uploads"))
+    log_path = tmp_path / "app.log"
+    log_path.write_text(SAMPLE_LOG)
+
+    with collect_timings() as timings:
+        log_file = manager.upload_file(log_path, "app.log")
+    assert set(timings.stages) == {"parse", "persist", "search_index"}
+
+    with collect_timings() as timings:
+        manager.analyze_file(log_file.id, mode="map_reduce", chunk_entries=5, max_concurrency=4)
+    # Chunk calls on executor threads count towards the same request
+    assert timings.stages["llm"][1] == 5
+    assert {"load", "reduce", "embed", "vector_index", "persist"} <= set(timings.stages)
+
+def test_server_timing_header():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, timing_header=True)
+
+    @app.get("/work")
+    def work():
+        with span("parse"):
+            pass
+        for _ in range(2):
+            with span("embed"):
+                pass
+        return {}
+
+    header = TestClient(app).get("/work").headers["server-timing"]
+    metrics = [metric.split(";")[0] for metric in header.split(", ")]
+    assert metrics == ["parse", "embed", "total"]
+    assert 'embed;dur=' in header and 'desc="2 calls"' in header
+
+    # Off by default
+    plain = FastAPI()
+    plain.add_middleware(MetricsMiddleware)
+    plain.get("/")(lambda: {})
+    assert "server-timing" not in TestClient(plain).get("/").headers
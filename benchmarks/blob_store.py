@@ -0,0 +1,104 @@
+"""
+Benchmark loading log files with raw content inline vs in the blob store
+
+    python -m benchmarks.blob_store --files 20 --size-mb 10
+
+Stores the same generated logs twice: once in a table shaped like the old
+logfile (content TEXT column) and once through the blob store. Reports the
+storage size, the median time of loading one row (what session.get and
+PUT/DELETE do), and the time of reading the full content back.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session
+from app.db import create_sqlite_engine
+from app.models.log_sql import LogFile
+from app.services.blob_store import blob_store
+
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+
+def generate_log(size: int, seed: int) -> str:
+    lines = []
+    total = 0
+    start = datetime(2024, 7, 5) + timedelta(days=seed)
+    index = 0
+    while total < size:
+        line = (f"{(start + timedelta(milliseconds=index * 37)).isoformat(sep=' ')} [{LEVELS[index % len(LEVELS)]}] "
+                f"api:handler:{index % 120} - Request {index * 7919 % 100000} served in {index % 900} ms "
+                f"user={index % 313} session={index * 2654435761 % 2**32:08x}\n")
+        lines.append(line)
+        total += len(line)
+        index += 1
+    return "".join(lines)
+
+def median_ms(fn, runs=7):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=10)
+    args = parser.parse_args()
+    logs = [generate_log(int(args.size_mb * 1024 * 1024), seed) for seed in range(args.files)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_path = Path(tmp) / "inline.db"
+        inline = create_sqlite_engine(f"sqlite:///{inline_path}", echo=False)
+        with inline.begin() as connection:
+            connection.execute(text("CREATE TABLE logfile (id INTEGER PRIMARY KEY, filename VARCHAR, content VARCHAR)"))
+            for index, content in enumerate(logs):
+                connection.execute(text("INSERT INTO logfile VALUES (:id, :name, :content)"),
+                                   {"id": index + 1, "name": f"app{index}.log", "content": content})
+
+        blob_path = Path(tmp) / "blob.db"
+        blobs = create_sqlite_engine(f"sqlite:///{blob_path}", echo=False)
+        SQLModel.metadata.create_all(blobs)
+        start = time.perf_counter()
+        with Session(blobs) as session:
+            for index, content in enumerate(logs):
+                session.add(LogFile(id=index + 1, filename=f"app{index}.log", size=len(content),
+                                    upload_time=datetime.now(), log_count=0,
+                                    content_digest=blob_store.put(session, content.encode("utf-8"))))
+            session.commit()
+        put_s = time.perf_counter() - start
+
+        raw_mb = sum(len(content) for content in logs) / 2**20
+        print(f"{args.files} files, {raw_mb:.0f} MiB raw; blob store writes {raw_mb / put_s:.0f} MiB/s")
+        for name, path in (("inline", inline_path), ("blob store", blob_path)):
+            print(f"  {name:>10} database: {os.path.getsize(path) / 2**20:7.1f} MiB")
+
+        middle = args.files // 2 + 1
+        with inline.connect() as connection:
+            inline_row = median_ms(lambda: connection.execute(
+                text("SELECT * FROM logfile WHERE id = :id"), {"id": middle}).fetchall())
+            inline_read = median_ms(lambda: connection.execute(
+                text("SELECT content FROM logfile WHERE id = :id"), {"id": middle}).scalar())
+        with Session(blobs) as session:
+            def load_row():
+                session.expunge_all()
+                session.get(LogFile, middle)
+            blob_row = median_ms(load_row)
+            digest = session.get(LogFile, middle).content_digest
+            blob_read = median_ms(lambda: blob_store.read_text(session, digest))
+            blob_stream = median_ms(lambda: max(len(chunk) for chunk in blob_store.iter_chunks(session, digest)))
+
+        print(f"{'':>12} {'load row':>10} {'read content':>13}")
+        print(f"{'inline':>12} {inline_row:>8.2f}ms {inline_read:>11.1f}ms")
+        print(f"{'blob store':>12} {blob_row:>8.2f}ms {blob_read:>11.1f}ms  (streamed: {blob_stream:.1f}ms, "
+              f"peak {blob_store.chunk_size / 2**20:.0f} MiB per chunk)")
+        inline.dispose()
+        blobs.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark per-request overhead of the request middleware
+
+    python -m benchmarks.middleware_overhead --requests 20000
+
+Calls a small FastAPI app directly through ASGI (no sockets or HTTP client)
+with no middleware, with a pass-through BaseHTTPMiddleware (the shape of
+the old LoggingMiddleware) and with MetricsMiddleware, and reports the
+median cost per request over several rounds. Log sinks are removed so the
+numbers show the middleware itself, not log formatting and I/O.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.logger import logger
+from app.core.middleware import MetricsMiddleware
+
+class PassThroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+def make_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+    if middleware:
+        app.add_middleware(middleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    return app
+
+async def drive(app: FastAPI, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for index in range(requests):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": f"/items/{index}", "raw_path": f"/items/{index}".encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    logger.remove()
+
+    variants = [("no middleware", None), ("BaseHTTPMiddleware", PassThroughMiddleware),
+                ("MetricsMiddleware", MetricsMiddleware)]
+    apps = [(name, make_app(middleware)) for name, middleware in variants]
+    timings = {name: [] for name, _ in variants}
+    for _ in range(args.rounds):
+        # Interleave variants so drift in machine load hits all of them alike
+        for name, app in apps:
+            timings[name].append(asyncio.run(drive(app, args.requests)))
+
+    baseline = statistics.median(timings["no middleware"])
+    print(f"{'variant':>20} {'us/request':>11} {'overhead':>9}")
+    for name, _ in variants:
+        median = statistics.median(timings[name])
+        print(f"{name:>20} {median:>11.1f} {median - baseline:>+8.1f}us")
+
+if __name__ == "__main__":
+    main()
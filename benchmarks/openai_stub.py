@@ -0,0 +1,94 @@
+"""
+Local OpenAI-compatible stub server for offline load testing
+
+Run it and point the app at it:
+
+    uvicorn benchmarks.openai_stub:app --port 8090
+    OPENAI_BASE_URL=http://localhost:8090/v1 OPENAI_API_KEY=stub uvicorn app.main:app --port 8001
+
+Behaviour is controlled with environment variables:
+    STUB_LATENCY_MS   mean response latency (default 800)
+    STUB_JITTER_MS    uniform jitter added to the latency (default 400)
+    STUB_ERROR_RATE   share of requests answered with 429 or 500 (default 0)
+    STUB_TOKEN_DELAY_MS  delay between streamed chunks (default 20)
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "800"))
+JITTER_MS = float(os.getenv("STUB_JITTER_MS", "400"))
+ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+TOKEN_DELAY_MS = float(os.getenv("STUB_TOKEN_DELAY_MS", "20"))
+
+STUB_ANALYSIS = """🔍 **Stub Analysis:**
+
+**Problem:** Errors detected in the submitted log
+**Cause:** Simulated by the local OpenAI stub
+
+**Solutions:**
+1. This response only exercises the client, retries and load tests"""
+
+app = FastAPI(title="OpenAI stub")
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep((LATENCY_MS + random.uniform(0, JITTER_MS)) / 1000)
+
+    if random.random() < ERROR_RATE:
+        status = random.choice([429, 500])
+        headers = {"retry-after": "0.2"} if status == 429 else {}
+        return JSONResponse(
+            status_code=status, headers=headers,
+            content={"error": {"message": "Simulated failure", "type": "stub_error", "code": status}}
+        )
+
+    if body.get("stream"):
+        return StreamingResponse(_stream_chunks(body.get("model", "stub")), media_type="text/event-stream")
+
+    prompt_chars = sum(len(message.get("content") or "") for message in body.get("messages", []))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": STUB_ANALYSIS},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(STUB_ANALYSIS) // 4,
+            "total_tokens": (prompt_chars + len(STUB_ANALYSIS)) // 4
+        }
+    }
+
+async def _stream_chunks(model: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    deltas = [{"role": "assistant", "content": ""}]
+    deltas += [{"content": token} for token in re.findall(r'\s*\S+', STUB_ANALYSIS)]
+    for index, delta in enumerate(deltas):
+        if index:
+            await asyncio.sleep(TOKEN_DELAY_MS / 1000)
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    final = {
+        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+    }
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
@@ -0,0 +1,101 @@
+"""
+Benchmark FTS5 search over logentry.message against LIKE '%term%'
+
+    python -m benchmarks.sql_fts --rows 2000000
+
+Rows are bulk-inserted through the app's ingest path, which also fills the
+FTS index (ingest rate is reported too). For each query the median of
+several runs is reported for fetching the top 50 hits by relevance, the 50
+most recent hits, the first 50 LIKE matches, and for counting all hits.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session
+from app.db import create_sqlite_engine
+from app.models.log import LogEntry as ParsedLogEntry
+from app.models.log_sql import LogFile
+from app.services.sql_ingest import bulk_insert_entries
+
+TEMPLATES = [
+    "Request {n} served in {ms} ms",
+    "User {n} logged in from 10.0.{a}.{b}",
+    "Cache miss for key session:{n}",
+    "Retrying connection to db-{a} attempt {b}",
+    "Database connection failed: timeout after {ms}ms",
+    "Payment {n} declined by gateway",
+    "Disk quota exceeded on volume vol-{a}",
+]
+# Rough frequency of each template
+WEIGHTS = [500, 200, 200, 50, 20, 5, 1]
+QUERIES = ["served", "connection", "declined", "quota exceeded"]
+
+def generate(count: int):
+    rng = random.Random(42)
+    start = datetime(2024, 7, 5)
+    for index in range(count):
+        template = rng.choices(TEMPLATES, WEIGHTS)[0]
+        yield ParsedLogEntry(
+            id=str(index), timestamp=start + timedelta(milliseconds=index), level="INFO", source="bench",
+            message=template.format(n=index, ms=index % 900, a=index % 7, b=index % 5)
+        )
+
+def median_ms(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(f"sqlite:///{Path(tmp) / 'fts.db'}", echo=False)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            log_file = LogFile(filename="bench.log", size=0, upload_time=datetime.now(), log_count=0)
+            session.add(log_file)
+            session.flush()
+            start = time.perf_counter()
+            bulk_insert_entries(session, log_file.id, generate(args.rows))
+            session.commit()
+            elapsed = time.perf_counter() - start
+        print(f"ingest with FTS index: {args.rows} rows in {elapsed:.1f}s = {args.rows / elapsed:,.0f} rows/sec\n")
+
+        print(f"{'query':>16} {'hits':>9} {'FTS top50':>10} {'FTS recent50':>13} {'LIKE first50':>13} {'FTS count':>10} {'LIKE count':>11}")
+        with engine.connect() as connection:
+            def run(sql, **params):
+                return connection.execute(text(sql), params).fetchall()
+
+            for query in QUERIES:
+                like = f"%{query}%"
+                phrase = f'"{query}"'
+                hits = run("SELECT count(*) FROM logentry_fts WHERE logentry_fts MATCH :q", q=phrase)[0][0]
+                fts_top = median_ms(lambda: run(
+                    "SELECT logentry.id, snippet(logentry_fts, 0, '<mark>', '</mark>', '…', 16) FROM logentry_fts "
+                    "JOIN logentry ON logentry.id = logentry_fts.rowid WHERE logentry_fts MATCH :q "
+                    "ORDER BY bm25(logentry_fts) LIMIT 50", q=phrase))
+                fts_recent = median_ms(lambda: run(
+                    "SELECT logentry.id, snippet(logentry_fts, 0, '<mark>', '</mark>', '…', 16) FROM logentry_fts "
+                    "JOIN logentry ON logentry.id = logentry_fts.rowid WHERE logentry_fts MATCH :q "
+                    "ORDER BY logentry_fts.rowid DESC LIMIT 50", q=phrase))
+                like_top = median_ms(lambda: run(
+                    "SELECT id FROM logentry WHERE message LIKE :q LIMIT 50", q=like))
+                fts_count = median_ms(lambda: run(
+                    "SELECT count(*) FROM logentry_fts WHERE logentry_fts MATCH :q", q=phrase))
+                like_count = median_ms(lambda: run(
+                    "SELECT count(*) FROM logentry WHERE message LIKE :q", q=like), runs=3)
+                print(f"{query:>16} {hits:>9} {fts_top:>8.1f}ms {fts_recent:>11.1f}ms {like_top:>11.1f}ms {fts_count:>8.1f}ms {like_count:>9.1f}ms")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
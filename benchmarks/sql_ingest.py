@@ -0,0 +1,87 @@
+"""
+Benchmark inserting parsed log entries into SQLite: per-row ORM vs bulk executemany
+
+    python -m benchmarks.sql_ingest --rows 200000
+
+Both paths run on a fresh temporary database file with the app's schema
+and insert the same parsed entries in one transaction; parsing time is
+excluded.
+"""
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlmodel import SQLModel, Session, create_engine
+from app.models.log import LogEntry as ParsedLogEntry
+from app.models.log_sql import LogEntry, LogFile
+from app.services.sql_ingest import bulk_insert_entries
+
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+
+def make_entries(count: int):
+    start = datetime(2024, 7, 5)
+    return [
+        ParsedLogEntry(
+            id=str(index), timestamp=start + timedelta(milliseconds=index * 10),
+            level=LEVELS[index % len(LEVELS)], message=f"request {index} served in {index % 500} ms",
+            source=f"api.handler{index % 20}", metadata={"pattern": "custom", "line": index + 1}
+        )
+        for index in range(count)
+    ]
+
+def _new_session(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    log_file = LogFile(filename="bench.log", size=0, upload_time=datetime.now(), log_count=0)
+    session.add(log_file)
+    session.flush()
+    return engine, session, log_file.id
+
+def orm_insert(path: Path, entries) -> float:
+    engine, session, log_file_id = _new_session(path)
+    start = time.perf_counter()
+    for entry in entries:
+        session.add(LogEntry(
+            log_file_id=log_file_id, timestamp=entry.timestamp, level=entry.level, message=entry.message,
+            source=entry.source, log_metadata=json.dumps(entry.metadata)
+        ))
+    session.commit()
+    elapsed = time.perf_counter() - start
+    session.close()
+    engine.dispose()
+    return elapsed
+
+def bulk_insert(path: Path, entries, batch_size: int) -> float:
+    engine, session, log_file_id = _new_session(path)
+    start = time.perf_counter()
+    bulk_insert_entries(session, log_file_id, entries, batch_size)
+    session.commit()
+    elapsed = time.perf_counter() - start
+    session.close()
+    engine.dispose()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--skip-orm", action="store_true", help="Only run the bulk path")
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.skip_orm:
+            results["orm_per_row"] = orm_insert(Path(tmp) / "orm.db", entries)
+        results["bulk_executemany"] = bulk_insert(Path(tmp) / "bulk.db", entries, args.batch_size)
+
+    for name, elapsed in results.items():
+        print(f"{name:>18}: {args.rows} rows in {elapsed:.2f}s = {args.rows / elapsed:,.0f} rows/sec")
+    if "orm_per_row" in results:
+        print(f"{'speedup':>18}: {results['orm_per_row'] / results['bulk_executemany']:.1f}x")
+
+if __name__ == "__main__":
+    main()
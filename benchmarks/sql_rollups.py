@@ -0,0 +1,105 @@
+"""
+Benchmark dashboard chart queries on rollups against scanning logentry
+
+    python -m benchmarks.sql_rollups --rows 2000000
+
+Ingests the rows twice through the app's bulk path, with and without rollup
+maintenance, to show the ingest cost. Then times the chart queries (levels
+per minute over the last day, levels per hour over everything, sources per
+hour, level totals) as a GROUP BY over logentry and through the /stats
+query on rollups.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session
+from app.api.stats import _rollup_stats
+from app.db import create_sqlite_engine
+from app.models.log import LogEntry as ParsedLogEntry
+from app.models.log_sql import LogFile
+from app.services import sql_ingest
+
+LEVELS = ["DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"]
+LEVEL_WEIGHTS = [200, 700, 60, 35, 5]
+SOURCES = [f"service-{index}" for index in range(20)]
+START = datetime(2024, 7, 1)
+
+def generate(count: int, days: int):
+    rng = random.Random(42)
+    step = timedelta(days=days) / count
+    for index in range(count):
+        yield ParsedLogEntry(
+            id=str(index), timestamp=START + step * index, level=rng.choices(LEVELS, LEVEL_WEIGHTS)[0],
+            source=rng.choice(SOURCES), message=f"Request {index} handled"
+        )
+
+def median_ms(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def ingest(engine, rows: int, days: int) -> float:
+    with Session(engine) as session:
+        log_file = LogFile(filename="bench.log", size=0, upload_time=datetime.now(), log_count=0)
+        session.add(log_file)
+        session.flush()
+        start = time.perf_counter()
+        sql_ingest.bulk_insert_entries(session, log_file.id, generate(rows, days))
+        session.commit()
+        return rows / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    end = START + timedelta(days=args.days)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = create_sqlite_engine(f"sqlite:///{Path(tmp) / 'baseline.db'}", echo=False)
+        SQLModel.metadata.create_all(baseline)
+        sync = sql_ingest.sync_logentry_rollups
+        sql_ingest.sync_logentry_rollups = lambda *args: None
+        try:
+            without_rate = ingest(baseline, args.rows, args.days)
+        finally:
+            sql_ingest.sync_logentry_rollups = sync
+        baseline.dispose()
+
+        engine = create_sqlite_engine(f"sqlite:///{Path(tmp) / 'rollups.db'}", echo=False)
+        SQLModel.metadata.create_all(engine)
+        with_rate = ingest(engine, args.rows, args.days)
+        print(f"ingest {args.rows} rows: {without_rate:,.0f} rows/sec without rollups, {with_rate:,.0f} with\n")
+
+        day_ago = end - timedelta(days=1)
+        queries = [
+            ("levels/1m, last day", "%Y-%m-%d %H:%M", "level", day_ago, "1m"),
+            ("levels/1h, all", "%Y-%m-%d %H", "level", None, "1h"),
+            ("sources/1h, all", "%Y-%m-%d %H", "source", None, "1h"),
+            ("level totals, all", None, "level", None, "1h"),
+        ]
+        print(f"{'query':>20} {'scan logentry':>14} {'rollups':>9}")
+        with Session(engine) as session:
+            for name, bucket_format, column, since, resolution in queries:
+                where = "WHERE timestamp >= :since" if since else ""
+                if bucket_format:
+                    sql = (f"SELECT strftime('{bucket_format}', timestamp) AS bucket, {column}, count(*) FROM logentry "
+                           f"{where} GROUP BY bucket, {column} ORDER BY bucket")
+                else:
+                    sql = f"SELECT {column}, count(*) FROM logentry {where} GROUP BY {column}"
+                scan = median_ms(lambda: session.connection().execute(text(sql), {"since": since}).fetchall(), runs=3)
+                rollup = median_ms(lambda: _rollup_stats(session, column, resolution, since, None, None,
+                                                         include_series=bucket_format is not None))
+                print(f"{name:>20} {scan:>12.1f}ms {rollup:>7.1f}ms")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Mixed read/write SQLite benchmark: default settings vs the production profile
+
+    python -m benchmarks.sqlite_profile --seconds 10 --writers 4 --readers 16
+
+"baseline" is the previous setup: one engine with SQLite's defaults
+(rollback journal, FULL sync, no busy handling beyond the driver's) and a
+15-connection pool shared by readers and writers. "production" is
+app.db's profile: WAL and tuned pragmas, a single-connection write pool
+and a separate query_only read pool. Writers insert a log file with a
+batch of entries per transaction; readers run per-file and per-level
+aggregate queries.
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import func, insert
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, Session, select
+from app.db import create_sqlite_engine
+from app.models.log_sql import LogEntry, LogFile
+
+LEVELS = ["INFO", "DEBUG", "WARN", "ERROR"]
+# Readers query only the seeded files so their work does not grow with the write rate
+SEED_FILES = 50
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)] if ordered else 0.0
+
+def write_once(engine, entries_per_file):
+    with Session(engine) as session:
+        log_file = LogFile(filename="bench.log", size=0, upload_time=datetime.now(), log_count=entries_per_file)
+        session.add(log_file)
+        session.flush()
+        start = datetime(2024, 7, 5)
+        session.connection().execute(insert(LogEntry.__table__), [
+            {"log_file_id": log_file.id, "timestamp": start + timedelta(seconds=index),
+             "level": LEVELS[index % len(LEVELS)], "message": f"message {index}", "source": "bench"}
+            for index in range(entries_per_file)
+        ])
+        session.commit()
+
+def read_once(engine, max_file_id):
+    with Session(engine) as session:
+        file_id = random.randint(1, max(max_file_id, 1))
+        session.exec(select(func.count()).select_from(LogEntry).where(LogEntry.log_file_id == file_id)).one()
+        session.exec(select(LogEntry.level, func.count()).where(LogEntry.log_file_id == file_id)
+                     .group_by(LogEntry.level)).all()
+
+def run(name, write_engine, read_engine, seconds, writers, readers, entries_per_file, write_interval):
+    SQLModel.metadata.create_all(write_engine)
+    for _ in range(SEED_FILES):
+        write_once(write_engine, entries_per_file)
+
+    stats = {"write": [], "read": []}
+    errors = {"write": 0, "read": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(kind):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if kind == "write":
+                    write_once(write_engine, entries_per_file)
+                else:
+                    read_once(read_engine, SEED_FILES)
+            except OperationalError:
+                with lock:
+                    errors[kind] += 1
+                continue
+            with lock:
+                stats[kind].append(time.perf_counter() - start)
+            if kind == "write" and write_interval:
+                time.sleep(write_interval)
+
+    threads = [threading.Thread(target=worker, args=("write",)) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=("read",)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for kind in ("write", "read"):
+        latencies = stats[kind]
+        print(f"{name:>10} {kind:>5}: {len(latencies) / seconds:8.1f} ops/s  "
+              f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+              f"errors {errors[kind]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--entries-per-file", type=int, default=200)
+    parser.add_argument("--write-interval", type=float, default=0.1,
+                        help="Pause of each writer between transactions, so both runs offer the same write load")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'baseline.db'}"
+        engine = create_sqlite_engine(url, profile="default", pool_size=15, echo=False)
+        run("baseline", engine, engine, args.seconds, args.writers, args.readers, args.entries_per_file, args.write_interval)
+        engine.dispose()
+
+        url = f"sqlite:///{Path(tmp) / 'production.db'}"
+        write_engine = create_sqlite_engine(url, profile="production", pool_size=1, echo=False)
+        read_engine = create_sqlite_engine(url, profile="production", pool_size=args.readers, read_only=True, echo=False)
+        run("production", write_engine, read_engine, args.seconds, args.writers, args.readers, args.entries_per_file, args.write_interval)
+        write_engine.dispose()
+        read_engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -1,128 +1,138 @@
 #!/usr/bin/env python3
 """
-Script to create log entries from existing log files in the database
-"""
+Backfill SQL log entries from the stored content of log files
+
+    python create_log_entries.py --workers 4
 
-import sqlite3
-import re
+Content is parsed with the app's LogParser, so multi-line entries come out
+exactly as on upload. Entries are inserted through the bulk ingest path on
+the app's WAL engine, keeping the full-text index and rollups in step. Every
+processed file is recorded with its content digest: a second run skips it,
+files whose entries were stored at upload are only recorded, and a file
+whose content changed since is re-parsed and its entries replaced.
+"""
+import argparse
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Dict, List, Optional
+from sqlalchemy import delete, exists
+from sqlalchemy.engine import Engine
+from sqlmodel import Field, Session, SQLModel, select
+from app.db import DATABASE_URL, create_sqlite_engine, create_db_and_tables
+from app.models.log_sql import LogEntry, LogFile
+from app.services.blob_store import blob_store
+from app.services.log_parser import LogParser
+from app.services.sql_ingest import bulk_insert_rows, entry_rows
 
-def parse_log_line(line: str, log_file_id: int) -> Optional[Dict]:
-    """Parse a log line and return a log entry dictionary"""
-    if not line.strip():
-        return None
-    
-    try:
-        # Default values
-        timestamp = datetime.now().isoformat()
-        level = 'INFO'
-        message = line.strip()
-        source = 'unknown'
-        log_metadata = None
-        
-        # Try to extract timestamp
-        timestamp_pattern = r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?)'
-        timestamp_match = re.search(timestamp_pattern, line)
-        if timestamp_match:
-            timestamp = timestamp_match.group(1)
-            message = line.replace(timestamp_match.group(0), '').strip()
-        
-        # Try to extract log level
-        level_patterns = [
-            r'\[(CRITICAL|ERROR|WARN|WARNING|INFO|DEBUG)\]',
-            r'(CRITICAL|ERROR|WARN|WARNING|INFO|DEBUG):',
-            r'\b(CRITICAL|ERROR|WARN|WARNING|INFO|DEBUG)\b'
-        ]
-        
-        for pattern in level_patterns:
-            level_match = re.search(pattern, message, re.IGNORECASE)
-            if level_match:
-                level = level_match.group(1).upper()
-                message = re.sub(pattern, '', message, flags=re.IGNORECASE).strip()
-                break
-        
-        # Try to extract source/component
-        source_pattern = r'\[([^\]]+)\]'
-        source_match = re.search(source_pattern, message)
-        if source_match:
-            source = source_match.group(1)
-            message = re.sub(source_pattern, '', message).strip()
-        
-        # Clean up message
-        message = re.sub(r'^\s*[-:]\s*', '', message).strip()
-        
-        return {
-            'log_file_id': log_file_id,
-            'timestamp': timestamp,
-            'level': level,
-            'message': message,
-            'source': source,
-            'log_metadata': log_metadata
-        }
-    except Exception as e:
-        print(f"Error parsing line: {line} - {e}")
-        return None
-
-def create_log_entries():
-    """Create log entries from existing log files"""
-    conn = sqlite3.connect('logs.db')
-    cursor = conn.cursor()
-    
+class LogEntryBackfill(SQLModel, table=True):
+    """Log file whose entries were created from its content"""
+    log_file_id: int = Field(primary_key=True)
+    content_digest: str
+    entry_count: int = 0
+    processed_at: datetime = Field(default_factory=datetime.utcnow)
+
+_read_engines: Dict[str, Engine] = {}
+
+def parse_stored_file(database_url: str, log_file_id: int, filename: str, content_digest: str) -> List[dict]:
+    """Entry rows parsed from a log file's stored content
+
+    Runs in worker processes, each reading content over its own read-only
+    connection instead of receiving it from the writer.
+    """
+    if database_url not in _read_engines:
+        _read_engines[database_url] = create_sqlite_engine(database_url, pool_size=1, read_only=True, echo=False)
+    with Session(_read_engines[database_url]) as session:
+        content = blob_store.read_text(session, content_digest)
+    entries = LogParser()._parse_content(content, filename)
+    return list(entry_rows(log_file_id, entries))
+
+def _record(session: Session, log_file: LogFile, entry_count: int):
+    backfill = session.get(LogEntryBackfill, log_file.id) or LogEntryBackfill(log_file_id=log_file.id,
+                                                                              content_digest=log_file.content_digest)
+    backfill.content_digest = log_file.content_digest
+    backfill.entry_count = entry_count
+    backfill.processed_at = datetime.utcnow()
+    session.add(backfill)
+
+def _store_entries(session: Session, log_file: LogFile, rows: List[dict]) -> int:
+    """Replace the file's entries with ``rows`` in one transaction"""
+    session.exec(delete(LogEntry).where(LogEntry.log_file_id == log_file.id))
+    count = bulk_insert_rows(session, log_file.id, rows) if rows else 0
+    log_file.log_count = count
+    session.add(log_file)
+    _record(session, log_file, count)
+    session.commit()
+    return count
+
+def _parse_inline(*args) -> Future:
+    future = Future()
+    future.set_result(parse_stored_file(*args))
+    return future
+
+def create_log_entries(database_url: str = DATABASE_URL, workers: int = 0, db_engine: Optional[Engine] = None) -> dict:
+    """Parse and store the entries of every log file not backfilled yet
+
+    With ``workers`` > 0 files are parsed in that many processes and
+    written here in order, with at most two parsed files per worker held
+    in memory. Returns the run's totals.
+    """
+    db_engine = db_engine or create_sqlite_engine(database_url, echo=False)
+    LogEntryBackfill.__table__.create(db_engine, checkfirst=True)
+    totals = {"parsed": 0, "recorded": 0, "skipped": 0, "entries": 0}
+    start_time = time.time()
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    pending = deque()
     try:
-        # Get all log files
-        cursor.execute("SELECT id, filename, content FROM logfile")
-        log_files = cursor.fetchall()
-        
-        print(f"Found {len(log_files)} log files to process")
-        
-        for log_file_id, filename, content in log_files:
-            if not content:
-                print(f"Skipping {filename} - no content")
-                continue
-            
-            print(f"Processing {filename} (ID: {log_file_id})")
-            
-            # Split content into lines
-            lines = content.split('\n')
-            entries_created = 0
-            
-            for line in lines:
-                if line.strip():
-                    log_entry = parse_log_line(line, log_file_id)
-                    if log_entry:
-                        # Insert log entry
-                        cursor.execute("""
-                            INSERT INTO logentry (log_file_id, timestamp, level, message, source, log_metadata)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (
-                            log_entry['log_file_id'],
-                            log_entry['timestamp'],
-                            log_entry['level'],
-                            log_entry['message'],
-                            log_entry['source'],
-                            log_entry['log_metadata']
-                        ))
-                        entries_created += 1
-            
-            # Update log_count in logfile
-            cursor.execute("UPDATE logfile SET log_count = ? WHERE id = ?", (entries_created, log_file_id))
-            print(f"Created {entries_created} log entries for {filename}")
-        
-        # Commit changes
-        conn.commit()
-        print("Successfully created log entries!")
-        
-        # Show summary
-        cursor.execute("SELECT COUNT(*) FROM logentry")
-        total_entries = cursor.fetchone()[0]
-        print(f"Total log entries in database: {total_entries}")
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        conn.rollback()
+        with Session(db_engine) as session:
+            def write_next():
+                log_file, future = pending.popleft()
+                count = _store_entries(session, log_file, future.result())
+                totals["parsed"] += 1
+                totals["entries"] += count
+                print(f"Created {count} log entries for {log_file.filename} (ID: {log_file.id})")
+
+            has_entries = exists().where(LogEntry.log_file_id == LogFile.id)
+            statement = (
+                select(LogFile, LogEntryBackfill.content_digest, has_entries)
+                .outerjoin(LogEntryBackfill, LogEntryBackfill.log_file_id == LogFile.id)
+                .order_by(LogFile.id)
+            )
+            for log_file, backfilled_digest, stored in session.exec(statement).all():
+                if log_file.content_digest is None or backfilled_digest == log_file.content_digest:
+                    totals["skipped"] += 1
+                    continue
+                if backfilled_digest is None and stored:
+                    # Entries were parsed on upload
+                    _record(session, log_file, log_file.log_count)
+                    session.commit()
+                    totals["recorded"] += 1
+                    continue
+
+                args = (database_url, log_file.id, log_file.filename, log_file.content_digest)
+                future = executor.submit(parse_stored_file, *args) if executor else _parse_inline(*args)
+                pending.append((log_file, future))
+                if len(pending) > 2 * max(workers, 1):
+                    write_next()
+            while pending:
+                write_next()
     finally:
-        conn.close()
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.time() - start_time
+    print(f"Parsed {totals['parsed']} files into {totals['entries']:,} entries in {elapsed:.1f}s "
+          f"({totals['entries'] / max(elapsed, 1e-9):,.0f} entries/s); recorded {totals['recorded']} files "
+          f"parsed on upload, skipped {totals['skipped']}")
+    return totals
 
 if __name__ == "__main__":
-    create_log_entries() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--workers", type=int, default=0, help="parser processes; 0 parses in this process")
+    args = parser.parse_args()
+    if args.database_url == DATABASE_URL:
+        create_db_and_tables()
+    create_log_entries(args.database_url, args.workers)